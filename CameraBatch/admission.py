@@ -0,0 +1,317 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Memory and disk admission control for parallel renders.
+
+Before a job starts its peak memory and output size are estimated from what
+earlier jobs of the same scene, camera and renderer used. A job is only
+admitted when the machine has room for it on top of what already running
+jobs are still expected to grow into, otherwise it waits in the queue.
+
+Requires Python 3, it is driven by the orchestrator's event loop.
+"""
+
+import os
+import re
+import json
+import shutil
+import asyncio
+import logging
+
+from .autoscale import (read_meminfo, tree_rss)
+
+log = logging.getLogger('CameraBatch')
+
+GB = 1024 ** 3
+
+
+def default_history_path():
+    return os.path.join(os.path.expanduser("~"), ".camerabatch",
+                        "admission.json")
+
+
+def job_key(job):
+    return "|".join([job.scene, job.camera, job.renderer])
+
+
+class AdmissionError(RuntimeError):
+    pass
+
+
+def camera_pattern(camera):
+    """
+    Matches image paths naming a camera as a whole folder or file name
+    token, so ``cam1`` does not match ``cam10``.
+    """
+    token = re.escape(camera.replace(":", "_"))
+    return re.compile(r"(^|[\\/._-])%s($|[\\/._-])" % token)
+
+
+# The frame number of an image name such as ``shot.0101.exr``.
+FRAME_NUMBER = re.compile(r"[._](-?\d+)\.[^.\\/]+$")
+
+
+class ResourceHistory(object):
+    """
+    Peak memory and bytes per frame observed for each job key.
+    """
+    def __init__(self, path=None):
+
+        self.path = path or default_history_path()
+        self.entries = {}
+
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (IOError, OSError, ValueError):
+            pass
+
+    def get(self, job):
+        return self.entries.get(job_key(job), {})
+
+    def record(self, job, memory=None, frame_bytes=None):
+
+        entry = self.entries.setdefault(job_key(job), {})
+        if memory:
+            # Keep the worst case, peaks vary between frames.
+            entry["memory"] = max(memory, entry.get("memory", 0))
+        if frame_bytes:
+            entry["frame_bytes"] = frame_bytes
+
+        self.save()
+
+    def save(self):
+
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        tmp_path = "%s.%d" % (self.path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.rename(tmp_path, self.path)
+
+
+class AdmissionController(object):
+    """
+    Admits jobs only when memory and disk budgets allow.
+
+    Jobs without history are estimated at ``default_memory`` and
+    ``default_frame_bytes``; the first of them to finish becomes the probe
+    that calibrates the rest of that camera's chunks.
+
+    :param memory_fraction: Share of total memory renders may use.
+    :param output_dir: Where images land, used to check free disk space
+                       and to measure the output of finished jobs.
+    :param disk_reserve: Bytes of disk always left free.
+    """
+    def __init__(self, history=None, memory_fraction=0.85,
+                 default_memory=8 * GB, output_dir=None,
+                 disk_reserve=5 * GB, default_frame_bytes=50 * 1024 ** 2,
+                 poll=5.0):
+
+        self.history = history or ResourceHistory()
+        self.memory_fraction = memory_fraction
+        self.default_memory = default_memory
+        self.output_dir = output_dir
+        self.disk_reserve = disk_reserve
+        self.default_frame_bytes = default_frame_bytes
+        self.poll = poll
+
+        self.running = {}
+
+    def estimate(self, job):
+        """
+        Estimates a job's peak memory and output size.
+
+        :param job: Job to estimate.
+        :type job: (RenderJob)
+
+        :raises: None
+
+        :return: Peak memory and output bytes.
+        :rtype: tuple
+        """
+        entry = self.history.get(job)
+        memory = entry.get("memory", self.default_memory)
+        frame_bytes = entry.get("frame_bytes", self.default_frame_bytes)
+
+        return memory, frame_bytes * len(job.frames)
+
+    def outstanding(self, pids):
+        """
+        Memory and disk that running jobs are still expected to take.
+        """
+        memory = 0
+        disk = 0
+
+        for job, (estimate, output) in self.running.items():
+            pid = pids.get(job)
+            used = tree_rss(pid) if pid else 0
+            memory += max(estimate - used, 0)
+            disk += output
+
+        return memory, disk
+
+    def fits(self, job, pids):
+        """
+        Checks whether a job fits right now.
+
+        :raises: None
+
+        :return: Whether memory and disk allow the job.
+        :rtype: tuple of bool
+        """
+        memory, output = self.estimate(job)
+        pending_memory, pending_disk = self.outstanding(pids)
+
+        memory_ok = True
+        meminfo = read_meminfo()
+        if meminfo:
+            total = meminfo.get("MemTotal", 0)
+            available = meminfo.get("MemAvailable", meminfo.get("MemFree"))
+            if available is not None:
+                budget = available - pending_memory - total * (
+                    1.0 - self.memory_fraction)
+                memory_ok = memory <= budget
+
+        disk_ok = True
+        free = self.disk_free()
+        if free is not None:
+            disk_ok = output <= free - pending_disk
+
+        return memory_ok, disk_ok
+
+    def disk_free(self):
+        """
+        Free bytes in the output folder above the reserve, None if unknown.
+
+        A folder the batch has yet to create is measured on its closest
+        existing parent.
+        """
+        folder = self.output_dir
+        while folder and not os.path.isdir(folder):
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                return None
+            folder = parent
+
+        if not folder:
+            return None
+
+        return shutil.disk_usage(folder).free - self.disk_reserve
+
+    async def acquire(self, job, pids):
+        """
+        Waits until a job fits, then reserves its estimate.
+
+        A job that does not fit with nothing else running is admitted
+        anyway, since waiting cannot help it, unless the output disk is
+        already down to its reserve.
+
+        :param job: Job to admit.
+        :type job: (RenderJob)
+        :param pids: Returns running job to pid, re-read while waiting.
+        :type pids: (callable)
+
+        :raises: ``AdmissionError`` if nothing is running and the output
+                 disk is full.
+
+        :return: None
+        :rtype: NoneType
+        """
+        waiting = False
+
+        while True:
+            memory_ok, disk_ok = self.fits(job, pids())
+
+            if memory_ok and disk_ok:
+                break
+
+            if not self.running:
+                if not disk_ok:
+                    free = self.disk_free()
+                    if free is not None and free <= 0:
+                        raise AdmissionError(
+                            "%s has no space left above the %.1f GB "
+                            "reserve for %r." % (
+                                self.output_dir, self.disk_reserve / GB,
+                                job))
+                    log.warning("%r may need more disk space than %s has "
+                                "free, starting it anyway." % (
+                                    job, self.output_dir))
+                break
+
+            if not waiting:
+                log.info("%r waiting for %s." % (
+                    job, "disk space" if not disk_ok else "memory"))
+                waiting = True
+
+            await asyncio.sleep(self.poll)
+
+        self.running[job] = self.estimate(job)
+
+    def release(self, job):
+        """
+        Drops a job's reservation.
+        """
+        self.running.pop(job, None)
+
+    async def learn(self, job, peak_memory=None, started=None):
+        """
+        Records what a finished job used.
+
+        The output folder is walked on an executor thread, away from the
+        event loop.
+
+        :param job: Finished job.
+        :type job: (RenderJob)
+        :param peak_memory: Highest RSS seen for the job's process tree.
+        :type peak_memory: (int)
+        :param started: Time the job started, to find its images.
+        :type started: (float)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        frame_bytes = None
+        if started and self.output_dir:
+            written = await asyncio.get_event_loop().run_in_executor(
+                None, self.output_bytes, job, started)
+            if written:
+                frame_bytes = written // max(len(job.frames), 1)
+
+        if peak_memory or frame_bytes:
+            self.history.record(job, memory=peak_memory,
+                                frame_bytes=frame_bytes)
+
+    def output_bytes(self, job, started):
+        """
+        Bytes of images for the job's camera and frames written since
+        ``started``, other chunks of the camera running alongside are not
+        counted.
+        """
+        total = 0
+        pattern = camera_pattern(job.camera)
+        frames = set(job.frames)
+
+        for root, dirs, files in os.walk(self.output_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if not pattern.search(
+                        os.path.relpath(path, self.output_dir)):
+                    continue
+                frame = FRAME_NUMBER.search(name)
+                if frame is None or int(frame.group(1)) not in frames:
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_mtime >= started:
+                    total += stat.st_size
+
+        return total
+
@@ -1,21 +1,236 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import os
 import logging
 from maya import (cmds, mel)
 
 log = logging.getLogger('CameraBatch')
 
 
-def batch_camera(camera):
+RENDER_GLOBALS = ("defaultRenderGlobals.animation",
+                  "defaultRenderGlobals.startFrame",
+                  "defaultRenderGlobals.endFrame",
+                  "defaultRenderGlobals.byFrameStep")
 
-    cmds.setAttr("defaultRenderGlobals.animation", 1)
-    cmds.setAttr("defaultRenderGlobals.startFrame", camera.start_frame)
-    cmds.setAttr("defaultRenderGlobals.endFrame", camera.end_frame)
 
-    for cam in cmds.ls(type="camera"):
-        cmds.setAttr(cam + ".renderable", False)
+class RenderState(object):
+    """
+    Applies per camera render settings as a diff against the scene.
 
-    cmds.setAttr(camera.name + ".renderable", True)
+    The scene's cameras, their renderable flags and the render globals are
+    read once. Each :meth:`apply` sets only the attributes whose value
+    changes, so switching cameras costs a couple of ``setAttr`` calls rather
+    than one per camera in the scene. :meth:`restore` puts back what the
+    scene had before the batch, including anything a quality tier changed.
+
+    ``tier`` is the batch's :class:`QualityTier`, a camera's own ``tier``
+    attribute takes precedence.
+    """
+    def __init__(self, tier=None):
+
+        self.tier = tier
+        self.renderer = current_renderer()
+        self.resolution = resolution()
+
+        self.cameras = cmds.ls(type="camera")
+        self.original = dict(
+            (attr, cmds.getAttr(attr)) for attr in RENDER_GLOBALS)
+        self.original.update(
+            (cam + ".renderable", cmds.getAttr(cam + ".renderable"))
+            for cam in self.cameras)
+        self.current = dict(self.original)
+
+    def __repr__(self):
+        return "<%s instance of %d cameras>" % (
+            self.__class__.__name__, len(self.cameras))
+
+    def settings(self, camera):
+        """
+        The attribute values that render only ``camera`` at its tier.
+
+        :param camera: Camera to render.
+        :type camera: (Camera)
+
+        :raises: None
+
+        :return: Values keyed by node attribute.
+        :rtype: dict
+        """
+        from .quality import quality_tier
+
+        tier = self.tier
+        if getattr(camera, "tier", None):
+            tier = quality_tier(camera.tier)
+
+        values = dict((attr, self.original[attr])
+                      for attr in self.original if attr not in RENDER_GLOBALS
+                      and not attr.endswith(".renderable"))
+        values.update({"defaultRenderGlobals.animation": True,
+                       "defaultRenderGlobals.startFrame": camera.start_frame,
+                       "defaultRenderGlobals.endFrame": camera.end_frame,
+                       "defaultRenderGlobals.byFrameStep": 1})
+
+        if tier is not None:
+            values["defaultRenderGlobals.byFrameStep"] = tier.step
+            values.update(tier.overrides(self.renderer, self.resolution))
+
+        for cam in self.cameras:
+            values[cam + ".renderable"] = cam == camera.shape
+
+        return values
+
+    def apply(self, camera):
+        """
+        Sets the attributes that differ from the current state.
+
+        :param camera: Camera to render.
+        :type camera: (Camera)
+
+        :raises: None
+
+        :return: Number of attributes set.
+        :rtype: int
+        """
+        if camera.shape not in self.cameras:
+            # Created after the state was read.
+            attr = camera.shape + ".renderable"
+            self.cameras.append(camera.shape)
+            self.original[attr] = self.current[attr] = cmds.getAttr(attr)
+
+        return self.set_values(self.settings(camera))
+
+    def restore(self):
+        """
+        Puts back the render globals and renderable flags of the scene.
+
+        Attributes of nodes deleted or renamed during the batch are skipped
+        with a warning, the rest are still restored.
+
+        :raises: None
+
+        :return: Number of attributes set.
+        :rtype: int
+        """
+        return self.set_values(self.original)
+
+    def set_values(self, values):
+
+        for attr in values:
+            if attr not in self.original and cmds.objExists(attr):
+                # First time a tier touches it, remember it for restore.
+                self.original[attr] = self.current[attr] = cmds.getAttr(attr)
+
+        changed = [(attr, value) for attr, value in sorted(values.items())
+                   if attr in self.current and self.current[attr] != value]
+        if not changed:
+            return 0
+
+        count = 0
+        cmds.undoInfo(openChunk=True, chunkName="CameraBatch")
+        try:
+            for attr, value in changed:
+                if not cmds.objExists(attr):
+                    log.warning("%s no longer exists, skipping it" % attr)
+                    self.forget(attr)
+                    continue
+                try:
+                    cmds.setAttr(attr, value)
+                except RuntimeError as error:
+                    log.warning("Could not set %s: %s" % (attr, error))
+                    continue
+                self.current[attr] = value
+                count += 1
+        finally:
+            cmds.undoInfo(closeChunk=True)
+
+        return count
+
+    def forget(self, attr):
+        """
+        Stops tracking an attribute whose node was deleted or renamed.
+
+        :param attr: Node attribute.
+        :type attr: str
+
+        :raises: None
+
+        :return: None
+        """
+        self.original.pop(attr, None)
+        self.current.pop(attr, None)
+        node = attr.rsplit(".", 1)[0]
+        if attr.endswith(".renderable") and node in self.cameras:
+            self.cameras.remove(node)
+
+
+def batch_camera(camera, state=None):
+
+    state = state or RenderState()
+    state.apply(camera)
 
     mel.eval("mayaBatchRender;")
+
+
+def resolution():
+    """
+    The scene's render width and height.
+
+    :raises: None
+
+    :return: Width and height in pixels.
+    :rtype: tuple
+    """
+    return (cmds.getAttr("defaultResolution.width"),
+            cmds.getAttr("defaultResolution.height"))
+
+
+def image_path(camera_name, frame):
+    """
+    Resolves the rendered image path of a camera at a frame.
+
+    :param camera_name: Camera transform or shape name.
+    :type camera_name: (str)
+    :param frame: Frame number.
+    :type frame: (int)
+
+    :raises: None
+
+    :return: Full image path.
+    :rtype: str
+    """
+    padding = cmds.getAttr("defaultRenderGlobals.extensionPadding")
+    names = cmds.renderSettings(
+        camera=camera_name,
+        fullPath=True,
+        genericFrameImageName=str(int(frame)).zfill(padding))
+
+    return names[0] if names else None
+
+
+def render_log_path():
+    """
+    Path of the log written by in-session batch renders.
+
+    :raises: None
+
+    :return: Full path to mayaRenderLog.txt.
+    :rtype: str
+    """
+    return os.path.join(
+        cmds.internalVar(userAppDir=True), "mayaRenderLog.txt")
+
+
+def current_renderer():
+    """
+    The ``Render -r`` name of the scene's current renderer.
+
+    :raises: None
+
+    :return: Renderer name, ``file`` if it has no short name.
+    :rtype: str
+    """
+    from .scene.model import RENDERERS
+
+    current = cmds.getAttr("defaultRenderGlobals.currentRenderer")
+    return RENDERERS.get(current, "file")
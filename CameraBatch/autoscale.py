@@ -0,0 +1,203 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Load-adaptive render concurrency from /proc metrics.
+
+Where /proc is unavailable every reading is None and the autoscaler holds
+its current concurrency.
+"""
+
+import os
+import time
+import logging
+
+log = logging.getLogger('CameraBatch')
+
+
+def read_loadavg(path="/proc/loadavg"):
+    """
+    Reads the one minute load average.
+
+    :raises: None
+
+    :return: Load average, None if unavailable.
+    :rtype: float
+    """
+    try:
+        with open(path) as f:
+            return float(f.read().split()[0])
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+
+def read_meminfo(path="/proc/meminfo"):
+    """
+    Reads /proc/meminfo.
+
+    :raises: None
+
+    :return: Values in bytes keyed by field name, empty if unavailable.
+    :rtype: dict
+    """
+    info = {}
+
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                parts = value.split()
+                if parts:
+                    info[name] = int(parts[0]) * (
+                        1024 if len(parts) > 1 else 1)
+    except (IOError, OSError, ValueError):
+        return {}
+
+    return info
+
+
+def process_rss(pid):
+    """
+    Resident memory of one process.
+
+    :raises: None
+
+    :return: RSS in bytes, 0 if the process is gone.
+    :rtype: int
+    """
+    try:
+        with open("/proc/%d/status" % pid) as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError, ValueError):
+        pass
+
+    return 0
+
+
+def tree_rss(pid):
+    """
+    Resident memory of a process and all of its descendants.
+
+    :raises: None
+
+    :return: RSS in bytes.
+    :rtype: int
+    """
+    from .orchestrator import descendants
+
+    return sum(process_rss(p) for p in [pid] + descendants(pid))
+
+
+class Autoscaler(object):
+    """
+    Picks how many renders may run at once.
+
+    Concurrency grows by one when the load per core is below ``low_load``
+    and there is room in memory for another worker of the current average
+    size, and shrinks by one when the load per core exceeds ``high_load`` or
+    available memory falls under ``min_free``. A change needs ``samples``
+    consecutive readings agreeing and ``cooldown`` seconds since the last
+    change, which keeps it from flapping.
+
+    While ``artist_active`` is set ``artist_cores`` are left out of the
+    core count and concurrency is capped at ``artist_max_jobs``.
+    """
+    def __init__(self, min_jobs=1, max_jobs=None, low_load=0.6,
+                 high_load=0.9, min_free=0.1, samples=3, cooldown=30.0,
+                 artist_cores=2, artist_max_jobs=1):
+
+        self.cores = os.cpu_count() if hasattr(os, "cpu_count") else None
+        self.cores = self.cores or 1
+        self.min_jobs = max(min_jobs, 1)
+        self.max_jobs = max(max_jobs or self.cores, self.min_jobs)
+        self.low_load = low_load
+        self.high_load = high_load
+        self.min_free = min_free
+        self.samples = samples
+        self.cooldown = cooldown
+        self.artist_cores = artist_cores
+        self.artist_max_jobs = artist_max_jobs
+
+        self.artist_active = False
+        self.jobs = self.min_jobs
+        self.pressure = 0
+        self.changed = 0.0
+
+    @property
+    def ceiling(self):
+
+        if self.artist_active:
+            return max(min(self.max_jobs, self.artist_max_jobs),
+                       self.min_jobs)
+
+        return self.max_jobs
+
+    def update(self, worker_pids=(), now=None):
+        """
+        Takes a reading and returns the concurrency to use.
+
+        :param worker_pids: Pids of running renders.
+        :type worker_pids: (list)
+        :param now: Current time, for tests.
+        :type now: (float)
+
+        :raises: None
+
+        :return: Allowed concurrent renders.
+        :rtype: int
+        """
+        now = time.time() if now is None else now
+        ceiling = self.ceiling
+
+        if self.jobs > ceiling:
+            # Leaving artist mode is gradual, entering it is immediate.
+            self.set_jobs(ceiling, now)
+            return self.jobs
+
+        load = read_loadavg()
+        meminfo = read_meminfo()
+        if load is None or not meminfo:
+            return self.jobs
+
+        cores = self.cores
+        if self.artist_active:
+            cores = max(cores - self.artist_cores, 1)
+        load_per_core = load / float(cores)
+
+        total = meminfo.get("MemTotal", 0)
+        available = meminfo.get("MemAvailable", meminfo.get("MemFree", 0))
+        free = available / float(total) if total else 1.0
+
+        worker_rss = [tree_rss(pid) for pid in worker_pids]
+        average_rss = sum(worker_rss) / len(worker_rss) if worker_rss else 0
+
+        if load_per_core > self.high_load or free < self.min_free:
+            direction = -1
+        elif (load_per_core < self.low_load and
+              available - average_rss > self.min_free * total):
+            direction = 1
+        else:
+            direction = 0
+
+        if direction == 0 or (self.pressure and
+                              (direction > 0) != (self.pressure > 0)):
+            self.pressure = direction
+        else:
+            self.pressure += direction
+
+        if abs(self.pressure) >= self.samples and \
+                now - self.changed >= self.cooldown:
+            self.set_jobs(self.jobs + direction, now)
+
+        return self.jobs
+
+    def set_jobs(self, jobs, now):
+
+        jobs = max(self.min_jobs, min(jobs, self.ceiling))
+        if jobs != self.jobs:
+            log.info("Render concurrency %d -> %d" % (self.jobs, jobs))
+            self.jobs = jobs
+            self.changed = now
+
+        self.pressure = 0
@@ -0,0 +1,386 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Renderer backends.
+
+A backend knows how to launch its renderer for a :class:`RenderJob`, how to
+read its output through a precompiled :class:`PatternTable` and where its
+images land. Backends are looked up by their ``Render -r`` name, unknown
+names are refused. :class:`TestBackend` stands in for Maya in tests and is
+only registered when ``CAMERABATCH_TEST_BACKEND`` is set.
+
+Image paths follow the image file prefix, format and padding saved in the
+scene. A prefix without ``<Camera>`` would give every camera of a batch
+the same images, such jobs render into a folder per camera instead.
+"""
+
+import os
+import sys
+import logging
+
+from .jobs import (render_executable, mel_set_attr)
+from .logtail import (PatternTable, COMMON_PATTERNS, PATTERNS,
+                      FRAME_STARTED, FRAME_DONE, FINISHED)
+
+log = logging.getLogger('CameraBatch')
+
+# defaultRenderGlobals.imageFormat to file extension.
+IMAGE_FORMATS = {0: "gif", 1: "pic", 2: "rla", 3: "tif", 4: "tif",
+                 5: "rgb", 6: "als", 7: "iff", 8: "jpg", 9: "eps",
+                 10: "iff", 11: "cin", 12: "yuv", 19: "tga", 20: "bmp",
+                 23: "yuv", 31: "psd", 32: "png", 35: "dds", 36: "psd",
+                 40: "exr"}
+
+# Plugin image formats, imageFormat 51, name their extension in a key.
+CUSTOM_FORMAT = 51
+
+_image_settings = {}
+
+
+def image_settings(scene):
+    """
+    Image file prefix, format and padding saved in a scene.
+
+    Read without Maya and kept until the scene file changes. Attributes a
+    scene does not save are at Maya's defaults.
+
+    :param scene: Scene path.
+    :type scene: (str)
+
+    :raises: None
+
+    :return: ``prefix``, ``format``, ``key`` and ``padding``, empty if the
+             scene cannot be read.
+    :rtype: dict
+    """
+    try:
+        key = (scene, os.path.getmtime(scene))
+    except (OSError, TypeError):
+        return {}
+
+    if key not in _image_settings:
+        from .scene import read_scene
+
+        try:
+            render_globals = read_scene(scene).render_globals
+        except (IOError, OSError, ValueError, RuntimeError) as e:
+            log.debug("Could not read image settings of %s: %s" % (scene, e))
+            _image_settings[key] = {}
+        else:
+            _image_settings[key] = {
+                "prefix": render_globals.get("imageFilePrefix") or None,
+                "format": render_globals.get("imageFormat", 7),
+                "key": render_globals.get("imfPluginKey"),
+                "padding": int(render_globals.get("extensionPadding", 1))}
+
+    return _image_settings[key]
+
+
+def camera_prefix(prefix):
+    """
+    An image file prefix that names the camera.
+    """
+    prefix = prefix or "<Scene>"
+    if "<Camera>" in prefix:
+        return prefix
+
+    return "<Camera>/" + prefix
+
+
+class RendererBackend(object):
+    """
+    Maya's command line renderer with a given ``-r`` name.
+
+    Subclasses set ``name``, ``patterns`` and ``extension`` and may add
+    renderer flags with :meth:`extra_args`.
+    """
+    name = "file"
+    label = "Scene renderer"
+    patterns = PATTERNS["file"]
+    extension = "iff"
+    # Renderers with their own output drivers ignore imageFormat.
+    image_format = True
+
+    def __init__(self, name=None):
+
+        if name:
+            self.name = name
+        self._table = None
+
+    def __repr__(self):
+        return "<%s instance of %s>" % (self.__class__.__name__, self.name)
+
+    @property
+    def table(self):
+
+        if self._table is None:
+            self._table = PatternTable(COMMON_PATTERNS + list(self.patterns))
+
+        return self._table
+
+    def match(self, line):
+        """
+        Matches an output line against the backend's patterns.
+
+        :param line: Renderer output.
+        :type line: (str)
+
+        :raises: None
+
+        :return: Kind and named groups, or None.
+        :rtype: tuple
+        """
+        return self.table.match(line)
+
+    def current_frame(self, job, line):
+        """
+        The frame a job is rendering according to an output line.
+
+        :param job: Job producing the output.
+        :type job: (RenderJob)
+        :param line: Renderer output.
+        :type line: (str)
+
+        :raises: None
+
+        :return: Frame number, None if the line does not tell.
+        :rtype: int
+        """
+        result = self.match(line)
+        if result is None:
+            return None
+
+        kind, groups = result
+        frame = groups.get("frame")
+        if frame is None:
+            return None
+
+        frame = int(frame)
+        if kind == FRAME_STARTED:
+            return frame
+
+        if kind == FRAME_DONE:
+            # Renderers that only report finished frames move on to the next.
+            later = [f for f in job.frames if f > frame]
+            return later[0] if later else None
+
+        return None
+
+    def extra_args(self, job):
+        return []
+
+    def command(self, job):
+        """
+        Builds the command line rendering a job.
+
+        :param job: Job to render.
+        :type job: (RenderJob)
+
+        :raises: None
+
+        :return: Program followed by its arguments.
+        :rtype: list
+        """
+        args = [render_executable(),
+                "-r", self.name,
+                "-s", str(job.start_frame),
+                "-e", str(job.end_frame),
+                "-cam", job.camera]
+
+        if job.step != 1:
+            args.extend(["-b", str(job.step)])
+
+        args.extend(self.extra_args(job))
+
+        if job.overrides:
+            args.extend(["-preRender", " ".join(
+                mel_set_attr(attr, value)
+                for attr, value in sorted(job.overrides.items()))])
+
+        if job.project:
+            args.extend(["-proj", job.project])
+
+        prefix = image_settings(job.scene).get("prefix")
+        if camera_prefix(prefix) != prefix:
+            args.extend(["-im", camera_prefix(prefix)])
+
+        args.append(job.scene)
+
+        return args
+
+    def image_extension(self, settings):
+
+        if not self.image_format:
+            return self.extension
+
+        image_format = settings.get("format")
+        if image_format == CUSTOM_FORMAT and settings.get("key"):
+            return settings["key"]
+
+        return IMAGE_FORMATS.get(image_format, self.extension)
+
+    def image_folder(self, job):
+        """
+        The project images folder a job renders into.
+        """
+        project = job.project or os.path.dirname(os.path.dirname(job.scene))
+        return os.path.join(project, "images")
+
+    def output_path(self, job, frame, prefix=None, padding=None):
+        """
+        Where a frame's image lands, for use outside of Maya.
+
+        In session :func:`CameraBatch.api.image_path` asks Maya instead.
+
+        :param job: Rendered job.
+        :type job: (RenderJob)
+        :param frame: Frame number.
+        :type frame: (int)
+        :param prefix: Image file prefix with ``<Scene>`` and ``<Camera>``
+                       tokens, the scene's by default.
+        :type prefix: (str)
+        :param padding: Frame number padding, the scene's by default.
+        :type padding: (int)
+
+        :raises: None
+
+        :return: Image path.
+        :rtype: str
+        """
+        settings = image_settings(job.scene)
+        if prefix is None:
+            prefix = settings.get("prefix")
+        if padding is None:
+            padding = settings.get("padding", 4)
+
+        scene = os.path.splitext(os.path.basename(job.scene))[0]
+        name = camera_prefix(prefix).replace("<Scene>", scene).replace(
+            "<Camera>", job.camera.replace(":", "_")).replace(
+            "<RenderLayer>", "masterLayer")
+
+        return os.path.normpath(os.path.join(
+            self.image_folder(job), "%s.%s.%s" % (
+                name, str(int(frame)).zfill(padding),
+                self.image_extension(settings))))
+
+
+class MayaSoftwareBackend(RendererBackend):
+    name = "sw"
+    label = "Maya Software"
+    patterns = PATTERNS["sw"]
+    extension = "iff"
+
+
+class ArnoldBackend(RendererBackend):
+    name = "arnold"
+    label = "Arnold"
+    patterns = PATTERNS["arnold"]
+    extension = "exr"
+    image_format = False
+
+    def extra_args(self, job):
+        # Info verbosity prints the per frame and percent done lines.
+        return ["-ai:lve", "2"]
+
+
+class RedshiftBackend(RendererBackend):
+    name = "redshift"
+    label = "Redshift"
+    patterns = PATTERNS["redshift"]
+    extension = "exr"
+    image_format = False
+
+
+TEST_SCRIPT = """
+import os, sys, time
+crash = set(os.environ.get("CAMERABATCH_TEST_CRASH", "").split(","))
+for arg in sys.argv[2:]:
+    frame, path = arg.split("=", 1)
+    print("Rendering frame %s" % frame)
+    sys.stdout.flush()
+    if frame in crash:
+        sys.exit(1)
+    time.sleep(float(sys.argv[1]))
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+        f.write(os.path.basename(path))
+    print("Frame %s done" % frame)
+print("Rendering Completed")
+"""
+
+
+class TestBackend(RendererBackend):
+    """
+    Stands in for a renderer without Maya.
+
+    Prints renderer-like progress and writes a small file to each frame's
+    output path, taking ``delay`` seconds a frame, and exits with an error
+    on frames listed in ``CAMERABATCH_TEST_CRASH``.
+    """
+    name = "test"
+    label = "Test"
+    patterns = [
+        (FRAME_STARTED, r"^Rendering frame (?P<frame>-?\d+)"),
+        (FRAME_DONE, r"^Frame (?P<frame>-?\d+) done"),
+        (FINISHED, r"^Rendering Completed"),
+    ]
+    extension = "png"
+    delay = 0.1
+
+    def command(self, job):
+        return [sys.executable, "-c", TEST_SCRIPT, str(self.delay)] + [
+            "%d=%s" % (frame, self.output_path(job, frame))
+            for frame in job.frames]
+
+
+BACKENDS = {}
+
+
+def register_backend(backend):
+    """
+    Makes a backend available under its ``name``.
+
+    :param backend: Backend instance.
+    :type backend: (RendererBackend)
+
+    :raises: None
+
+    :return: The backend.
+    :rtype: RendererBackend
+    """
+    BACKENDS[backend.name] = backend
+    return backend
+
+
+for _backend in (RendererBackend(), MayaSoftwareBackend(),
+                 RendererBackend("hw2"), ArnoldBackend(), RedshiftBackend(),
+                 RendererBackend("vray")):
+    register_backend(_backend)
+
+# Renderers a batch may be submitted with, the test stand-in is not one.
+PRODUCTION_RENDERERS = frozenset(BACKENDS)
+
+if os.environ.get("CAMERABATCH_TEST_BACKEND"):
+    register_backend(TestBackend())
+
+
+def renderer_backend(name=None):
+    """
+    Returns the backend for a ``Render -r`` name.
+
+    :param name: Renderer name, None for the scene's renderer.
+    :type name: (str)
+
+    :raises: ``ValueError`` for an unknown renderer.
+
+    :return: Registered backend.
+    :rtype: RendererBackend
+    """
+    name = name or "file"
+
+    if name not in BACKENDS:
+        raise ValueError("Unknown renderer %r, expected one of %s." % (
+            name, ", ".join(sorted(BACKENDS))))
+
+    return BACKENDS[name]
@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Times adding frame range attributes per camera against the bulk path.
+
+Run with mayapy::
+
+    mayapy -m CameraBatch.benchmark 500
+"""
+
+import sys
+import time
+import logging
+
+log = logging.getLogger('CameraBatch')
+
+
+def make_cameras(count):
+
+    from maya import cmds
+
+    return [cmds.camera(name="benchCam%d" % i)[0] for i in range(count)]
+
+
+def benchmark_frame_attrs(count=500):
+    """
+    Creates ``count`` cameras twice and adds their frame attributes.
+
+    :param count: Cameras per run.
+    :type count: (int)
+
+    :raises: None
+
+    :return: Seconds taken by the per camera and bulk paths.
+    :rtype: tuple
+    """
+    from maya import cmds
+    from .ui.models import Camera
+
+    cmds.file(new=True, force=True)
+    nodes = make_cameras(count)
+    start = time.time()
+    for node in nodes:
+        Camera(node)
+    single = time.time() - start
+
+    cmds.file(new=True, force=True)
+    nodes = make_cameras(count)
+    start = time.time()
+    Camera.from_nodes(nodes)
+    bulk = time.time() - start
+
+    return single, bulk
+
+
+def main(argv=None):
+
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 500
+
+    import maya.standalone
+    maya.standalone.initialize()
+
+    single, bulk = benchmark_frame_attrs(count)
+    log.info("%d cameras: per camera %.3fs, bulk %.3fs (%.1fx)" % (
+        count, single, bulk, single / bulk if bulk else 0.0))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Content-addressed render cache.
+
+Frames are stored under a hash of the scene's content, the camera, the
+frame and the render settings, so any artist batching the same camera of
+the same published scene gets a copy of the frame instead of rendering it.
+Hardlinks are opt-in, an artist editing a linked image in place would edit
+the cached object too. The cache may live on a shared filesystem: objects
+are written to a private temporary name and renamed into place, which is
+atomic, and eviction tolerates objects disappearing under it. Hits touch a
+sidecar file per object under ``used``, never the object itself, and
+eviction removes the least recently used objects until the cache fits its
+size.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+
+from .dedupe import break_link
+
+log = logging.getLogger('CameraBatch')
+
+GB = 1024 ** 3
+
+_digests = {}
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    Hashes a file's content, remembering it until the file changes.
+
+    :param path: File to hash.
+    :type path: (str)
+
+    :raises: ``OSError`` if the file cannot be read.
+
+    :return: Hex sha256 digest.
+    :rtype: str
+    """
+    stat = os.stat(path)
+    identity = (path, stat.st_size, stat.st_mtime)
+
+    if identity not in _digests:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        _digests[identity] = digest.hexdigest()
+
+    return _digests[identity]
+
+
+def frame_key(job, frame, scene_digest=None):
+    """
+    The cache key of one frame of a job.
+
+    The scene digest fixes every camera parameter and the saved render
+    settings, the job adds the camera, renderer and overrides.
+
+    :param job: Job rendering the frame.
+    :type job: (RenderJob)
+    :param frame: Frame number.
+    :type frame: (int)
+    :param scene_digest: Precomputed :func:`file_digest` of the scene.
+    :type scene_digest: (str)
+
+    :raises: ``OSError`` if the scene cannot be read.
+
+    :return: Hex sha256 key.
+    :rtype: str
+    """
+    payload = json.dumps([scene_digest or file_digest(job.scene),
+                          job.camera, int(frame), job.renderer,
+                          sorted(job.overrides.items())])
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _link_or_copy(source, destination, link=False):
+
+    folder = os.path.dirname(destination)
+    if folder and not os.path.isdir(folder):
+        try:
+            os.makedirs(folder)
+        except OSError:
+            # Another worker made it.
+            pass
+
+    if link:
+        try:
+            os.link(source, destination)
+            return
+        except (OSError, AttributeError):
+            pass
+
+    shutil.copy2(source, destination)
+
+
+class RenderCache(object):
+    """
+    Frames on disk keyed by :func:`frame_key`.
+
+    :param root: Cache folder, shared or local.
+    :param max_bytes: Size the cache is evicted down to.
+    :param evict_every: Stores between eviction passes.
+    :param link: Hardlink frames in and out of the cache instead of copying.
+    """
+    def __init__(self, root, max_bytes=100 * GB, evict_every=100,
+                 link=False):
+
+        self.root = root
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self.link = link
+        self.stores = 0
+        self.hits = 0
+        self.misses = 0
+
+        for folder in (self.objects, self.tmp, self.used):
+            if not os.path.isdir(folder):
+                try:
+                    os.makedirs(folder)
+                except OSError:
+                    pass
+
+    def __repr__(self):
+        return "<%s instance of %s>" % (self.__class__.__name__, self.root)
+
+    @classmethod
+    def from_environment(cls):
+        """
+        The cache named by ``CAMERABATCH_CACHE``, sized in GB by
+        ``CAMERABATCH_CACHE_SIZE``, hardlinking when
+        ``CAMERABATCH_CACHE_LINK`` is set.
+
+        :raises: None
+
+        :return: Cache, None if the variable is unset.
+        :rtype: RenderCache
+        """
+        root = os.environ.get("CAMERABATCH_CACHE")
+        if not root:
+            return None
+
+        size = float(os.environ.get("CAMERABATCH_CACHE_SIZE", 100))
+        return cls(root, max_bytes=int(size * GB),
+                   link=bool(os.environ.get("CAMERABATCH_CACHE_LINK")))
+
+    @property
+    def objects(self):
+        return os.path.join(self.root, "objects")
+
+    @property
+    def tmp(self):
+        return os.path.join(self.root, "tmp")
+
+    @property
+    def used(self):
+        return os.path.join(self.root, "used")
+
+    def object_path(self, key):
+        # No extension, so a lookup is a single exists check.
+        return os.path.join(self.objects, key[:2], key)
+
+    def used_path(self, key):
+        return os.path.join(self.used, key[:2], key)
+
+    def touch(self, key):
+        """
+        Marks an object as just used.
+
+        The object's own times are left alone, it may be hardlinked into
+        an artist's folder.
+        """
+        path = self.used_path(key)
+        folder = os.path.dirname(path)
+        try:
+            if not os.path.isdir(folder):
+                try:
+                    os.makedirs(folder)
+                except OSError:
+                    pass
+            with open(path, "a"):
+                pass
+            os.utime(path, None)
+        except (IOError, OSError) as e:
+            log.debug("Could not mark %s used: %s" % (key, e))
+
+    def find(self, key):
+
+        path = self.object_path(key)
+        return path if os.path.exists(path) else None
+
+    def fetch(self, key, destination):
+        """
+        Materialises a cached frame.
+
+        :param key: Frame key.
+        :type key: (str)
+        :param destination: Where the image should appear.
+        :type destination: (str)
+
+        :raises: None
+
+        :return: True on a hit.
+        :rtype: bool
+        """
+        path = self.find(key)
+        if path is None:
+            self.misses += 1
+            return False
+
+        try:
+            if os.path.exists(destination):
+                os.remove(destination)
+            _link_or_copy(path, destination, self.link)
+        except (IOError, OSError) as e:
+            # Evicted between find and link.
+            log.debug("Cache fetch of %s failed: %s" % (key, e))
+            self.misses += 1
+            return False
+
+        self.touch(key)
+        self.hits += 1
+        return True
+
+    def store(self, key, source):
+        """
+        Adds a rendered frame.
+
+        :param key: Frame key.
+        :type key: (str)
+        :param source: Rendered image.
+        :type source: (str)
+
+        :raises: None
+
+        :return: True if the frame was stored.
+        :rtype: bool
+        """
+        path = self.object_path(key)
+
+        if os.path.exists(path):
+            self.touch(key)
+            return True
+
+        handle, tmp_path = tempfile.mkstemp(dir=self.tmp, prefix=key)
+        os.close(handle)
+        os.remove(tmp_path)
+
+        try:
+            _link_or_copy(source, tmp_path, self.link)
+            folder = os.path.dirname(path)
+            if not os.path.isdir(folder):
+                try:
+                    os.makedirs(folder)
+                except OSError:
+                    pass
+            # Atomic, a concurrent store of the same key wins or loses whole.
+            os.rename(tmp_path, path)
+        except (IOError, OSError) as e:
+            log.warning("Could not cache %s: %s" % (source, e))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+        self.touch(key)
+        self.stores += 1
+        if self.stores % self.evict_every == 0:
+            self.evict()
+
+        return True
+
+    def evict(self):
+        """
+        Removes least recently used objects until the cache fits.
+
+        Objects still hardlinked elsewhere free no space when removed, they
+        count neither towards the cache size nor towards the bytes removed.
+
+        :raises: None
+
+        :return: Bytes removed.
+        :rtype: int
+        """
+        entries = []
+        total = 0
+
+        for folder, _, names in os.walk(self.objects):
+            for name in names:
+                path = os.path.join(folder, name)
+                key = os.path.splitext(name)[0]
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                try:
+                    used = os.stat(self.used_path(key)).st_mtime
+                except OSError:
+                    used = stat.st_mtime
+                size = stat.st_size if stat.st_nlink == 1 else 0
+                entries.append((used, size, key, path))
+                total += size
+
+        removed = 0
+        entries.sort()
+        for used, size, key, path in entries:
+            if total - removed <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Already evicted by another worker.
+                continue
+            try:
+                os.remove(self.used_path(key))
+            except OSError:
+                pass
+            removed += size
+
+        if removed:
+            log.info("Evicted %.1f MB from the render cache." % (
+                removed / 1024.0 ** 2))
+
+        return removed
+
+    def filter_jobs(self, jobs, resolve):
+        """
+        Materialises cached frames and returns what is left to render.
+
+        :param jobs: Jobs to render.
+        :type jobs: (list of RenderJob)
+        :param resolve: ``resolve(job, frame)`` returns a frame's image path.
+        :type resolve: (callable)
+
+        :raises: None
+
+        :return: Jobs covering only the frames that missed.
+        :rtype: list of RenderJob
+        """
+        from .ordering import job_runs
+
+        remaining = []
+
+        for job in jobs:
+            try:
+                digest = file_digest(job.scene)
+            except OSError:
+                remaining.append(job)
+                continue
+
+            frames = job.frames
+            missed = [index for index, frame in enumerate(frames)
+                      if not self.fetch(frame_key(job, frame, digest),
+                                        resolve(job, frame))]
+
+            # A renderer overwrites in place, which would change the cached
+            # object too if the old image is still hardlinked to it.
+            for index in missed:
+                break_link(resolve(job, frames[index]))
+
+            if len(missed) == len(frames):
+                remaining.append(job)
+            elif missed:
+                remaining.extend(job_runs(job, missed, 1))
+
+        return remaining
+
+    def store_job(self, job, resolve, skip=()):
+        """
+        Adds every image a finished job wrote.
+
+        :param job: Finished job.
+        :type job: (RenderJob)
+        :param resolve: ``resolve(job, frame)`` returns a frame's image path.
+        :type resolve: (callable)
+        :param skip: Frames that failed.
+        :type skip: (list)
+
+        :raises: None
+
+        :return: Frames stored.
+        :rtype: int
+        """
+        try:
+            digest = file_digest(job.scene)
+        except OSError:
+            return 0
+
+        stored = 0
+        for frame in job.frames:
+            if frame in skip:
+                continue
+            path = resolve(job, frame)
+            if path and os.path.isfile(path):
+                stored += self.store(frame_key(job, frame, digest), path)
+
+        return stored
@@ -0,0 +1,458 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Command line entry point, run with ``python -m CameraBatch``.
+"""
+
+import re
+import argparse
+import logging
+
+from .manifest import (FrameTask, ManifestReader, make_header,
+                       write_manifest)
+from .quality import (TIER_ORDER, quality_tier)
+from .ordering import (ORDERINGS, order_jobs)
+
+log = logging.getLogger('CameraBatch')
+
+CAMERA_SPEC = re.compile(r"^(?P<name>.+):(?P<start>-?\d+)-(?P<end>-?\d+)$")
+
+
+def parse_camera(spec):
+    """
+    Parses a ``camera:start-end`` argument.
+
+    :param spec: Camera spec such as ``shotCam:1001-1100``.
+    :type spec: (str)
+
+    :raises: ``argparse.ArgumentTypeError`` if the spec is malformed.
+
+    :return: Camera name, start frame and end frame.
+    :rtype: tuple
+    """
+    match = CAMERA_SPEC.match(spec)
+    if not match:
+        raise argparse.ArgumentTypeError(
+            "%s is not a camera:start-end spec" % spec)
+
+    return (match.group("name"),
+            int(match.group("start")),
+            int(match.group("end")))
+
+
+def camera_tasks(args):
+    """
+    Yields the manifest header and tasks described by the arguments.
+
+    Tasks come from ``--manifest`` if given, otherwise from the scene and
+    ``--camera`` specs.
+    """
+    if args.manifest:
+        with ManifestReader(args.manifest) as reader:
+            yield reader.header
+            for task in reader:
+                yield task
+        return
+
+    yield make_header(args.scene, renderer=args.renderer,
+                      project=args.project)
+    for name, start, end in args.camera:
+        yield FrameTask(name, [(start, end, 1)])
+
+
+def scene_resolution(scene):
+    from .scene import read_scene
+
+    try:
+        resolution = read_scene(scene).resolution
+    except (IOError, OSError, ValueError, RuntimeError) as e:
+        log.warning("Could not read the resolution of %s: %s" % (scene, e))
+        return None
+
+    if "width" in resolution and "height" in resolution:
+        return int(resolution["width"]), int(resolution["height"])
+
+    return None
+
+
+def camera_jobs(args):
+
+    tasks = camera_tasks(args)
+    header = next(tasks)
+
+    tier = quality_tier(args.quality)
+    resolution = None
+    if tier.resolution_scale != 1.0:
+        resolution = scene_resolution(header["scene"])
+
+    jobs = (job for task in tasks for job in task.to_jobs(header))
+    if args.playblast:
+        from .playblast import playblast_job
+        jobs = (playblast_job(job) for job in jobs)
+    jobs = (tier.apply(job, resolution) for job in jobs)
+    if args.order != "sequential":
+        # Ordering across cameras needs every job up front.
+        jobs = order_jobs(jobs, args.order)
+
+    for job in jobs:
+        for chunk in job.split(args.chunk):
+            yield chunk
+
+
+def render(args):
+    from .orchestrator import run_jobs
+    from .backends import renderer_backend
+
+    try:
+        renderer_backend(args.renderer)
+    except ValueError as e:
+        log.error(str(e))
+        return 1
+
+    jobs = list(camera_jobs(args))
+
+    autoscaler = None
+    if args.autoscale:
+        from .autoscale import Autoscaler
+        low, _, high = args.autoscale.partition(":")
+        autoscaler = Autoscaler(min_jobs=int(low), max_jobs=int(high or low))
+
+    retry = None
+    if args.retries:
+        from .orchestrator import RetryPolicy
+        retry = RetryPolicy(attempts=args.retries + 1)
+
+    admission = None
+    if args.admit:
+        from .admission import AdmissionController
+        admission = AdmissionController(output_dir=args.admit)
+
+    from .dedupe import (FrameDeduper, break_link)
+
+    def resolve(job, frame):
+        return renderer_backend(job.renderer).output_path(job, frame)
+
+    cache = None
+    if args.cache:
+        from .cache import (RenderCache, GB)
+
+        cache = RenderCache(args.cache, max_bytes=int(args.cache_size * GB),
+                            link=args.cache_link)
+        jobs = cache.filter_jobs(jobs, resolve)
+        log.info("%d frames from the render cache." % cache.hits)
+
+    history = None
+    eta = None
+    if not args.no_history:
+        from .history import (RenderHistory, Estimator, BatchEta,
+                              format_duration)
+
+        history = RenderHistory()
+        estimator = Estimator(history)
+        if args.longest_first:
+            jobs = estimator.longest_first(jobs)
+        eta = BatchEta(estimator, jobs, args.jobs)
+        log.info("Estimated %s for %d jobs." % (
+            format_duration(estimator.estimate(jobs, args.jobs)), len(jobs)))
+
+    def on_start(job):
+        if eta:
+            eta.job_started(job)
+
+    def on_output(job, line):
+        log.debug("[%s] %s" % (job.camera, line))
+        if eta:
+            frame = renderer_backend(job.renderer).current_frame(job, line)
+            if frame is not None:
+                eta.frame_started(job, frame)
+
+    deduper = None
+    if args.dedupe:
+        deduper = FrameDeduper()
+        for job in jobs:
+            for frame in job.frames:
+                break_link(resolve(job, frame))
+
+    def on_result(result):
+        if deduper:
+            # Hash each job's frames as soon as it lands.
+            for frame in result.job.frames:
+                if frame not in result.poison:
+                    deduper.add(resolve(result.job, frame))
+
+        if eta:
+            eta.job_finished(result.job, result.ok)
+            log.info("%s done, %s left." % (
+                result.job.camera, format_duration(eta.seconds())))
+
+    tracer = None
+    if args.trace:
+        from .trace import Tracer
+        tracer = Tracer()
+
+    results = run_jobs(jobs,
+                       max_jobs=args.jobs,
+                       timeout=args.timeout,
+                       on_start=on_start,
+                       on_output=on_output,
+                       autoscaler=autoscaler,
+                       admission=admission,
+                       retry=retry,
+                       on_result=on_result,
+                       tracer=tracer,
+                       history=history)
+
+    if tracer:
+        tracer.save(args.trace)
+
+    for result in results:
+        log.info("%s %d - %d: %s" % (
+            result.job.camera, result.job.start_frame,
+            result.job.end_frame, result.status))
+
+    if cache:
+        for result in results:
+            if result.ok or result.poison:
+                cache.store_job(result.job, resolve, skip=result.poison)
+
+    if deduper:
+        deduper.report()
+        deduper.shutdown()
+
+    poisoned = [result for result in results if result.poison]
+    if poisoned:
+        log.error("Frames that failed every retry:")
+        for result in poisoned:
+            log.error("  %s: %s" % (result.job.camera, " ".join(
+                str(frame) for frame in result.poison)))
+
+    return 0 if all(result.ok for result in results) else 1
+
+
+def serve(args):
+    from .farm.server import JobServer
+
+    try:
+        server = JobServer(host=args.host, port=args.port, lease=args.lease,
+                           token=args.token)
+    except ValueError as e:
+        log.error(str(e))
+        return 1
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+def agent(args):
+    from .farm import job_source
+    from .farm.agent import Agent
+
+    source = job_source(args.server, args.lease)
+    heartbeat = min(10.0, args.lease / 3.0) if args.lease else 10.0
+    worker = Agent(source, name=args.name, poll=args.poll,
+                   heartbeat=heartbeat, timeout=args.timeout)
+    try:
+        worker.run(once=args.once)
+    except KeyboardInterrupt:
+        worker.stop()
+
+    return 0
+
+
+def submit(args):
+    from .farm import job_source
+
+    ids = job_source(args.server).submit(camera_jobs(args))
+    log.info("Submitted %d jobs to %s" % (len(ids), args.server))
+
+    return 0
+
+
+def manifest(args):
+
+    tasks = camera_tasks(args)
+    count = write_manifest(args.output, next(tasks), tasks,
+                           binary=not args.json)
+    log.info("Wrote %d tasks to %s" % (count, args.output))
+
+    return 0
+
+
+def plan(args):
+    from .scene import read_scene
+
+    try:
+        info = read_scene(args.scene)
+    except RuntimeError as e:
+        log.error(str(e))
+        return 1
+
+    cameras = info.batch_cameras()
+    if args.all_cameras:
+        cameras = [camera for camera in info.cameras if not camera.startup]
+
+    for camera in cameras:
+        log.info("%s\t%d - %d" % ((camera.name,) + camera.frame_range))
+
+    if args.output:
+        header, tasks = info.manifest(project=args.project, cameras=cameras)
+        count = write_manifest(args.output, header, tasks,
+                               binary=not args.json)
+        log.info("Wrote %d tasks to %s" % (count, args.output))
+
+    return 0
+
+
+def add_job_arguments(parser):
+
+    parser.add_argument(
+        "-q", "--quality", choices=TIER_ORDER, default="final",
+        help="Quality tier, draft and preview render fewer frames at a "
+             "lower resolution and sampling.")
+    parser.add_argument(
+        "--playblast", action="store_true",
+        help="Capture the viewport with Hardware 2.0 for review instead "
+             "of rendering.")
+    parser.add_argument(
+        "--order", choices=sorted(ORDERINGS), default="sequential",
+        help="Frame order, progressive renders the first, last and middle "
+             "frame of every camera before filling in the ranges.")
+
+
+def add_camera_arguments(parser):
+
+    parser.add_argument("scene", nargs="?", help="Maya scene to render.")
+    parser.add_argument(
+        "-c", "--camera", type=parse_camera, action="append",
+        help="camera:start-end, may be given many times.")
+    parser.add_argument(
+        "-m", "--manifest", help="Batch manifest to use instead of cameras.")
+    parser.add_argument(
+        "-r", "--renderer", default="file", help="Render -r value.")
+    parser.add_argument("-p", "--project", help="Maya project.")
+    parser.add_argument(
+        "--chunk", type=int, default=0,
+        help="Frames per job, 0 renders each camera as one job.")
+
+
+def build_parser():
+
+    parser = argparse.ArgumentParser(
+        prog="CameraBatch", description="A Maya camera batcher.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    render_parser = commands.add_parser(
+        "render", help="Render cameras with Maya's command line renderer.")
+    add_camera_arguments(render_parser)
+    add_job_arguments(render_parser)
+    render_parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="Concurrent renders.")
+    render_parser.add_argument(
+        "-t", "--timeout", type=float, help="Seconds allowed per camera.")
+    render_parser.add_argument(
+        "--autoscale", metavar="MIN:MAX",
+        help="Adapt concurrent renders to machine load within MIN:MAX.")
+    render_parser.add_argument(
+        "--retries", type=int, default=2,
+        help="Retries for a failed job before it is bisected to isolate "
+             "the frames that crash, 0 disables.")
+    render_parser.add_argument(
+        "--admit", metavar="OUTPUT_DIR",
+        help="Hold renders back until memory and disk space in OUTPUT_DIR "
+             "allow them.")
+    render_parser.add_argument(
+        "--cache", metavar="FOLDER",
+        help="Render cache shared by every batch using the same folder.")
+    render_parser.add_argument(
+        "--cache-size", type=float, default=100.0,
+        help="Render cache size in GB.")
+    render_parser.add_argument(
+        "--cache-link", action="store_true",
+        help="Hardlink cached frames instead of copying them, only safe if "
+             "nothing edits rendered images in place.")
+    render_parser.add_argument(
+        "--dedupe", action="store_true",
+        help="Hardlink byte-identical frames together as jobs finish.")
+    render_parser.add_argument(
+        "--trace", metavar="PATH",
+        help="Write a Chrome trace-event timeline of the batch to PATH.")
+    render_parser.add_argument(
+        "--longest-first", action="store_true",
+        help="Queue the jobs predicted to take longest first.")
+    render_parser.add_argument(
+        "--no-history", action="store_true",
+        help="Neither estimate the batch nor record its render times.")
+    render_parser.set_defaults(func=render)
+
+    serve_parser = commands.add_parser(
+        "serve", help="Run a job server for render agents.")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument(
+        "--lease", type=float, default=60.0,
+        help="Seconds without a heartbeat before a job is requeued.")
+    serve_parser.add_argument(
+        "--token", help="Shared secret clients must send, defaults to "
+                        "CAMERABATCH_TOKEN.")
+    serve_parser.set_defaults(func=serve)
+
+    agent_parser = commands.add_parser(
+        "agent", help="Pull and render jobs from a job server or spool.")
+    agent_parser.add_argument(
+        "server", help="Job server url or shared spool directory.")
+    agent_parser.add_argument(
+        "--lease", type=float,
+        help="Spool lease length in seconds, heartbeats renew it.")
+    agent_parser.add_argument("--name", help="Agent name.")
+    agent_parser.add_argument(
+        "--poll", type=float, default=5.0, help="Seconds between polls.")
+    agent_parser.add_argument(
+        "-t", "--timeout", type=float, help="Seconds allowed per job.")
+    agent_parser.add_argument(
+        "--once", action="store_true", help="Exit when the queue is empty.")
+    agent_parser.set_defaults(func=agent)
+
+    submit_parser = commands.add_parser(
+        "submit", help="Submit cameras to a job server or spool.")
+    submit_parser.add_argument(
+        "server", help="Job server url or shared spool directory.")
+    add_camera_arguments(submit_parser)
+    add_job_arguments(submit_parser)
+    submit_parser.set_defaults(func=submit)
+
+    manifest_parser = commands.add_parser(
+        "manifest", help="Write a batch manifest.")
+    manifest_parser.add_argument("output", help="Manifest path.")
+    manifest_parser.add_argument(
+        "--json", action="store_true", help="Write the JSON lines encoding.")
+    add_camera_arguments(manifest_parser)
+    manifest_parser.set_defaults(func=manifest)
+
+    plan_parser = commands.add_parser(
+        "plan", help="Read cameras from a scene file without Maya.")
+    plan_parser.add_argument("scene", help="Maya scene to read.")
+    plan_parser.add_argument("-o", "--output", help="Manifest to write.")
+    plan_parser.add_argument("-p", "--project", help="Maya project.")
+    plan_parser.add_argument(
+        "--all-cameras", action="store_true",
+        help="Include cameras without start_frame/end_frame attributes.")
+    plan_parser.add_argument(
+        "--json", action="store_true", help="Write the JSON lines encoding.")
+    plan_parser.set_defaults(func=plan)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if hasattr(args, "manifest") and not args.manifest:
+        if not (args.scene and args.camera):
+            parser.error("a scene and --camera, or --manifest, is required")
+
+    return args.func(args)
@@ -0,0 +1,227 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import logging
+from collections import defaultdict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+log = logging.getLogger('CameraBatch')
+
+
+class ClusterPlan(object):
+    """
+    Result of clustering camera views.
+
+    ``renders`` maps each camera to the frames that must really be rendered.
+    ``links`` maps ``(alias, frame)`` to ``(source, kind)`` where ``kind`` is
+    either ``"exact"`` or ``"near"``.
+    """
+    def __init__(self):
+        self.renders = defaultdict(list)
+        self.links = {}
+
+    def __repr__(self):
+        return "<%s instance (%d renders, %d links)>" % (
+            self.__class__.__name__,
+            sum(len(frames) for frames in self.renders.values()),
+            len(self.links))
+
+    @property
+    def aliases(self):
+        """
+        Cameras with no frame left to render, mapped to their sources.
+
+        :raises: None
+
+        :return: Alias camera name to the set of source camera names.
+        :rtype: dict
+        """
+        sources = defaultdict(set)
+        for (alias, frame), (source, kind) in self.links.items():
+            sources[alias].add(source)
+
+        return dict((alias, names) for alias, names in sources.items()
+                    if not self.renders.get(alias))
+
+    def duplicate_frames(self, camera):
+        """
+        Frames of a camera that are linked from another camera's image.
+        """
+        return set(frame for (alias, frame) in self.links if alias == camera)
+
+    def trim(self, jobs):
+        """
+        Drops the linked frames from render jobs.
+
+        Cameras whose ranges only partly overlap another camera's views
+        render the rest of their frames.
+
+        :param jobs: Jobs with ``camera`` and ``without()``.
+        :type jobs: (list of RenderJob)
+
+        :raises: None
+
+        :return: Jobs covering only the frames left to render.
+        :rtype: list of RenderJob
+        """
+        trimmed = []
+        for job in jobs:
+            trimmed.extend(job.without(self.duplicate_frames(job.camera)))
+
+        return trimmed
+
+
+def _view_values(camera_samples):
+
+    count = len(camera_samples.frames)
+
+    return numpy.concatenate([
+        camera_samples.frames.reshape(count, 1),
+        camera_samples.matrices.reshape(count, 16),
+        camera_samples.focal_length.reshape(count, 1),
+        camera_samples.filmback], axis=1)
+
+
+def cluster_views(samples, order=None, tolerance=1e-4):
+    """
+    Finds exact and near-duplicate views across cameras.
+
+    Each camera/frame is reduced to a vector of frame, world matrix, focal
+    length and filmback. Exact duplicates share the raw bytes of that vector;
+    near duplicates share a cell of a grid quantised by ``tolerance``. Two
+    grids offset by half a cell are used so values straddling a cell edge
+    still meet. Every lookup is a dict hit, so cost grows linearly with the
+    number of camera frames.
+
+    :param samples: Samples keyed by camera name.
+    :type samples: (dict)
+    :param order: Camera names in priority order, the first camera to
+                  show a view renders it.
+    :type order: (list)
+    :param tolerance: Quantisation step for near duplicates.
+    :type tolerance: (float)
+
+    :raises: ``RuntimeError`` if numpy is unavailable.
+
+    :return: The render/link plan.
+    :rtype: ClusterPlan
+    """
+    if numpy is None:
+        log.error("numpy is required to cluster cameras.")
+        raise RuntimeError("numpy is required to cluster cameras.")
+
+    plan = ClusterPlan()
+    exact_index = {}
+    grid_indexes = ({}, {})
+
+    for name in order or sorted(samples):
+
+        camera_samples = samples[name]
+        values = _view_values(camera_samples)
+        grids = (numpy.floor(values / tolerance).astype(numpy.int64),
+                 numpy.floor(values / tolerance + 0.5).astype(numpy.int64))
+
+        for index, frame in enumerate(camera_samples.frames):
+
+            frame = int(frame)
+            exact_key = values[index].tobytes()
+            grid_keys = [grid[index].tobytes() for grid in grids]
+
+            source = exact_index.get(exact_key)
+            kind = "exact"
+
+            if source is None:
+                kind = "near"
+                for grid_index, grid_key in zip(grid_indexes, grid_keys):
+                    source = grid_index.get(grid_key)
+                    if source is not None:
+                        break
+
+            if source is not None:
+                plan.links[(name, frame)] = (source, kind)
+                continue
+
+            exact_index[exact_key] = name
+            for grid_index, grid_key in zip(grid_indexes, grid_keys):
+                grid_index.setdefault(grid_key, name)
+
+            plan.renders[name].append(frame)
+
+    if plan.links:
+        log.info("Found %d duplicate camera views." % len(plan.links))
+
+    return plan
+
+
+def _same_path(first, second):
+    return (os.path.normcase(os.path.abspath(first)) ==
+            os.path.normcase(os.path.abspath(second)))
+
+
+def link_outputs(plan, resolve_path):
+    """
+    Materialises rendered frames for every alias.
+
+    Frames are hardlinked from the source camera's image, falling back to a
+    copy when the filesystem does not support links.
+
+    :param plan: The plan from :func:`cluster_views`.
+    :type plan: (ClusterPlan)
+    :param resolve_path: Callable returning an image path for
+                         ``(camera_name, frame)``.
+    :type resolve_path: (callable)
+
+    :raises: None
+
+    :return: Number of linked frames.
+    :rtype: int
+    """
+    linked = 0
+
+    for (alias, frame), (source, kind) in sorted(plan.links.items()):
+
+        source_path = resolve_path(source, frame)
+        alias_path = resolve_path(alias, frame)
+
+        if not source_path or not os.path.isfile(source_path):
+            log.warning("Missing %s frame %d for alias %s." % (
+                source, frame, alias))
+            continue
+
+        if _same_path(source_path, alias_path):
+            # The image prefix has no <Camera> token, both cameras write
+            # the same file.
+            log.warning("%s and %s share %s, not linking." % (
+                source, alias, alias_path))
+            continue
+
+        alias_dir = os.path.dirname(alias_path)
+        if alias_dir and not os.path.isdir(alias_dir):
+            os.makedirs(alias_dir)
+
+        # The alias is only replaced once its new image is complete.
+        tmp_path = "%s.%d.link" % (alias_path, os.getpid())
+        try:
+            try:
+                os.link(source_path, tmp_path)
+            except (OSError, AttributeError):
+                shutil.copy2(source_path, tmp_path)
+            if os.name == "nt" and os.path.exists(alias_path):
+                os.remove(alias_path)
+            os.rename(tmp_path, alias_path)
+        except (IOError, OSError) as e:
+            log.warning("Could not link %s frame %d to %s: %s" % (
+                alias, frame, source, e))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            continue
+
+        linked += 1
+
+    return linked
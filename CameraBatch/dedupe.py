@@ -0,0 +1,218 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Byte-identical frame deduplication.
+
+Holds, static shots and duplicate cameras render the same image many times.
+:class:`FrameDeduper` hashes frames as they land, in a thread pool and in
+fixed size chunks, and replaces every later copy of an image with a hardlink
+to the first one.
+
+Hardlinked frames share their bytes, so a frame must be unlinked with
+:func:`break_link` before it is rendered again, otherwise the renderer's in
+place overwrite would change every copy.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    # Python 2 without the futures backport hashes inline.
+    ThreadPoolExecutor = None
+
+log = logging.getLogger('CameraBatch')
+
+
+def break_link(path):
+    """
+    Removes a file if other names share its bytes.
+
+    :param path: Image about to be rewritten.
+    :type path: (str)
+
+    :raises: None
+
+    :return: True if the file was removed.
+    :rtype: bool
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.remove(path)
+            return True
+    except OSError:
+        pass
+
+    return False
+
+
+def log_totals(linked, reclaimed):
+
+    if linked:
+        log.info("Linked %d identical frames, reclaimed %.1f MB." % (
+            linked, reclaimed / 1024.0 ** 2))
+
+
+def stream_digest(path, chunk_size=1024 * 1024):
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class FrameDeduper(object):
+    """
+    Hardlinks identical frames together as they are added.
+
+    :param workers: Hashing threads.
+    """
+    def __init__(self, workers=4):
+
+        self.pool = ThreadPoolExecutor(workers) if ThreadPoolExecutor else None
+        self.lock = threading.Lock()
+        self.pending = []
+        self.seen = set()
+        self.batch = self.new_batch()
+
+    def add(self, path):
+        """
+        Queues a finished frame for hashing.
+
+        :param path: Image path, missing files are ignored.
+        :type path: (str)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        if not path or path in self.seen:
+            return
+        self.seen.add(path)
+
+        if self.pool is None:
+            self.process(path, self.batch)
+        else:
+            self.pending.append(
+                self.pool.submit(self.process, path, self.batch))
+
+    @staticmethod
+    def new_batch():
+        return {"originals": {}, "linked": 0, "reclaimed": 0}
+
+    def process(self, path, batch):
+
+        try:
+            stat = os.stat(path)
+            digest = stream_digest(path)
+        except (IOError, OSError):
+            return
+
+        key = (stat.st_size, digest)
+
+        with self.lock:
+            original = batch["originals"].setdefault(key, path)
+
+        if original == path:
+            return
+
+        try:
+            original_stat = os.stat(original)
+        except (IOError, OSError) as e:
+            log.debug("Could not link %s to %s: %s" % (path, original, e))
+            return
+
+        if (original_stat.st_dev, original_stat.st_ino) == (
+                stat.st_dev, stat.st_ino):
+            return
+
+        # Link beside the duplicate, then swap it in atomically.
+        tmp_path = "%s.%d.%d.link" % (
+            path, os.getpid(), threading.current_thread().ident)
+        try:
+            os.link(original, tmp_path)
+            os.rename(tmp_path, path)
+        except (IOError, OSError, AttributeError) as e:
+            log.debug("Could not link %s to %s: %s" % (path, original, e))
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self.lock:
+            batch["linked"] += 1
+            batch["reclaimed"] += stat.st_size
+
+    def detach(self):
+        """
+        Starts a new batch, returning the queued frames and state of the
+        previous one. Its queued frames still link among themselves.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, []
+            batch, self.batch = self.batch, self.new_batch()
+            self.seen = set()
+
+        return pending, batch
+
+    @staticmethod
+    def wait(pending, batch):
+
+        for future in pending:
+            future.result()
+
+        return batch["linked"], batch["reclaimed"]
+
+    def report(self):
+        """
+        Waits for the batch's frames, then logs and resets its totals.
+
+        :raises: None
+
+        :return: Frames linked and bytes reclaimed in the batch.
+        :rtype: tuple
+        """
+        linked, reclaimed = self.wait(*self.detach())
+        log_totals(linked, reclaimed)
+
+        return linked, reclaimed
+
+    def report_later(self, callback):
+        """
+        Resets the batch at once and hands its totals to ``callback`` once
+        its frames are hashed, without blocking the caller.
+
+        ``callback(linked, reclaimed)`` is called from a worker thread,
+        a Qt signal's ``emit`` brings it back to the main thread.
+
+        :param callback: Receives frames linked and bytes reclaimed.
+        :type callback: (callable)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        pending, batch = self.detach()
+
+        def finish():
+            callback(*self.wait(pending, batch))
+
+        if not pending:
+            finish()
+            return
+
+        thread = threading.Thread(target=finish, name="CameraBatch dedupe")
+        thread.daemon = True
+        thread.start()
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
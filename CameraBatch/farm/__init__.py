@@ -0,0 +1,27 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+def job_source(location, lease=None):
+    """
+    Opens a job server url or a shared spool directory.
+
+    :param location: ``http://`` url or spool directory path.
+    :type location: (str)
+    :param lease: Spool lease length in seconds.
+    :type lease: (float)
+
+    :raises: None
+
+    :return: Object with ``submit``, ``claim``, ``heartbeat`` and ``report``.
+    :rtype: FarmClient or Spool
+    """
+    if location.startswith(("http://", "https://")):
+        from .client import FarmClient
+        return FarmClient(location)
+
+    from .spool import Spool
+    if lease:
+        return Spool(location, lease=lease)
+
+    return Spool(location)
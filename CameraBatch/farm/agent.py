@@ -0,0 +1,158 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import socket
+import asyncio
+import logging
+import threading
+
+from ..jobs import RenderJob
+from ..backends import renderer_backend
+from ..orchestrator import (Orchestrator, FAILED)
+
+log = logging.getLogger('CameraBatch')
+
+
+class Agent(object):
+    """
+    Pulls jobs from a job source and renders them one at a time.
+
+    The source is a :class:`FarmClient` talking to a job server or a
+    :class:`Spool` on a shared directory.
+
+    While a job runs a heartbeat thread renews its lease and reports the
+    current frame. If the server answers a heartbeat with ``cancel`` the
+    render's process tree is terminated.
+    """
+    def __init__(self, client, name=None, poll=5.0, heartbeat=10.0,
+                 timeout=None, job_class=RenderJob):
+
+        self.client = client
+        self.name = name or "%s-%d" % (socket.gethostname(), os.getpid())
+        self.poll = poll
+        self.heartbeat_interval = heartbeat
+        self.job_class = job_class
+
+        self.frame = None
+        self.stopped = False
+        self.loop = asyncio.new_event_loop()
+        self.orchestrator = Orchestrator(
+            timeout=timeout, on_output=self.read_output)
+
+    def read_output(self, job, line):
+
+        frame = renderer_backend(job.renderer).current_frame(job, line)
+        if frame is not None:
+            self.frame = frame
+
+    def send_heartbeats(self, job_id, done):
+
+        while not done.wait(self.heartbeat_interval):
+            try:
+                cancel = self.client.heartbeat(self.name, job_id, self.frame)
+            except (IOError, OSError) as e:
+                log.warning("Heartbeat failed: %s" % e)
+                continue
+
+            if cancel:
+                log.info("Job %s cancelled." % job_id)
+                self.loop.call_soon_threadsafe(self.orchestrator.cancel)
+                return
+
+    def run_one(self):
+        """
+        Claims and renders a single job.
+
+        :raises: None
+
+        :return: True if a job was run.
+        :rtype: bool
+        """
+        record = self.client.claim(self.name)
+        if not record:
+            return False
+
+        job = self.job_class.from_dict(record)
+        log.info("%s rendering job %s %r" % (self.name, record["id"], job))
+
+        self.frame = None
+        done = threading.Event()
+        heartbeats = threading.Thread(
+            target=self.send_heartbeats, args=(record["id"], done))
+        heartbeats.daemon = True
+        heartbeats.start()
+
+        try:
+            result = self.loop.run_until_complete(
+                self.orchestrator.run([job]))[0]
+        except KeyboardInterrupt:
+            self.cancel_renders()
+            try:
+                # Back to the queue for another agent.
+                self.client.report(self.name, record["id"], FAILED, None)
+            except (IOError, OSError) as e:
+                log.warning("Could not hand job %s back: %s" % (
+                    record["id"], e))
+            raise
+        finally:
+            done.set()
+            heartbeats.join()
+
+        self.client.report(
+            self.name, record["id"], result.status, result.returncode)
+
+        return True
+
+    def run(self, once=False):
+        """
+        Pulls jobs until stopped.
+
+        :param once: Return as soon as the queue is empty.
+        :type once: (bool)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        log.info("Agent %s polling %r" % (self.name, self.client))
+
+        while not self.stopped:
+            try:
+                ran = self.run_one()
+            except (IOError, OSError) as e:
+                log.warning("Job source unreachable: %s" % e)
+                ran = False
+
+            if not ran:
+                if once:
+                    break
+                time.sleep(self.poll)
+
+    def cancel_renders(self):
+        """
+        Cancels the running job and waits until its process tree is gone.
+
+        Renders run in their own session, an interrupt that stopped the
+        loop never reached them.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.orchestrator.cancel()
+        pending = [task for task in self.orchestrator.tasks
+                   if not task.done()]
+        if pending:
+            self.loop.run_until_complete(
+                asyncio.gather(*pending, return_exceptions=True))
+
+    def stop(self):
+        self.stopped = True
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.orchestrator.cancel)
+        else:
+            self.cancel_renders()
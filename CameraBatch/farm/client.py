@@ -0,0 +1,79 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import logging
+
+try:
+    from urllib.request import (Request, urlopen)
+except ImportError:
+    from urllib2 import (Request, urlopen)
+
+log = logging.getLogger('CameraBatch')
+
+
+class FarmClient(object):
+    """
+    Talks to a :class:`JobServer` over HTTP.
+
+    ``token`` defaults to ``CAMERABATCH_TOKEN``.
+    """
+    def __init__(self, url, timeout=10.0, token=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.token = token or os.environ.get("CAMERABATCH_TOKEN")
+
+    def __repr__(self):
+        return "<%s instance of %s>" % (self.__class__.__name__, self.url)
+
+    def request(self, path, data=None):
+
+        body = None
+        headers = {}
+
+        if data is not None:
+            body = json.dumps(data).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if self.token:
+            headers["X-CameraBatch-Token"] = self.token
+
+        request = Request(self.url + path, data=body, headers=headers)
+        response = urlopen(request, timeout=self.timeout)
+
+        try:
+            return json.loads(response.read().decode("utf-8"))
+        finally:
+            response.close()
+
+    def submit(self, jobs):
+        """
+        Submits jobs to the server.
+
+        :param jobs: Jobs to queue.
+        :type jobs: (list of RenderJob)
+
+        :raises: None
+
+        :return: Ids of the queued jobs.
+        :rtype: list
+        """
+        return self.request(
+            "/jobs", {"jobs": [job.to_dict() for job in jobs]})["ids"]
+
+    def jobs(self):
+        return self.request("/jobs")
+
+    def cancel(self, ids=None):
+        self.request("/cancel", {"ids": ids})
+
+    def claim(self, agent):
+        return self.request("/claim", {"agent": agent})["job"]
+
+    def heartbeat(self, agent, job_id, frame=None):
+        return self.request("/heartbeat", {
+            "agent": agent, "id": job_id, "frame": frame})["cancel"]
+
+    def report(self, agent, job_id, status, returncode=None):
+        self.request("/report", {"agent": agent, "id": job_id,
+                                 "status": status, "returncode": returncode})
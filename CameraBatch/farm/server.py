@@ -0,0 +1,410 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import hmac
+import json
+import ntpath
+import posixpath
+import time
+import logging
+import threading
+
+try:
+    from http.server import (BaseHTTPRequestHandler, HTTPServer)
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import (BaseHTTPRequestHandler, HTTPServer)
+    from SocketServer import ThreadingMixIn
+
+from ..jobs import validate_overrides
+from ..backends import PRODUCTION_RENDERERS
+
+log = logging.getLogger('CameraBatch')
+
+TOKEN_HEADER = "X-CameraBatch-Token"
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+LOOPBACK_HOSTS = ("localhost", "::1")
+
+
+def default_token():
+    return os.environ.get("CAMERABATCH_TOKEN") or None
+
+
+def is_loopback(host):
+    return host in LOOPBACK_HOSTS or host.startswith("127.")
+
+
+def _absolute(path):
+    # Agents may run on another platform than the server.
+    return posixpath.isabs(path) or ntpath.isabs(path)
+
+
+def validate_job(job):
+    """
+    Checks a submitted job dict before it is queued.
+
+    :param job: Job dict as produced by ``RenderJob.to_dict``.
+    :type job: (dict)
+
+    :raises: ``ValueError`` if the job is malformed, names a renderer
+             agents do not run, uses relative paths or has unsafe
+             overrides.
+
+    :return: None
+    :rtype: NoneType
+    """
+    if not isinstance(job, dict):
+        raise ValueError("Job must be an object, not %r" % (job,))
+
+    for key in ("scene", "camera"):
+        if not isinstance(job.get(key), type(u"")) or not job[key]:
+            raise ValueError("Job %s must be a non-empty string" % key)
+
+    for key in ("start_frame", "end_frame", "step"):
+        value = job.get(key, 1)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("Job %s must be a number" % key)
+
+    if not _absolute(job["scene"]):
+        raise ValueError("Job scene must be an absolute path")
+
+    project = job.get("project")
+    if project is not None and (not isinstance(project, type(u"")) or
+                                not _absolute(project)):
+        raise ValueError("Job project must be an absolute path")
+
+    if (job.get("renderer") or "file") not in PRODUCTION_RENDERERS:
+        raise ValueError("Job renderer must be one of %s" % ", ".join(
+            sorted(PRODUCTION_RENDERERS)))
+
+    validate_overrides(job.get("overrides") or {})
+
+
+class JobQueue(object):
+    """
+    Thread-safe job table shared by the HTTP handlers.
+
+    Claimed jobs hold a lease renewed by heartbeats. A job whose agent stops
+    sending heartbeats for ``lease`` seconds goes back to the queue.
+    """
+    def __init__(self, lease=60.0, max_attempts=3):
+
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.order = []
+        self.agents = {}
+        self.next_id = 1
+
+    def submit(self, jobs):
+        """
+        Adds job dicts to the queue.
+
+        :param jobs: Job dicts as produced by ``RenderJob.to_dict``.
+        :type jobs: (list of dict)
+
+        :raises: ``ValueError`` if any job is invalid, nothing is queued.
+
+        :return: Ids of the new jobs.
+        :rtype: list
+        """
+        if not isinstance(jobs, list):
+            raise ValueError("Jobs must be a list")
+        for job in jobs:
+            validate_job(job)
+
+        ids = []
+
+        with self.lock:
+            for job in jobs:
+                job_id = str(self.next_id)
+                self.next_id += 1
+
+                record = dict(job)
+                record.update({"id": job_id,
+                               "status": QUEUED,
+                               "agent": None,
+                               "attempts": 0,
+                               "frame": None,
+                               "returncode": None,
+                               "heartbeat": None})
+                self.jobs[job_id] = record
+                self.order.append(job_id)
+                ids.append(job_id)
+
+        return ids
+
+    def claim(self, agent):
+        """
+        Leases the oldest queued job to an agent.
+
+        :param agent: Agent id.
+        :type agent: (str)
+
+        :raises: None
+
+        :return: The job record, or None if nothing is queued.
+        :rtype: dict
+        """
+        with self.lock:
+            self._expire()
+            self.agents[agent] = time.time()
+
+            for job_id in self.order:
+                record = self.jobs[job_id]
+                if record["status"] != QUEUED:
+                    continue
+
+                record.update({"status": RUNNING,
+                               "agent": agent,
+                               "frame": None,
+                               "heartbeat": time.time()})
+                record["attempts"] += 1
+                return dict(record)
+
+        return None
+
+    def heartbeat(self, agent, job_id, frame=None):
+        """
+        Renews a lease and records progress.
+
+        :raises: None
+
+        :return: True if the agent should cancel the job.
+        :rtype: bool
+        """
+        with self.lock:
+            self.agents[agent] = time.time()
+            record = self.jobs.get(job_id)
+
+            if not record or record["agent"] != agent:
+                return True
+            if record["status"] != RUNNING:
+                return True
+
+            record["heartbeat"] = time.time()
+            if frame is not None:
+                record["frame"] = frame
+
+        return False
+
+    def report(self, agent, job_id, status, returncode=None):
+
+        with self.lock:
+            record = self.jobs.get(job_id)
+            if not record or record["agent"] != agent:
+                return
+            if record["status"] != RUNNING:
+                return
+
+            record["returncode"] = returncode
+
+            failed = status not in (FINISHED, CANCELLED)
+            if failed and record["attempts"] < self.max_attempts:
+                log.warning("Job %s %s on %s, requeueing." % (
+                    job_id, status, agent))
+                record.update({"status": QUEUED, "agent": None})
+            else:
+                record["status"] = status
+
+    def cancel(self, ids=None):
+
+        with self.lock:
+            for job_id in ids or list(self.jobs):
+                record = self.jobs.get(job_id)
+                if record and record["status"] in (QUEUED, RUNNING):
+                    record["status"] = CANCELLED
+
+    def snapshot(self):
+
+        with self.lock:
+            self._expire()
+            return {"jobs": [dict(self.jobs[job_id])
+                             for job_id in self.order],
+                    "agents": dict(self.agents)}
+
+    def _expire(self):
+
+        now = time.time()
+        for record in self.jobs.values():
+            if record["status"] != RUNNING:
+                continue
+            if now - record["heartbeat"] < self.lease:
+                continue
+
+            log.warning("Lease on job %s from %s expired, requeueing." % (
+                record["id"], record["agent"]))
+
+            if record["attempts"] < self.max_attempts:
+                record.update({"status": QUEUED, "agent": None})
+            else:
+                record["status"] = FAILED
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        log.debug("%s %s" % (self.address_string(), format % args))
+
+    def send_json(self, data, code=200):
+
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def authorized(self):
+
+        token = self.server.token
+        if not token:
+            return True
+
+        sent = self.headers.get(TOKEN_HEADER) or ""
+        if hmac.compare_digest(sent.encode("utf-8"), token.encode("utf-8")):
+            return True
+
+        self.send_json({"error": "forbidden"}, 403)
+        return False
+
+    def do_GET(self):
+
+        if not self.authorized():
+            return
+
+        if self.path == "/jobs":
+            self.send_json(self.server.queue.snapshot())
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+
+        if not self.authorized():
+            return
+
+        try:
+            data = self.read_json()
+        except ValueError:
+            self.send_json({"error": "invalid json"}, 400)
+            return
+
+        if not isinstance(data, dict):
+            self.send_json({"error": "expected an object"}, 400)
+            return
+
+        try:
+            self.dispatch(data)
+        except KeyError as e:
+            self.send_json({"error": "missing %s" % e}, 400)
+        except (TypeError, ValueError) as e:
+            self.send_json({"error": str(e)}, 400)
+
+    def dispatch(self, data):
+
+        queue = self.server.queue
+
+        if self.path == "/jobs":
+            self.send_json({"ids": queue.submit(data.get("jobs", []))})
+
+        elif self.path == "/claim":
+            self.send_json({"job": queue.claim(data["agent"])})
+
+        elif self.path == "/heartbeat":
+            self.send_json({"cancel": queue.heartbeat(
+                data["agent"], data["id"], data.get("frame"))})
+
+        elif self.path == "/report":
+            queue.report(data["agent"], data["id"], data["status"],
+                         data.get("returncode"))
+            self.send_json({})
+
+        elif self.path == "/cancel":
+            queue.cancel(data.get("ids"))
+            self.send_json({})
+
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class JobServer(object):
+    """
+    A small HTTP job server for pull-based render agents.
+
+    ``POST /jobs`` submits, ``POST /claim``, ``/heartbeat`` and ``/report``
+    are used by agents, ``GET /jobs`` returns the job table and
+    ``POST /cancel`` cancels jobs.
+
+    With a ``token``, which defaults to ``CAMERABATCH_TOKEN``, every request
+    must send it in the ``X-CameraBatch-Token`` header. Without one the
+    server only listens on the loopback interface.
+
+    :raises: ``ValueError`` for a non-loopback ``host`` without a token.
+    """
+    def __init__(self, host="127.0.0.1", port=8765, lease=60.0,
+                 max_attempts=3, token=None):
+
+        token = token or default_token()
+        if not token and not is_loopback(host):
+            # Scenes can carry script nodes, an open queue runs anyone's code.
+            raise ValueError(
+                "A job server on %s needs a token, set CAMERABATCH_TOKEN or "
+                "pass --token." % host)
+
+        self.httpd = ThreadingHTTPServer((host, port), RequestHandler)
+        self.httpd.queue = JobQueue(lease=lease, max_attempts=max_attempts)
+        self.httpd.token = token
+        self.thread = None
+
+    @property
+    def queue(self):
+        return self.httpd.queue
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def serve_forever(self):
+        log.info("Job server listening on %s" % self.url)
+        self.httpd.serve_forever()
+
+    def start(self):
+        """
+        Serves from a daemon thread.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
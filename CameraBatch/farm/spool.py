@@ -0,0 +1,252 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Daemonless job claiming on a shared directory.
+
+Jobs move between ``queue``, ``claimed``, ``done`` and ``failed`` by
+``os.rename``, which is atomic on local filesystems and NFS, so exactly one
+machine wins every claim. A claimed job's file name carries its agent and
+lease expiry::
+
+    claimed/<id>~<agent>~<expiry>.json
+
+Renewing a lease renames the file to a later expiry. Reclaiming a stale lease
+renames that exact name back into ``queue``. Only one of the two renames can
+succeed, so a lease is never renewed and reclaimed at the same time.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+
+log = logging.getLogger('CameraBatch')
+
+FINISHED = "finished"
+CANCELLED = "cancelled"
+
+
+class Spool(object):
+    """
+    A job queue stored in a shared spool directory.
+
+    Exposes the same ``claim``/``heartbeat``/``report`` calls as
+    :class:`FarmClient` so an :class:`Agent` can work from either.
+    """
+    def __init__(self, root, lease=300.0, max_attempts=3):
+
+        self.root = root
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.leases = {}
+
+        for name in ("queue", "claimed", "done", "failed", "tmp"):
+            path = os.path.join(root, name)
+            if not os.path.isdir(path):
+                try:
+                    os.makedirs(path)
+                except OSError:
+                    if not os.path.isdir(path):
+                        raise
+
+    def __repr__(self):
+        return "<%s instance of %s>" % (self.__class__.__name__, self.root)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def write(self, path, data):
+        """
+        Writes json to the spool's ``tmp`` folder, on the same filesystem,
+        then renames it over ``path``.
+        """
+        tmp_path = self.path("tmp", uuid.uuid4().hex)
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.rename(tmp_path, path)
+
+    def read(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def lease_name(self, job_id, agent):
+        return "%s~%s~%d.json" % (
+            job_id, agent.replace("~", "-"), time.time() + self.lease)
+
+    def submit(self, jobs):
+        """
+        Publishes jobs into the queue.
+
+        :param jobs: Jobs to queue.
+        :type jobs: (list of RenderJob)
+
+        :raises: None
+
+        :return: Ids of the queued jobs.
+        :rtype: list
+        """
+        ids = []
+
+        for job in jobs:
+            job_id = "%d-%s" % (time.time() * 1000000, uuid.uuid4().hex[:8])
+            record = job.to_dict()
+            record.update({"id": job_id, "attempts": 0})
+            self.write(self.path("queue", job_id + ".json"), record)
+            ids.append(job_id)
+
+        return ids
+
+    def claim(self, agent):
+        """
+        Claims the oldest queued job.
+
+        Stale leases are reclaimed first.
+
+        :param agent: Agent id.
+        :type agent: (str)
+
+        :raises: None
+
+        :return: The job record, or None if the queue is empty.
+        :rtype: dict
+        """
+        self.reclaim()
+
+        for name in sorted(os.listdir(self.path("queue"))):
+
+            job_id = name[:-len(".json")]
+            lease_name = self.lease_name(job_id, agent)
+
+            try:
+                os.rename(self.path("queue", name),
+                          self.path("claimed", lease_name))
+            except OSError:
+                # Another agent won this one.
+                continue
+
+            record = self.read(self.path("claimed", lease_name))
+            record["attempts"] = record.get("attempts", 0) + 1
+            # Replaced whole, a concurrent reclaim never reads half a file.
+            self.write(self.path("claimed", lease_name), record)
+
+            self.leases[job_id] = lease_name
+            return record
+
+        return None
+
+    def heartbeat(self, agent, job_id, frame=None):
+        """
+        Renews a lease by renaming it to a later expiry.
+
+        :raises: None
+
+        :return: True if the lease was lost and the job should stop.
+        :rtype: bool
+        """
+        lease_name = self.leases.get(job_id)
+        if not lease_name:
+            return True
+
+        new_name = self.lease_name(job_id, agent)
+
+        try:
+            os.rename(self.path("claimed", lease_name),
+                      self.path("claimed", new_name))
+        except OSError:
+            log.warning("Lost the lease on job %s." % job_id)
+            self.leases.pop(job_id, None)
+            return True
+
+        self.leases[job_id] = new_name
+        return False
+
+    def report(self, agent, job_id, status, returncode=None):
+        """
+        Moves a claimed job to ``done``, ``failed`` or back to ``queue``.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        lease_name = self.leases.pop(job_id, None)
+        if not lease_name:
+            return
+
+        private = self.path("tmp", lease_name)
+        try:
+            os.rename(self.path("claimed", lease_name), private)
+        except OSError:
+            log.warning("Lost the lease on job %s." % job_id)
+            return
+
+        record = self.read(private)
+        record.update({"status": status,
+                       "returncode": returncode,
+                       "agent": agent})
+
+        if status in (FINISHED, CANCELLED):
+            folder = "done"
+        elif record["attempts"] < self.max_attempts:
+            log.warning("Job %s %s on %s, requeueing." % (
+                job_id, status, agent))
+            folder = "queue"
+        else:
+            folder = "failed"
+
+        self.write(self.path(folder, job_id + ".json"), record)
+        os.remove(private)
+
+    def reclaim(self):
+        """
+        Returns every expired lease to the queue.
+
+        :raises: None
+
+        :return: Number of reclaimed jobs.
+        :rtype: int
+        """
+        reclaimed = 0
+        now = time.time()
+
+        for name in os.listdir(self.path("claimed")):
+
+            try:
+                job_id, agent, expiry = name[:-len(".json")].split("~")
+                if int(expiry) > now:
+                    continue
+            except ValueError:
+                continue
+
+            private = self.path("tmp", "%s.%s" % (name, uuid.uuid4().hex))
+            try:
+                os.rename(self.path("claimed", name), private)
+            except OSError:
+                # Renewed or reclaimed by someone else.
+                continue
+
+            record = self.read(private)
+            folder = "queue"
+            if record.get("attempts", 0) >= self.max_attempts:
+                folder = "failed"
+                record["status"] = "expired"
+
+            log.warning("Lease on job %s from %s expired." % (job_id, agent))
+            self.write(self.path(folder, job_id + ".json"), record)
+            os.remove(private)
+            reclaimed += 1
+
+        return reclaimed
+
+    def status(self):
+        """
+        Counts jobs in each state.
+
+        :raises: None
+
+        :return: Job count keyed by folder name.
+        :rtype: dict
+        """
+        return dict((name, len(os.listdir(self.path(name))))
+                    for name in ("queue", "claimed", "done", "failed"))
@@ -0,0 +1,401 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Render time history and batch time estimates.
+
+Every finished render records how long its scene took to load and how long
+each frame took, keyed by scene, camera and render settings, in a small
+sqlite database shared by every batch on the machine. The
+:class:`Estimator` predicts new batches from it, falling back from the
+exact settings to the same camera under any settings and then to the
+scene, and :class:`BatchEta` corrects the prediction with the frames of the
+running batch to give a live ETA.
+"""
+
+import os
+import json
+import time
+import heapq
+import sqlite3
+import logging
+import threading
+
+log = logging.getLogger('CameraBatch')
+
+DAY = 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    scene TEXT, camera TEXT, settings TEXT, frame INTEGER,
+    seconds REAL, recorded REAL);
+CREATE INDEX IF NOT EXISTS frames_key ON frames (scene, camera, settings);
+CREATE TABLE IF NOT EXISTS jobs (
+    scene TEXT, camera TEXT, settings TEXT, frames INTEGER,
+    setup REAL, seconds REAL, recorded REAL);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (scene, camera, settings);
+"""
+
+
+def default_database_path():
+    return os.path.join(os.path.expanduser("~"), ".camerabatch",
+                        "render_times.db")
+
+
+def scene_key(job):
+    return os.path.normcase(os.path.abspath(job.scene))
+
+
+def settings_key(job):
+    return json.dumps([job.renderer, sorted(job.overrides.items())])
+
+
+def format_duration(seconds):
+    """
+    Formats seconds as ``1h 05m``, ``4m 10s`` or ``12s``.
+    """
+    seconds = int(round(seconds))
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+
+    if hours:
+        return "%dh %02dm" % (hours, minutes)
+    if minutes:
+        return "%dm %02ds" % (minutes, seconds)
+    return "%ds" % seconds
+
+
+def format_progress(progress):
+    """
+    The text shown beside a camera for a progress tuple.
+
+    :param progress: Frames done, frames total, current frame, status and
+                     seconds left.
+    :type progress: (tuple)
+
+    :raises: None
+
+    :return: Text such as ``3/10  f4  rendering  2m 10s``.
+    :rtype: str
+    """
+    done, total, frame, status, eta = progress
+
+    text = "{0}/{1}".format(done, total)
+    if status == "rendering" and frame is not None:
+        text += "  f{0}".format(frame)
+    text += "  {0}".format(status)
+    if status in ("queued", "rendering") and eta is not None:
+        text += "  {0}".format(format_duration(eta))
+
+    return text
+
+
+class RenderHistory(object):
+    """
+    Render times of earlier batches.
+
+    One connection is shared between threads behind a lock, the
+    orchestrator records from its loop thread while the UI estimates.
+
+    :param path: Database file, ``:memory:`` for a throwaway history.
+    :param max_age: Seconds after which samples are dropped.
+    """
+    def __init__(self, path=None, max_age=90 * DAY):
+
+        self.path = path or default_database_path()
+        self.lock = threading.Lock()
+
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        self.connection = sqlite3.connect(
+            self.path, timeout=10.0, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.executescript(SCHEMA)
+            cutoff = time.time() - max_age
+            self.connection.execute(
+                "DELETE FROM frames WHERE recorded < ?", (cutoff,))
+            self.connection.execute(
+                "DELETE FROM jobs WHERE recorded < ?", (cutoff,))
+
+    def __repr__(self):
+        return "<%s instance of %s>" % (self.__class__.__name__, self.path)
+
+    def record(self, job, setup=None, frame_times=None):
+        """
+        Stores the timings of one render.
+
+        :param job: Rendered job.
+        :type job: (RenderJob)
+        :param setup: Seconds from launch until the first frame started.
+        :type setup: (float)
+        :param frame_times: Frame number to seconds, for finished frames.
+        :type frame_times: (dict)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        frame_times = frame_times or {}
+        key = (scene_key(job), job.camera, settings_key(job))
+        now = time.time()
+
+        try:
+            with self.lock, self.connection:
+                self.connection.executemany(
+                    "INSERT INTO frames VALUES (?, ?, ?, ?, ?, ?)",
+                    [key + (frame, seconds, now)
+                     for frame, seconds in frame_times.items()])
+                if setup is not None:
+                    self.connection.execute(
+                        "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        key + (len(frame_times), setup,
+                               sum(frame_times.values()), now))
+        except sqlite3.Error as e:
+            log.warning("Could not record render times: %s" % e)
+
+    def query(self, sql, args):
+
+        try:
+            with self.lock:
+                return self.connection.execute(sql, args).fetchall()
+        except sqlite3.Error as e:
+            log.warning("Could not read render times: %s" % e)
+            return []
+
+    def frame_times(self, job):
+        """
+        Mean seconds per frame for the job's exact scene, camera and
+        settings.
+
+        :raises: None
+
+        :return: Frame number to seconds.
+        :rtype: dict
+        """
+        return dict(self.query(
+            "SELECT frame, AVG(seconds) FROM frames "
+            "WHERE scene = ? AND camera = ? AND settings = ? GROUP BY frame",
+            (scene_key(job), job.camera, settings_key(job))))
+
+    def mean_frame(self, job):
+        """
+        Mean seconds per frame, from the closest history available.
+
+        :raises: None
+
+        :return: Seconds, None without history for the scene.
+        :rtype: float
+        """
+        for where, args in (
+                ("scene = ? AND camera = ? AND settings = ?",
+                 (scene_key(job), job.camera, settings_key(job))),
+                ("scene = ? AND camera = ?", (scene_key(job), job.camera)),
+                ("scene = ?", (scene_key(job),))):
+            rows = self.query(
+                "SELECT AVG(seconds) FROM frames WHERE " + where, args)
+            if rows and rows[0][0] is not None:
+                return rows[0][0]
+
+        return None
+
+    def mean_setup(self, job):
+        """
+        Mean seconds a render of the scene spends before its first frame.
+
+        :raises: None
+
+        :return: Seconds, None without history for the scene.
+        :rtype: float
+        """
+        rows = self.query(
+            "SELECT AVG(setup) FROM jobs WHERE scene = ?", (scene_key(job),))
+        if rows and rows[0][0] is not None:
+            return rows[0][0]
+
+        return None
+
+
+class Estimator(object):
+    """
+    Predicts render times from a :class:`RenderHistory`.
+
+    Scenes without history are estimated at ``default_frame`` seconds a
+    frame and ``default_setup`` seconds to load.
+    """
+    def __init__(self, history=None, default_frame=60.0, default_setup=30.0):
+
+        self.history = history or RenderHistory()
+        self.default_frame = default_frame
+        self.default_setup = default_setup
+        self.cache = {}
+
+    def frame_estimates(self, job):
+        """
+        Predicted seconds for each of a job's frames.
+
+        :param job: Job to estimate.
+        :type job: (RenderJob)
+
+        :raises: None
+
+        :return: Frame number to seconds.
+        :rtype: dict
+        """
+        key = (scene_key(job), job.camera, settings_key(job))
+        if key not in self.cache:
+            known = self.history.frame_times(job)
+            mean = self.history.mean_frame(job)
+            setup = self.history.mean_setup(job)
+            self.cache[key] = (
+                known,
+                self.default_frame if mean is None else mean,
+                self.default_setup if setup is None else setup)
+
+        known, mean, _ = self.cache[key]
+        return dict((frame, known.get(frame, mean)) for frame in job.frames)
+
+    def setup(self, job):
+        self.frame_estimates(job)
+        return self.cache[(scene_key(job), job.camera, settings_key(job))][2]
+
+    def estimate_job(self, job):
+        """
+        Predicted seconds from launching a job until it exits.
+
+        :raises: None
+
+        :return: Seconds.
+        :rtype: float
+        """
+        return self.setup(job) + sum(self.frame_estimates(job).values())
+
+    def estimate(self, jobs, workers=1):
+        """
+        Predicted wall clock seconds for a batch.
+
+        Jobs are handed out in order to whichever of ``workers`` frees up
+        first, as the orchestrator does.
+
+        :param jobs: Jobs in queue order.
+        :type jobs: (list of RenderJob)
+        :param workers: Concurrent renders.
+        :type workers: (int)
+
+        :raises: None
+
+        :return: Seconds.
+        :rtype: float
+        """
+        finish = [0.0] * max(int(workers), 1)
+
+        for job in jobs:
+            start = heapq.heappop(finish)
+            heapq.heappush(finish, start + self.estimate_job(job))
+
+        return max(finish)
+
+    def longest_first(self, jobs):
+        """
+        Orders jobs by predicted duration, longest first, so a long camera
+        does not start last and leave the other workers idle.
+
+        :raises: None
+
+        :return: Reordered jobs.
+        :rtype: list of RenderJob
+        """
+        return sorted(jobs, key=self.estimate_job, reverse=True)
+
+
+class BatchEta(object):
+    """
+    Live estimate of a running batch.
+
+    Frames still to render are predicted by the :class:`Estimator` and
+    scaled by how the batch's finished frames compared with their
+    prediction, so a batch running slower than its history catches up.
+
+    :param estimator: Source of predictions.
+    :param jobs: Jobs of the batch.
+    :param workers: Concurrent renders.
+    """
+    def __init__(self, estimator, jobs, workers=1):
+
+        self.estimator = estimator
+        self.workers = max(int(workers), 1)
+        self.remaining = {}
+        self.predicted = 0.0
+        self.actual = 0.0
+        self.current = {}
+
+        for job in jobs:
+            frames = self.estimator.frame_estimates(job)
+            frames[None] = self.estimator.setup(job)
+            self.remaining[job] = frames
+
+    def job_started(self, job):
+        self.current[job] = (None, time.time())
+
+    def frame_started(self, job, frame):
+        """
+        Marks the frame a job moved on to, finishing its previous frame or
+        its setup.
+
+        :param job: Running job.
+        :type job: (RenderJob)
+        :param frame: Frame number.
+        :type frame: (int)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        if job in self.current:
+            previous, started = self.current[job]
+            if previous == frame:
+                return
+            self.finish(job, previous, time.time() - started)
+
+        self.current[job] = (frame, time.time())
+
+    def finish(self, job, frame, seconds):
+
+        predicted = self.remaining.get(job, {}).pop(frame, None)
+        if predicted is not None:
+            self.predicted += predicted
+            self.actual += seconds
+
+    def job_finished(self, job, ok=True):
+
+        frame, started = self.current.pop(job, (None, None))
+        if ok and started is not None:
+            self.finish(job, frame, time.time() - started)
+        self.remaining.pop(job, None)
+
+    @property
+    def scale(self):
+        if self.predicted < 1.0:
+            return 1.0
+        return self.actual / self.predicted
+
+    def job_remaining(self, job):
+        """
+        Predicted seconds until a job exits.
+        """
+        return sum(self.remaining.get(job, {}).values()) * self.scale
+
+    def seconds(self):
+        """
+        Predicted seconds until the batch ends.
+
+        :raises: None
+
+        :return: Seconds.
+        :rtype: float
+        """
+        total = sum(sum(frames.values()) for frames in self.remaining.values())
+        return total * self.scale / min(self.workers,
+                                        max(len(self.remaining), 1))
@@ -0,0 +1,232 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import math
+import logging
+
+log = logging.getLogger('CameraBatch')
+
+# \w would admit non-ASCII letters and $ a trailing newline.
+ATTR_PATTERN = re.compile(
+    r"^\|?[A-Za-z_][A-Za-z0-9_:|]*\.[A-Za-z_][A-Za-z0-9_\[\]\.]*\Z")
+
+
+def render_executable():
+    """
+    Finds Maya's command line renderer.
+
+    :raises: None
+
+    :return: Path to ``Render``, or ``Render`` if MAYA_LOCATION is unset.
+    :rtype: str
+    """
+    name = "Render.exe" if sys.platform == "win32" else "Render"
+    maya_location = os.environ.get("MAYA_LOCATION")
+
+    if maya_location:
+        return os.path.join(maya_location, "bin", name)
+
+    return name
+
+
+def mel_set_attr(attr, value):
+    """
+    Builds a MEL setAttr statement.
+
+    :param attr: Node attribute such as ``defaultResolution.width``.
+    :type attr: (str)
+    :param value: Number, bool or string value.
+    :type value: (object)
+
+    :raises: ``ValueError`` if the attribute is not a plain ``node.attr``
+             name or the value is not a finite number.
+
+    :return: MEL statement.
+    :rtype: str
+    """
+    # Overrides come from manifests and the job server, anything but an
+    # attribute name would run as MEL on the render machine.
+    try:
+        valid = ATTR_PATTERN.match(attr) is not None
+    except TypeError:
+        valid = False
+    if not valid:
+        raise ValueError("Invalid override attribute %r" % (attr,))
+
+    if isinstance(value, bool):
+        return "setAttr %s %d;" % (attr, value)
+
+    if isinstance(value, (int, float)):
+        if math.isinf(value) or math.isnan(value):
+            raise ValueError("Invalid value %r for %s" % (value, attr))
+        return "setAttr %s %r;" % (attr, value)
+
+    escaped = str(value).replace("\\", "\\\\").replace(
+        '"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+    return 'setAttr -type "string" %s "%s";' % (attr, escaped)
+
+
+def validate_overrides(overrides):
+    """
+    Checks that every override can be applied safely.
+
+    :param overrides: Attribute to value.
+    :type overrides: (dict)
+
+    :raises: ``ValueError`` on the first invalid override.
+
+    :return: None
+    :rtype: NoneType
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("Overrides must be a mapping, not %r" % (
+            overrides,))
+
+    for attr, value in overrides.items():
+        mel_set_attr(attr, value)
+
+
+class RenderJob(object):
+    """
+    A camera and frame range rendered by a separate Maya process.
+
+    ``overrides`` maps attributes to values applied by a pre-render
+    ``setAttr`` before the first frame.
+    """
+    def __init__(self, scene, camera, start_frame, end_frame,
+                 renderer="file", project=None, step=1, overrides=None):
+
+        self.scene = scene
+        self.camera = camera
+        self.start_frame = int(start_frame)
+        self.end_frame = int(end_frame)
+        self.renderer = renderer
+        self.project = project
+        self.step = max(int(step), 1)
+        self.overrides = dict(overrides or {})
+
+    def __repr__(self):
+        return "<%s instance of %s %d - %d>" % (
+            self.__class__.__name__, self.camera,
+            self.start_frame, self.end_frame)
+
+    @classmethod
+    def from_camera(cls, camera, scene, **kwargs):
+        return cls(scene, camera.name, camera.start_frame, camera.end_frame,
+                   **kwargs)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["scene"], data["camera"],
+                   data["start_frame"], data["end_frame"],
+                   renderer=data.get("renderer", "file"),
+                   project=data.get("project"),
+                   step=data.get("step", 1),
+                   overrides=data.get("overrides"))
+
+    def to_dict(self):
+        return {"scene": self.scene,
+                "camera": self.camera,
+                "start_frame": self.start_frame,
+                "end_frame": self.end_frame,
+                "renderer": self.renderer,
+                "project": self.project,
+                "step": self.step,
+                "overrides": self.overrides}
+
+    def split(self, chunk_size):
+        """
+        Splits the frame range into consecutive chunks.
+
+        :param chunk_size: Frames per chunk, 0 keeps the job whole.
+        :type chunk_size: (int)
+
+        :raises: None
+
+        :return: Chunk jobs covering this job's frames.
+        :rtype: list of RenderJob
+        """
+        if chunk_size <= 0:
+            return [self]
+
+        span = chunk_size * self.step
+
+        return [self.subrange(start,
+                              min(start + span - self.step, self.end_frame))
+                for start in range(self.start_frame, self.end_frame + 1,
+                                   span)]
+
+    def subrange(self, start_frame, end_frame, step=None):
+        return self.__class__(self.scene, self.camera, start_frame, end_frame,
+                              renderer=self.renderer, project=self.project,
+                              step=step or self.step,
+                              overrides=self.overrides)
+
+    def bisect(self):
+        """
+        Splits the frames in two halves.
+
+        :raises: None
+
+        :return: Two jobs, or this job alone if it has a single frame.
+        :rtype: list of RenderJob
+        """
+        frames = self.frames
+        if len(frames) < 2:
+            return [self]
+
+        middle = len(frames) // 2
+
+        return [self.subrange(frames[0], frames[middle - 1]),
+                self.subrange(frames[middle], frames[-1])]
+
+    def without(self, frames):
+        """
+        Jobs covering this job's frames except ``frames``.
+
+        :param frames: Frames already rendered.
+        :type frames: (iterable)
+
+        :raises: None
+
+        :return: One job per run of consecutive frames left, this job
+                 itself if none of its frames are excluded.
+        :rtype: list of RenderJob
+        """
+        frames = set(frames)
+        if not frames.intersection(self.frames):
+            return [self]
+
+        runs = []
+        run = []
+        for frame in self.frames:
+            if frame in frames:
+                if run:
+                    runs.append(run)
+                run = []
+            else:
+                run.append(frame)
+        if run:
+            runs.append(run)
+
+        return [self.subrange(run[0], run[-1]) for run in runs]
+
+    @property
+    def frames(self):
+        return list(range(self.start_frame, self.end_frame + 1, self.step))
+
+    def command(self):
+        """
+        Builds the command line for this job through its renderer backend.
+
+        :raises: None
+
+        :return: Program followed by its arguments.
+        :rtype: list
+        """
+        from .backends import renderer_backend
+
+        return renderer_backend(self.renderer).command(self)
@@ -0,0 +1,280 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Incremental render log tailing.
+
+Each :class:`LogTailer` remembers the byte offset and file identity of the
+log it follows, so a poll only reads what was appended. Rotation (a new file
+at the same path) and truncation restart from the top. Lines are matched
+against a per-renderer :class:`PatternTable`, which rejects uninteresting
+lines with a single combined regex before trying individual patterns.
+"""
+
+import os
+import re
+import logging
+
+log = logging.getLogger('CameraBatch')
+
+FRAME_STARTED = "frame_started"
+FRAME_DONE = "frame_done"
+PROGRESS = "progress"
+ERROR = "error"
+FINISHED = "finished"
+CANCELLED = "cancelled"
+
+_IMAGE_FRAME = r"\.(?P<frame>-?\d+)\.\w+\.?\s*$"
+
+COMMON_PATTERNS = [
+    (ERROR, r"^// Error: (?P<message>.*)"),
+    (CANCELLED, r"^Render Cancelled"),
+]
+
+PATTERNS = {
+    "sw": [
+        (FRAME_DONE, r"^Finished Rendering .*" + _IMAGE_FRAME),
+        (PROGRESS, r"Percentage of rendering done: (?P<percent>\d+)"),
+        (FINISHED, r"^Rendering Completed"),
+    ],
+    "arnold": [
+        (FRAME_STARTED, r"Rendering frame (?P<frame>-?\d+)"),
+        (PROGRESS, r"\|\s+(?P<percent>\d+)% done"),
+        (FRAME_DONE, r"\[mtoa\] .*[Ww]riting .*" + _IMAGE_FRAME),
+        (ERROR, r"\| ERROR\s*\|?\s*(?P<message>.*)"),
+        (FINISHED, r"^Rendering Completed"),
+    ],
+    "redshift": [
+        (FRAME_STARTED, r"Rendering frame (?P<frame>-?\d+)"),
+        (FRAME_DONE, r"Frame rendering done"),
+        (PROGRESS, r"Block \d+/\d+ .*\((?P<percent>\d+)%\)"),
+        (ERROR, r"\[Redshift\] ERROR: (?P<message>.*)"),
+        (FINISHED, r"\[Redshift\] License returned"),
+    ],
+}
+
+PATTERNS["file"] = [entry for entries in PATTERNS.values()
+                    for entry in entries]
+
+
+class LogEvent(object):
+    """
+    A progress or error event parsed from a log line.
+    """
+    def __init__(self, source, kind, line, frame=None, percent=None,
+                 message=None):
+
+        self.source = source
+        self.kind = kind
+        self.line = line
+        self.frame = frame
+        self.percent = percent
+        self.message = message
+
+    def __repr__(self):
+        return "<%s instance of %s %s frame %s>" % (
+            self.__class__.__name__, self.source, self.kind, self.frame)
+
+
+class PatternTable(object):
+    """
+    Precompiled ``(kind, regex)`` entries tried in order.
+
+    A combined alternation of every pattern screens each line first, so the
+    common case of an uninteresting line costs a single regex search no
+    matter how many patterns are registered.
+    """
+    def __init__(self, entries):
+
+        self.entries = [(kind, re.compile(pattern))
+                        for kind, pattern in entries]
+
+        # Named groups repeat across patterns, drop them for the screen.
+        plain = [re.sub(r"\(\?P<\w+>", "(?:", pattern)
+                 for kind, pattern in entries]
+        self.screen = re.compile("|".join(
+            "(?:%s)" % pattern for pattern in plain)) if plain else None
+
+    def match(self, line):
+        """
+        Matches a line.
+
+        :param line: Log line.
+        :type line: (str)
+
+        :raises: None
+
+        :return: Kind and named groups, or None.
+        :rtype: tuple
+        """
+        if self.screen is None or not self.screen.search(line):
+            return None
+
+        for kind, pattern in self.entries:
+            match = pattern.search(line)
+            if match:
+                return kind, match.groupdict()
+
+        return None
+
+
+_tables = {}
+
+
+def pattern_table(renderer=None):
+    """
+    Returns the cached pattern table for a ``Render -r`` renderer name.
+
+    :param renderer: Renderer name, unknown names match every renderer.
+    :type renderer: (str)
+
+    :raises: None
+
+    :return: Compiled table.
+    :rtype: PatternTable
+    """
+    key = renderer if renderer in PATTERNS else "file"
+
+    if key not in _tables:
+        _tables[key] = PatternTable(COMMON_PATTERNS + PATTERNS[key])
+
+    return _tables[key]
+
+
+class LogTailer(object):
+    """
+    Follows one log file incrementally.
+    """
+    def __init__(self, path, table=None, source=None, from_end=False):
+
+        self.path = path
+        self.table = table or pattern_table()
+        self.source = source or path
+        self.offset = 0
+        self.identity = None
+        self.remainder = b""
+        self.frame = None
+        self.from_end = from_end
+
+    def poll(self):
+        """
+        Reads lines appended since the last poll.
+
+        :raises: None
+
+        :return: Events parsed from the new lines.
+        :rtype: list of LogEvent
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return []
+
+        identity = (stat.st_dev, stat.st_ino)
+
+        if identity != self.identity:
+            # New or rotated file.
+            self.offset = stat.st_size if (
+                self.from_end and self.identity is None) else 0
+            self.identity = identity
+            self.remainder = b""
+
+        elif stat.st_size < self.offset:
+            log.debug("%s was truncated, rereading." % self.path)
+            self.offset = 0
+            self.remainder = b""
+
+        if stat.st_size == self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+
+        self.offset += len(data)
+
+        lines = (self.remainder + data).split(b"\n")
+        self.remainder = lines.pop()
+
+        events = []
+        for raw in lines:
+            event = self.parse(raw.decode("utf-8", "replace").rstrip("\r"))
+            if event:
+                events.append(event)
+
+        return events
+
+    def parse(self, line):
+
+        result = self.table.match(line)
+        if result is None:
+            return None
+
+        kind, groups = result
+
+        frame = groups.get("frame")
+        if frame is not None:
+            frame = int(frame)
+            if kind == FRAME_STARTED:
+                self.frame = frame
+        elif kind in (FRAME_DONE, PROGRESS):
+            frame = self.frame
+
+        percent = groups.get("percent")
+
+        return LogEvent(self.source, kind, line,
+                        frame=frame,
+                        percent=int(percent) if percent else None,
+                        message=groups.get("message"))
+
+
+class LogWatcher(object):
+    """
+    Polls many render logs, reading only those that grew.
+    """
+    def __init__(self):
+        self.tailers = {}
+
+    def add(self, path, renderer=None, source=None, from_end=False):
+        """
+        Starts following a log.
+
+        :param path: Log file path, it does not need to exist yet.
+        :type path: (str)
+        :param renderer: ``Render -r`` name used to pick patterns.
+        :type renderer: (str)
+        :param source: Key reported on events, defaults to the path.
+        :type source: (object)
+        :param from_end: Ignore what the log already holds.
+        :type from_end: (bool)
+
+        :raises: None
+
+        :return: The tailer.
+        :rtype: LogTailer
+        """
+        tailer = LogTailer(path, pattern_table(renderer), source=source,
+                           from_end=from_end)
+        self.tailers[path] = tailer
+
+        if from_end:
+            tailer.poll()
+
+        return tailer
+
+    def remove(self, path):
+        self.tailers.pop(path, None)
+
+    def poll(self):
+        """
+        Polls every followed log.
+
+        :raises: None
+
+        :return: Events from all logs in poll order.
+        :rtype: list of LogEvent
+        """
+        events = []
+        for tailer in list(self.tailers.values()):
+            events.extend(tailer.poll())
+
+        return events
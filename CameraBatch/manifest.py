@@ -0,0 +1,372 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Versioned batch manifests.
+
+A manifest is a header describing the scene, renderer and global overrides
+followed by any number of frame tasks. Two encodings share the same model:
+
+* JSON lines (``.cbm.json``): the header on the first line, one task per
+  following line.
+* Binary (``.cbm``): ``CBMF`` magic, a version, the JSON header and then
+  varint encoded records. Camera names and override sets are interned in a
+  string table so repeated cameras cost a couple of bytes per task.
+
+Both are written and read one task at a time so memory stays flat no
+matter how many tasks a manifest holds.
+"""
+
+import io
+import json
+import struct
+import logging
+
+from .jobs import RenderJob
+
+log = logging.getLogger('CameraBatch')
+
+VERSION = 1
+MAGIC = b"CBMF"
+
+_STRING = 1
+_TASK = 2
+
+
+class ManifestError(RuntimeError):
+    pass
+
+
+class FrameTask(object):
+    """
+    A camera and a set of frame ranges with optional attribute overrides.
+
+    ``ranges`` is a list of ``(start, end, step)`` tuples.
+    """
+    def __init__(self, camera, ranges, overrides=None):
+        self.camera = camera
+        self.ranges = [(int(start), int(end), int(step))
+                       for start, end, step in ranges]
+        self.overrides = dict(overrides or {})
+
+    def __repr__(self):
+        return "<%s instance of %s %s>" % (
+            self.__class__.__name__, self.camera, self.frame_string())
+
+    def __eq__(self, other):
+        return (isinstance(other, FrameTask) and
+                (self.camera, self.ranges, self.overrides) ==
+                (other.camera, other.ranges, other.overrides))
+
+    def __ne__(self, other):
+        return not self == other
+
+    @classmethod
+    def from_job(cls, job):
+        return cls(job.camera, [(job.start_frame, job.end_frame, job.step)],
+                   job.overrides)
+
+    @property
+    def frames(self):
+        for start, end, step in self.ranges:
+            for frame in range(start, end + 1, step):
+                yield frame
+
+    def frame_string(self):
+        return ",".join(
+            "%d-%dx%d" % (start, end, step) if step != 1 else
+            "%d-%d" % (start, end) if start != end else str(start)
+            for start, end, step in self.ranges)
+
+    def to_jobs(self, header):
+        """
+        Expands the task into one render job per frame range.
+
+        :param header: Manifest header.
+        :type header: (dict)
+
+        :raises: None
+
+        :return: Render jobs.
+        :rtype: list of RenderJob
+        """
+        overrides = dict(header.get("overrides") or {})
+        overrides.update(self.overrides)
+
+        return [RenderJob(header["scene"], self.camera, start, end,
+                          renderer=header.get("renderer", "file"),
+                          project=header.get("project"),
+                          step=step,
+                          overrides=overrides)
+                for start, end, step in self.ranges]
+
+
+def make_header(scene, renderer="file", project=None, overrides=None):
+    """
+    Builds a manifest header.
+
+    :raises: None
+
+    :return: Header dict.
+    :rtype: dict
+    """
+    return {"format": "camerabatch-manifest",
+            "version": VERSION,
+            "scene": scene,
+            "renderer": renderer,
+            "project": project,
+            "overrides": dict(overrides or {})}
+
+
+def _write_varint(stream, value):
+
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            break
+
+    stream.write(bytes(out))
+
+
+def _read_varint(stream):
+
+    shift = 0
+    value = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            raise EOFError()
+        byte = ord(byte)
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value
+        shift += 7
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+class ManifestWriter(object):
+    """
+    Streams a manifest to a file.
+
+    Use as a context manager::
+
+        with ManifestWriter(path, make_header(scene)) as writer:
+            for task in tasks:
+                writer.write(task)
+    """
+    def __init__(self, path, header, binary=None):
+
+        if binary is None:
+            binary = not path.endswith(".json")
+
+        self.binary = binary
+        self.header = header
+        self.strings = {}
+        self.count = 0
+        self.stream = io.open(path, "wb")
+
+        header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+
+        if binary:
+            self.stream.write(MAGIC)
+            self.stream.write(struct.pack("<HI", VERSION, len(header_bytes)))
+            self.stream.write(header_bytes)
+        else:
+            self.stream.write(header_bytes + b"\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def intern(self, value):
+
+        index = self.strings.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings[value] = index
+            data = value.encode("utf-8")
+            _write_varint(self.stream, _STRING)
+            _write_varint(self.stream, len(data))
+            self.stream.write(data)
+
+        return index
+
+    def write(self, task):
+        """
+        Appends a task.
+
+        :param task: Task to write.
+        :type task: (FrameTask)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.count += 1
+
+        if not self.binary:
+            self.stream.write(json.dumps({
+                "camera": task.camera,
+                "ranges": task.ranges,
+                "overrides": task.overrides}).encode("utf-8") + b"\n")
+            return
+
+        camera = self.intern(task.camera)
+        overrides = 0
+        if task.overrides:
+            overrides = self.intern(
+                json.dumps(task.overrides, sort_keys=True)) + 1
+
+        _write_varint(self.stream, _TASK)
+        _write_varint(self.stream, camera)
+        _write_varint(self.stream, overrides)
+        _write_varint(self.stream, len(task.ranges))
+        for start, end, step in task.ranges:
+            _write_varint(self.stream, _zigzag(start))
+            _write_varint(self.stream, end - start)
+            _write_varint(self.stream, step)
+
+    def close(self):
+        if not self.stream.closed:
+            self.stream.close()
+
+
+class ManifestReader(object):
+    """
+    Streams tasks from a manifest file of either encoding.
+
+    The header is read on open, iterating yields :class:`FrameTask` objects.
+    """
+    def __init__(self, path):
+
+        self.path = path
+        self.stream = io.open(path, "rb")
+        self.binary = self.stream.read(len(MAGIC)) == MAGIC
+
+        if self.binary:
+            version, length = struct.unpack("<HI", self.stream.read(6))
+            self.header = json.loads(self.stream.read(length).decode("utf-8"))
+        else:
+            self.stream.seek(0)
+            self.header = json.loads(self.stream.readline().decode("utf-8"))
+            version = self.header.get("version")
+
+        if version != VERSION:
+            self.stream.close()
+            raise ManifestError(
+                "%s is manifest version %s, expected %d" % (
+                    path, version, VERSION))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+
+        if self.binary:
+            return self._read_binary()
+
+        return self._read_json()
+
+    def _read_json(self):
+
+        for line in self.stream:
+            line = line.strip()
+            if not line:
+                continue
+            data = json.loads(line.decode("utf-8"))
+            yield FrameTask(data["camera"], data["ranges"],
+                            data.get("overrides"))
+
+    def _read_binary(self):
+
+        strings = []
+        overrides_cache = {}
+
+        while True:
+            try:
+                kind = _read_varint(self.stream)
+            except EOFError:
+                return
+
+            if kind == _STRING:
+                length = _read_varint(self.stream)
+                strings.append(self.stream.read(length).decode("utf-8"))
+                continue
+
+            if kind != _TASK:
+                raise ManifestError(
+                    "Unknown record %d in %s" % (kind, self.path))
+
+            camera = strings[_read_varint(self.stream)]
+            overrides_index = _read_varint(self.stream)
+            ranges = []
+            for i in range(_read_varint(self.stream)):
+                start = _unzigzag(_read_varint(self.stream))
+                end = start + _read_varint(self.stream)
+                ranges.append((start, end, _read_varint(self.stream)))
+
+            overrides = None
+            if overrides_index:
+                if overrides_index not in overrides_cache:
+                    overrides_cache[overrides_index] = json.loads(
+                        strings[overrides_index - 1])
+                overrides = overrides_cache[overrides_index]
+
+            yield FrameTask(camera, ranges, overrides)
+
+    def jobs(self):
+        """
+        Yields render jobs for every task.
+
+        :raises: None
+
+        :return: Render job generator.
+        :rtype: generator
+        """
+        for task in self:
+            for job in task.to_jobs(self.header):
+                yield job
+
+    def close(self):
+        if not self.stream.closed:
+            self.stream.close()
+
+
+def write_manifest(path, header, tasks, binary=None):
+    """
+    Writes a whole manifest.
+
+    :param path: Output path, ``.json`` selects the JSON encoding.
+    :type path: (str)
+    :param header: Header from :func:`make_header`.
+    :type header: (dict)
+    :param tasks: Tasks to write, any iterable.
+    :type tasks: (iterable of FrameTask)
+
+    :raises: None
+
+    :return: Number of tasks written.
+    :rtype: int
+    """
+    with ManifestWriter(path, header, binary=binary) as writer:
+        for task in tasks:
+            writer.write(task)
+
+    return writer.count
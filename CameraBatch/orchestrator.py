@@ -0,0 +1,572 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+asyncio render orchestration.
+
+Requires Python 3. Every job runs in its own process session so cancelling
+or timing out a job takes down the whole process tree it spawned.
+"""
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import logging
+import subprocess
+
+from .backends import renderer_backend
+from .admission import AdmissionError
+
+log = logging.getLogger('CameraBatch')
+
+FINISHED = "finished"
+FAILED = "failed"
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+
+
+class JobResult(object):
+    """
+    Outcome of a single job.
+
+    ``rendered`` lists the frames a failed run got past before it died.
+    """
+    def __init__(self, job, status, returncode=None, poison=None,
+                 rendered=None):
+        self.job = job
+        self.status = status
+        self.returncode = returncode
+        self.poison = list(poison or [])
+        self.rendered = list(rendered or [])
+
+    def __repr__(self):
+        return "<%s instance of %r %s>" % (
+            self.__class__.__name__, self.job, self.status)
+
+    @property
+    def ok(self):
+        return self.status == FINISHED
+
+
+def _session_kwargs():
+
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+
+    return {"start_new_session": True}
+
+
+def descendants(pid):
+    """
+    Lists every process below ``pid`` using /proc.
+
+    :param pid: Root process id.
+    :type pid: (int)
+
+    :raises: None
+
+    :return: Descendant process ids, empty where /proc is unavailable.
+    :rtype: list
+    """
+    children = {}
+
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/%s/stat" % entry) as f:
+                stat = f.read()
+        except (IOError, OSError):
+            continue
+        # The command name may contain spaces, the ppid follows its ")".
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    found = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+
+    return found
+
+
+def _signal_tree(pid, pids, sig):
+
+    if sys.platform == "win32":
+        subprocess.call(["taskkill", "/F", "/T", "/PID", str(pid)],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL)
+        return
+
+    try:
+        os.killpg(pid, sig)
+    except OSError:
+        pass
+
+    for child in pids:
+        try:
+            os.kill(child, sig)
+        except OSError:
+            pass
+
+
+async def terminate_tree(process, timeout=10.0):
+    """
+    Terminates a process and all of its descendants.
+
+    SIGTERM is sent to the process group and every known descendant, after
+    ``timeout`` seconds anything left is sent SIGKILL.
+
+    :param process: Process started with :func:`_session_kwargs`.
+    :type process: (asyncio.subprocess.Process)
+    :param timeout: Seconds to wait before killing.
+    :type timeout: (float)
+
+    :raises: None
+
+    :return: None
+    :rtype: NoneType
+    """
+    pids = descendants(process.pid)
+    _signal_tree(process.pid, pids, signal.SIGTERM)
+
+    try:
+        await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+    _signal_tree(process.pid, pids + descendants(process.pid),
+                 getattr(signal, "SIGKILL", signal.SIGTERM))
+    await process.wait()
+
+
+class RetryPolicy(object):
+    """
+    How failed jobs are retried.
+
+    A failed job is retried ``attempts - 1`` times, waiting ``backoff``
+    seconds before the first retry and ``factor`` times longer before each
+    next one, up to ``max_backoff``. If it still fails and ``bisect`` is set
+    its frames are halved and each half rendered on its own, recursively,
+    until the frames that crash are isolated. Those poison frames get the
+    same retries before they are given up on.
+    """
+    def __init__(self, attempts=3, backoff=5.0, factor=2.0,
+                 max_backoff=300.0, bisect=True):
+
+        self.attempts = max(int(attempts), 1)
+        self.backoff = backoff
+        self.factor = factor
+        self.max_backoff = max_backoff
+        self.bisect = bisect
+
+    def delay(self, retry):
+        return min(self.backoff * self.factor ** (retry - 1),
+                   self.max_backoff)
+
+
+class Limiter(object):
+    """
+    A semaphore whose limit can change while jobs hold it.
+
+    Lowering the limit never interrupts running jobs, new ones wait until
+    enough have finished.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def __aexit__(self, *args):
+        async with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    async def set_limit(self, limit):
+        async with self.condition:
+            self.limit = limit
+            self.condition.notify_all()
+
+
+class Orchestrator(object):
+    """
+    Runs jobs concurrently with per job timeouts and tree-wide cancellation.
+
+    ``on_start(job)``, ``on_output(job, line)`` and ``on_result(result)`` are
+    called from the event loop thread. With an ``autoscaler`` the number of
+    concurrent jobs follows its readings every ``scale_interval`` seconds
+    instead of staying at ``max_jobs``. With an ``admission`` controller a
+    job that has a slot still waits until memory and disk allow it, and its
+    peak memory is sampled every ``sample_interval`` seconds. With a
+    ``retry`` policy failed jobs are retried and bisected, ``on_result`` is
+    then called once per queued job with the isolated poison frames. A
+    ``tracer`` records every run on a ``worker N`` lane, split into setup
+    and one span per frame. A ``history`` stores each run's setup and frame
+    times for later estimates.
+    """
+    def __init__(self, max_jobs=1, timeout=None, kill_timeout=10.0,
+                 on_start=None, on_output=None, on_result=None,
+                 autoscaler=None, scale_interval=5.0, admission=None,
+                 sample_interval=1.0, retry=None, tracer=None,
+                 history=None):
+
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.kill_timeout = kill_timeout
+        self.on_start = on_start
+        self.on_output = on_output
+        self.on_result = on_result
+        self.autoscaler = autoscaler
+        self.scale_interval = scale_interval
+        self.admission = admission
+        self.sample_interval = sample_interval
+        self.retry = retry
+        self.tracer = tracer
+        self.history = history
+        self.free_lanes = []
+        self.lane_count = 0
+
+        self.tasks = []
+        self.processes = {}
+        self.limiter = None
+        self.cancelled = False
+
+    async def run(self, jobs):
+        """
+        Runs every job and waits for all of them.
+
+        :param jobs: Objects with a ``command()`` method.
+        :type jobs: (list)
+
+        :raises: None
+
+        :return: One result per job, in job order.
+        :rtype: list of JobResult
+        """
+        limit = self.autoscaler.jobs if self.autoscaler else self.max_jobs
+        self.limiter = Limiter(limit)
+        self.cancelled = False
+        self.tasks = [asyncio.ensure_future(self.run_job(job, self.limiter))
+                      for job in jobs]
+
+        scaler = None
+        if self.autoscaler:
+            scaler = asyncio.ensure_future(self.scale())
+
+        try:
+            return await asyncio.gather(*self.tasks)
+        finally:
+            if scaler:
+                scaler.cancel()
+
+    async def scale(self):
+
+        while True:
+            await asyncio.sleep(self.scale_interval)
+            pids = [process.pid for process in self.processes.values()]
+            jobs = self.autoscaler.update(pids)
+            if jobs != self.limiter.limit:
+                await self.limiter.set_limit(jobs)
+
+    def cancel(self):
+        """
+        Cancels queued jobs and terminates running ones.
+
+        Must be called from the event loop thread.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.cancelled = True
+        for task in self.tasks:
+            task.cancel()
+
+    async def run_job(self, job, limiter):
+
+        try:
+            result = await self.attempt(job, limiter)
+            if self.retry and not result.ok:
+                result = await self.recover(job, limiter, result)
+        except asyncio.CancelledError:
+            result = JobResult(job, CANCELLED)
+
+        if self.on_result:
+            self.on_result(result)
+
+        return result
+
+    async def attempt(self, job, limiter):
+
+        async with limiter:
+            if self.admission:
+                return await self.execute_admitted(job)
+            return await self.execute(job)
+
+    async def retry_job(self, job, limiter, result, done):
+
+        for retry in range(1, self.retry.attempts):
+            delay = self.retry.delay(retry)
+            log.warning("%r %s, retrying in %ss." % (job, result.status, delay))
+            await asyncio.sleep(delay)
+
+            result = await self.attempt(job, limiter)
+            if result.ok:
+                break
+            done.update(result.rendered)
+
+        return result
+
+    def pieces(self, job, done):
+        """
+        Jobs for the frames of ``job`` not yet rendered, halved when they
+        form a single run so a poison frame can be isolated.
+        """
+        pieces = job.without(done) if hasattr(job, "without") else [job]
+        if self.retry.bisect and len(pieces) == 1 and hasattr(
+                pieces[0], "bisect"):
+            pieces = pieces[0].bisect()
+
+        return pieces
+
+    async def recover(self, job, limiter, result):
+        """
+        Retries a failed job, then bisects it to isolate poison frames.
+
+        :raises: ``asyncio.CancelledError`` if the batch is cancelled.
+
+        :return: Finished if every frame rendered in the end, otherwise
+                 failed with the frames that never did.
+        :rtype: JobResult
+        """
+        done = set(result.rendered)
+        result = await self.retry_job(job, limiter, result, done)
+        if result.ok or result.returncode is None:
+            # A job that never started has no frames to isolate.
+            return result
+
+        # Frames a failed run got past are not rendered again.
+        pieces = self.pieces(job, done)
+        if len(pieces) < 2:
+            poison = [frame for piece in pieces
+                      for frame in getattr(piece, "frames", [])]
+        else:
+            log.warning("%r keeps failing, bisecting." % job)
+            found = await asyncio.gather(
+                *[self.isolate(piece, limiter) for piece in pieces])
+            poison = sorted(frame for frames in found for frame in frames)
+
+        if poison:
+            log.error("%s poison frames: %s" % (
+                job.camera, " ".join(str(frame) for frame in poison)))
+            return JobResult(job, FAILED, result.returncode, poison=poison)
+
+        return JobResult(job, FINISHED, 0)
+
+    async def isolate(self, job, limiter):
+
+        result = await self.attempt(job, limiter)
+        if result.ok:
+            return []
+
+        done = set(result.rendered)
+        pieces = self.pieces(job, done)
+        if len(pieces) < 2:
+            if not pieces:
+                return []
+            piece = pieces[0]
+            result = await self.retry_job(piece, limiter, result, done)
+            if result.ok:
+                return []
+            return [frame for frame in piece.frames if frame not in done]
+
+        found = await asyncio.gather(
+            *[self.isolate(piece, limiter) for piece in pieces])
+
+        return [frame for frames in found for frame in frames]
+
+    async def execute_admitted(self, job):
+
+        try:
+            await self.admission.acquire(job, self.running_pids)
+        except AdmissionError as e:
+            log.error(str(e))
+            return JobResult(job, FAILED)
+
+        started = time.time()
+        peak = [0]
+        sampler = asyncio.ensure_future(self.sample_peak(job, peak))
+
+        try:
+            result = await self.execute(job)
+        finally:
+            sampler.cancel()
+            self.admission.release(job)
+
+        await self.admission.learn(job, peak[0], started)
+        return result
+
+    def running_pids(self):
+        return dict((job, process.pid)
+                    for job, process in self.processes.items())
+
+    async def sample_peak(self, job, peak):
+
+        from .autoscale import tree_rss
+
+        while True:
+            process = self.processes.get(job)
+            if process is not None:
+                peak[0] = max(peak[0], tree_rss(process.pid))
+            await asyncio.sleep(self.sample_interval)
+
+    async def execute(self, job):
+
+        started = time.time()
+        # Frame starts tell which frames a failed run got past.
+        starts = [] if hasattr(job, "renderer") else None
+        try:
+            command = job.command()
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                **_session_kwargs())
+        except (OSError, ValueError) as e:
+            # Render missing from PATH, or a job that cannot be expressed.
+            log.error("Could not start %r: %s" % (job, e))
+            return JobResult(job, FAILED)
+
+        if self.on_start:
+            self.on_start(job)
+
+        self.processes[job] = process
+
+        lane = None
+        if self.tracer:
+            lane = self.take_lane()
+            # Scene load and translation until the first frame starts.
+            self.tracer.begin(lane, "setup %s" % job.camera,
+                              args={"job": repr(job)})
+
+        try:
+            returncode = await asyncio.wait_for(
+                self.communicate(job, process, lane, starts), self.timeout)
+
+        except asyncio.TimeoutError:
+            log.error("%r timed out after %ss." % (job, self.timeout))
+            await terminate_tree(process, self.kill_timeout)
+            return JobResult(job, TIMEOUT, process.returncode,
+                             rendered=[frame for frame, _ in starts[:-1]]
+                             if starts else None)
+
+        except asyncio.CancelledError:
+            await asyncio.shield(terminate_tree(process, self.kill_timeout))
+            raise
+
+        finally:
+            self.processes.pop(job, None)
+            if lane is not None:
+                self.tracer.end(lane)
+                self.free_lanes.append(lane)
+
+        if self.history and starts:
+            await asyncio.get_event_loop().run_in_executor(
+                None, self.record_times, job, started, starts,
+                returncode == 0)
+
+        if returncode == 0:
+            return JobResult(job, FINISHED, returncode)
+
+        return JobResult(job, FAILED, returncode,
+                         rendered=[frame for frame, _ in starts[:-1]]
+                         if starts else None)
+
+    def record_times(self, job, started, starts, finished):
+
+        ends = [when for _, when in starts[1:]]
+        if finished:
+            # The last frame only counts if the render completed it.
+            ends.append(time.time())
+
+        frame_times = dict((frame, end - start) for (frame, start), end
+                           in zip(starts, ends))
+        self.history.record(job, setup=starts[0][1] - started,
+                            frame_times=frame_times)
+
+    def take_lane(self):
+
+        if self.free_lanes:
+            self.free_lanes.sort()
+            return self.free_lanes.pop(0)
+
+        self.lane_count += 1
+        return "worker %d" % self.lane_count
+
+    async def communicate(self, job, process, lane=None, starts=None):
+
+        backend = None
+        frame = None
+        if lane is not None or starts is not None:
+            backend = renderer_backend(job.renderer)
+
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            line = line.decode("utf-8", "replace").rstrip()
+            if self.on_output:
+                self.on_output(job, line)
+
+            if backend is not None:
+                current = backend.current_frame(job, line)
+                if current is not None and current != frame:
+                    frame = current
+                    if starts is not None:
+                        starts.append((frame, time.time()))
+                    if lane is not None:
+                        self.tracer.begin(lane, "%s frame %d" % (
+                            job.camera, frame))
+
+        return await process.wait()
+
+
+def run_jobs(jobs, **kwargs):
+    """
+    Runs jobs to completion from a synchronous caller such as the CLI.
+
+    SIGINT and SIGTERM cancel the batch and terminate every render.
+
+    :param jobs: Objects with a ``command()`` method.
+    :type jobs: (list)
+
+    :raises: None
+
+    :return: One result per job, in job order.
+    :rtype: list of JobResult
+    """
+    orchestrator = Orchestrator(**kwargs)
+    loop = asyncio.new_event_loop()
+
+    if sys.platform != "win32":
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, orchestrator.cancel)
+
+    try:
+        return loop.run_until_complete(orchestrator.run(jobs))
+    finally:
+        loop.close()
@@ -0,0 +1,122 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Frame ordering strategies for a batch of render jobs.
+
+``sequential`` renders each camera start to end, one after the other.
+``progressive`` renders the first, last and middle frame of every camera
+first, then fills each range by binary subdivision, so a sparse sample of
+the whole batch lands within minutes and problems anywhere in it surface
+early. Every pass of a camera is a single stepped job, keeping the number
+of Maya launches to a handful per camera.
+"""
+
+import logging
+
+log = logging.getLogger('CameraBatch')
+
+
+def runs(indices, stride):
+    """
+    Groups sorted indices into runs spaced ``stride`` apart.
+
+    :raises: None
+
+    :return: First and last index of each run.
+    :rtype: list of tuple
+    """
+    found = []
+
+    for index in indices:
+        if found and index - found[-1][1] == stride:
+            found[-1][1] = index
+        else:
+            found.append([index, index])
+
+    return [tuple(run) for run in found]
+
+
+def job_runs(job, indices, stride):
+
+    frames = job.frames
+
+    return [job.subrange(frames[first], frames[last], stride * job.step)
+            for first, last in runs(indices, stride)]
+
+
+def progressive_passes(job):
+    """
+    Splits a job into passes of increasing frame density.
+
+    :param job: Job to split.
+    :type job: (RenderJob)
+
+    :raises: None
+
+    :return: Lists of jobs, one list per pass, together covering every
+             frame of the job exactly once.
+    :rtype: list of list
+    """
+    count = len(job.frames)
+    if count < 3:
+        return [[job]]
+
+    middle = (count - 1) // 2
+    first_pass = [0, middle, count - 1]
+    passes = [job_runs(job, first_pass, middle)]
+
+    spacing = 1
+    while spacing * 2 < count:
+        spacing *= 2
+
+    while spacing:
+        # Odd multiples of the spacing are new at this density.
+        indices = [index for index in range(spacing, count, spacing * 2)
+                   if index not in first_pass]
+        if indices:
+            passes.append(job_runs(job, indices, spacing * 2))
+        spacing //= 2
+
+    return passes
+
+
+def sequential(jobs):
+    return list(jobs)
+
+
+def progressive(jobs):
+
+    passes = [progressive_passes(job) for job in jobs]
+    ordered = []
+
+    for level in range(max(len(job_passes) for job_passes in passes)):
+        for job_passes in passes:
+            if level < len(job_passes):
+                ordered.extend(job_passes[level])
+
+    return ordered
+
+
+ORDERINGS = {"sequential": sequential,
+             "progressive": progressive}
+
+
+def order_jobs(jobs, ordering="sequential"):
+    """
+    Orders jobs by a named strategy.
+
+    :param jobs: Jobs to order.
+    :type jobs: (list of RenderJob)
+    :param ordering: Key of ``ORDERINGS``.
+    :type ordering: (str)
+
+    :raises: ``KeyError`` if the strategy is unknown.
+
+    :return: Jobs in render order.
+    :rtype: list of RenderJob
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return jobs
+
+    return ORDERINGS[ordering](jobs)
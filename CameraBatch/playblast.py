@@ -0,0 +1,128 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Viewport capture for layout and animation review batches.
+
+In session each camera is captured offscreen through a temporary model
+panel, which runs at viewport speed without touching the artist's panels.
+Background and farm batches render with Maya Hardware 2.0 (``Render -r
+hw2``), the same Viewport 2.0 renderer, in headless sessions that run in
+parallel through the usual job queue.
+"""
+
+import os
+import logging
+
+log = logging.getLogger('CameraBatch')
+
+PLAYBLAST_RENDERER = "hw2"
+
+PLAYBLAST_OVERRIDES = {
+    "hardwareRenderingGlobals.ssaoEnable": False,
+    "hardwareRenderingGlobals.motionBlurEnable": False,
+    "hardwareRenderingGlobals.multiSampleEnable": True,
+}
+
+
+def playblast_job(job):
+    """
+    Copies a render job to capture with Hardware 2.0 instead.
+
+    :param job: Render job.
+    :type job: (RenderJob)
+
+    :raises: None
+
+    :return: Job rendering the viewport.
+    :rtype: RenderJob
+    """
+    overrides = dict(PLAYBLAST_OVERRIDES)
+    overrides.update(job.overrides)
+
+    return job.__class__(job.scene, job.camera, job.start_frame,
+                         job.end_frame, renderer=PLAYBLAST_RENDERER,
+                         project=job.project, step=job.step,
+                         overrides=overrides)
+
+
+def playblast_folder():
+    """
+    Where in-session captures are written, under the project's images.
+
+    :raises: None
+
+    :return: Folder path.
+    :rtype: str
+    """
+    from maya import cmds
+
+    root = cmds.workspace(query=True, rootDirectory=True)
+    images = cmds.workspace(fileRuleEntry="images") or "images"
+
+    return os.path.join(root, images, "playblasts")
+
+
+def playblast_camera(camera, folder=None, resolution=None, step=1,
+                     image_format="png"):
+    """
+    Captures a camera's frame range offscreen.
+
+    :param camera: Camera to capture.
+    :type camera: (Camera)
+    :param folder: Output folder, defaults to :func:`playblast_folder`.
+    :type folder: (str)
+    :param resolution: Width and height, defaults to the render resolution.
+    :type resolution: (tuple)
+    :param step: Capture every ``step``-th frame.
+    :type step: (int)
+    :param image_format: Image extension for the capture.
+    :type image_format: (str)
+
+    :raises: None
+
+    :return: Frames that produced no image.
+    :rtype: list
+    """
+    from maya import cmds
+
+    folder = folder or playblast_folder()
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    if resolution is None:
+        resolution = (cmds.getAttr("defaultResolution.width"),
+                      cmds.getAttr("defaultResolution.height"))
+
+    prefix = os.path.join(folder, camera.name, camera.name)
+
+    window = cmds.window(width=resolution[0], height=resolution[1])
+    try:
+        cmds.paneLayout()
+        panel = cmds.modelPanel(menuBarVisible=False)
+        cmds.modelEditor(panel, edit=True, camera=camera.name,
+                         displayAppearance="smoothShaded",
+                         displayTextures=True, grid=False,
+                         headsUpDisplay=False)
+        cmds.showWindow(window)
+
+        frames = list(range(int(camera.start_frame),
+                            int(camera.end_frame) + 1, max(int(step), 1)))
+
+        # One call for the whole range, per frame calls redraw the panel.
+        cmds.playblast(editorPanelName=panel, offScreen=True, frame=frames,
+                       format="image", compression=image_format,
+                       filename=prefix, framePadding=4,
+                       widthHeight=resolution, percent=100,
+                       showOrnaments=False, viewer=False,
+                       forceOverwrite=True)
+    finally:
+        cmds.deleteUI(window)
+
+    missing = [frame for frame in frames if not os.path.isfile(
+        "%s.%04d.%s" % (prefix, frame, image_format))]
+
+    if missing:
+        log.error("%s captured no image for frames %s." % (
+            camera.name, " ".join(str(frame) for frame in missing)))
+
+    return missing
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Render quality tiers.
+
+A tier scales the output resolution, lowers sampling for the renderer in
+use and renders every ``step``-th frame, so a draft pass over every camera
+finishes in minutes before the full quality batch is committed.
+"""
+
+import logging
+
+log = logging.getLogger('CameraBatch')
+
+# Maya's defaultResolution when a scene never changed it.
+DEFAULT_RESOLUTION = (640, 480)
+
+# Low sampling per ``Render -r`` renderer name.
+DRAFT_SAMPLING = {
+    "sw": {"defaultRenderQuality.edgeAntiAliasing": 3,
+           "defaultRenderQuality.shadingSamples": 1},
+    "arnold": {"defaultArnoldRenderOptions.AASamples": 1,
+               "defaultArnoldRenderOptions.GIDiffuseSamples": 0,
+               "defaultArnoldRenderOptions.GISpecularSamples": 0},
+    "redshift": {"redshiftOptions.unifiedMinSamples": 1,
+                 "redshiftOptions.unifiedMaxSamples": 4},
+}
+
+
+class QualityTier(object):
+    """
+    Resolution scale, sampling overrides and frame step of a pass.
+
+    ``sampling`` maps renderer names to attribute overrides, renderers it
+    does not name render with the scene's own settings.
+    """
+    def __init__(self, name, resolution_scale=1.0, step=1, sampling=None):
+
+        self.name = name
+        self.resolution_scale = resolution_scale
+        self.step = max(int(step), 1)
+        self.sampling = dict(sampling or {})
+
+    def __repr__(self):
+        return "<%s instance of %s>" % (self.__class__.__name__, self.name)
+
+    @property
+    def is_final(self):
+        return (self.resolution_scale == 1.0 and self.step == 1 and
+                not self.sampling)
+
+    def overrides(self, renderer, resolution=None):
+        """
+        The attribute values this tier sets.
+
+        :param renderer: ``Render -r`` renderer name.
+        :type renderer: (str)
+        :param resolution: Scene width and height.
+        :type resolution: (tuple)
+
+        :raises: None
+
+        :return: Values keyed by node attribute.
+        :rtype: dict
+        """
+        overrides = dict(self.sampling.get(renderer, {}))
+
+        if self.resolution_scale != 1.0:
+            width, height = resolution or DEFAULT_RESOLUTION
+            overrides["defaultResolution.width"] = max(
+                int(round(width * self.resolution_scale)), 1)
+            overrides["defaultResolution.height"] = max(
+                int(round(height * self.resolution_scale)), 1)
+
+        return overrides
+
+    def apply(self, job, resolution=None):
+        """
+        Copies a render job at this tier.
+
+        :param job: Full quality job.
+        :type job: (RenderJob)
+        :param resolution: Scene width and height.
+        :type resolution: (tuple)
+
+        :raises: None
+
+        :return: Job rendering every ``step``-th frame with the overrides.
+        :rtype: RenderJob
+        """
+        if self.is_final:
+            return job
+
+        overrides = dict(job.overrides)
+        overrides.update(self.overrides(job.renderer, resolution))
+
+        return job.__class__(job.scene, job.camera, job.start_frame,
+                             job.end_frame, renderer=job.renderer,
+                             project=job.project, step=job.step * self.step,
+                             overrides=overrides)
+
+
+TIERS = {
+    "draft": QualityTier("draft", resolution_scale=0.25, step=10,
+                         sampling=DRAFT_SAMPLING),
+    "preview": QualityTier("preview", resolution_scale=0.5, step=2,
+                           sampling=DRAFT_SAMPLING),
+    "final": QualityTier("final"),
+}
+
+TIER_ORDER = ("draft", "preview", "final")
+
+
+def quality_tier(name=None):
+    """
+    Looks up a tier by name.
+
+    :param name: Tier name, None for final quality.
+    :type name: (str)
+
+    :raises: ``KeyError`` if the tier is unknown.
+
+    :return: The tier.
+    :rtype: QualityTier
+    """
+    return TIERS[name or "final"]
@@ -0,0 +1,185 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+from maya import (cmds, OpenMaya)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+log = logging.getLogger('CameraBatch')
+
+
+class CameraSamples(object):
+    """
+    Per frame samples of a single camera.
+
+    ``frames`` is (N,), ``matrices`` is (N, 4, 4) world matrices,
+    ``focal_length`` is (N,) and ``filmback`` is (N, 2) in inches.
+    """
+    def __init__(self, name, frames):
+
+        self.name = name
+        self.frames = numpy.asarray(frames, dtype=numpy.float64)
+
+        count = len(self.frames)
+        self.matrices = numpy.zeros((count, 4, 4), dtype=numpy.float64)
+        self.focal_length = numpy.zeros(count, dtype=numpy.float64)
+        self.filmback = numpy.zeros((count, 2), dtype=numpy.float64)
+
+    def __repr__(self):
+        return "<%s instance of %s (%d frames)>" % (
+            self.__class__.__name__, self.name, len(self.frames))
+
+    @property
+    def translation(self):
+        return self.matrices[:, 3, :3]
+
+
+class CameraSampler(object):
+    """
+    Samples the animation of many cameras in a single timeline sweep.
+
+    Time is changed once per frame and every camera whose range covers
+    that frame is read through the API. Results are cached against the
+    scene state so repeated calls are free until the scene changes.
+    """
+    def __init__(self):
+        self._cache = {}
+
+    def _scene_key(self, cameras):
+
+        scene = cmds.file(query=True, sceneName=True)
+        if not scene or cmds.file(query=True, modified=True):
+            return None
+
+        try:
+            mtime = os.path.getmtime(scene)
+        except OSError:
+            return None
+
+        return (scene, mtime, tuple(
+            (camera.name, camera.start_frame, camera.end_frame)
+            for camera in cameras))
+
+    def invalidate(self):
+        """
+        Drops every cached sample set.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        self._cache = {}
+
+    def sample(self, cameras):
+        """
+        Samples each camera over its start_frame - end_frame range.
+
+        :param cameras: Cameras to sample.
+        :type cameras: (list of Camera)
+
+        :raises: ``RuntimeError`` if numpy is unavailable.
+
+        :return: Samples keyed by camera name.
+        :rtype: dict
+        """
+        if numpy is None:
+            log.error("numpy is required to sample cameras.")
+            raise RuntimeError("numpy is required to sample cameras.")
+
+        key = self._scene_key(cameras)
+        if key is not None and key in self._cache:
+            return self._cache[key]
+
+        samples = sweep(cameras)
+
+        if key is not None:
+            self._cache = {key: samples}
+
+        return samples
+
+
+def sweep(cameras):
+    """
+    Evaluates all cameras over their ranges with one time change per frame.
+
+    :param cameras: Cameras to sample.
+    :type cameras: (list of Camera)
+
+    :raises: None
+
+    :return: Samples keyed by camera name.
+    :rtype: dict
+    """
+    samples = {}
+    by_frame = {}
+
+    for camera in cameras:
+        frames = range(int(camera.start_frame), int(camera.end_frame) + 1)
+        samples[camera.name] = CameraSamples(camera.name, frames)
+
+        msel = OpenMaya.MSelectionList()
+        msel.add(camera.shape)
+        dag_path = OpenMaya.MDagPath()
+        msel.getDagPath(0, dag_path)
+        fn_camera = OpenMaya.MFnCamera(dag_path)
+
+        for index, frame in enumerate(frames):
+            by_frame.setdefault(frame, []).append(
+                (samples[camera.name], index, dag_path, fn_camera))
+
+    current_time = OpenMaya.MAnimControl.currentTime()
+    unit = OpenMaya.MTime.uiUnit()
+
+    cmds.refresh(suspend=True)
+    try:
+        for frame in sorted(by_frame):
+            OpenMaya.MAnimControl.setCurrentTime(OpenMaya.MTime(frame, unit))
+
+            for camera_samples, index, dag_path, fn_camera in by_frame[frame]:
+                matrix = dag_path.inclusiveMatrix()
+                camera_samples.matrices[index] = [
+                    [matrix(row, column) for column in range(4)]
+                    for row in range(4)]
+                camera_samples.focal_length[index] = fn_camera.focalLength()
+                camera_samples.filmback[index] = (
+                    fn_camera.horizontalFilmAperture(),
+                    fn_camera.verticalFilmAperture())
+    finally:
+        OpenMaya.MAnimControl.setCurrentTime(current_time)
+        cmds.refresh(suspend=False)
+
+    return samples
+
+
+def export_npz(samples, path):
+    """
+    Writes samples to a compressed ``.npz`` file.
+
+    Arrays are stored as ``<camera>/frames``, ``<camera>/matrices``,
+    ``<camera>/focal_length`` and ``<camera>/filmback``.
+
+    :param samples: Samples keyed by camera name.
+    :type samples: (dict)
+    :param path: Output file path.
+    :type path: (str)
+
+    :raises: None
+
+    :return: None
+    :rtype: NoneType
+    """
+    arrays = {}
+
+    for name, camera_samples in samples.items():
+        for attr in ("frames", "matrices", "focal_length", "filmback"):
+            arrays["{0}/{1}".format(name, attr)] = getattr(
+                camera_samples, attr)
+
+    numpy.savez_compressed(path, **arrays)
+    log.info("Exported %d camera samples to %s" % (len(samples), path))
@@ -0,0 +1,61 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+
+from .model import (SceneCamera, SceneInfo)
+
+log = logging.getLogger('CameraBatch')
+
+# The Maya Binary reader has not been verified against scenes saved by Maya.
+EXPERIMENTAL_MB = "CAMERABATCH_EXPERIMENTAL_MB"
+
+
+def read_scene(path, experimental_mb=None):
+    """
+    Reads cameras and render settings from a Maya scene without Maya.
+
+    ``.mb`` scenes are read from a ``.ma`` saved beside them at the same
+    time or later. Otherwise they are refused unless ``experimental_mb`` is
+    set, or the ``CAMERABATCH_EXPERIMENTAL_MB`` environment variable is,
+    since the binary reader may misread scenes saved by Maya.
+
+    :param path: ``.ma`` or ``.mb`` scene path.
+    :type path: (str)
+    :param experimental_mb: Read ``.mb`` scenes with the binary reader.
+    :type experimental_mb: (bool)
+
+    :raises: ``RuntimeError`` for unsupported file types.
+
+    :return: Scene contents.
+    :rtype: SceneInfo
+    """
+    if path.lower().endswith(".ma"):
+        from .mayaascii import read_ma
+        return read_ma(path)
+
+    if path.lower().endswith(".mb"):
+        ascii_path = os.path.splitext(path)[0] + ".ma"
+        try:
+            if os.path.getmtime(ascii_path) >= os.path.getmtime(path):
+                log.info("Reading %s in place of %s." % (ascii_path, path))
+                from .mayaascii import read_ma
+                return read_ma(ascii_path)
+        except OSError:
+            pass
+
+        if experimental_mb is None:
+            experimental_mb = bool(os.environ.get(EXPERIMENTAL_MB))
+        if not experimental_mb:
+            raise RuntimeError(
+                "%s is Maya Binary, which cannot be read reliably yet. Save "
+                "it as Maya ASCII, or set %s=1 to try the experimental "
+                "reader." % (path, EXPERIMENTAL_MB))
+
+        from .mayabinary import read_mb
+        log.warning("Reading %s with the experimental Maya Binary reader, "
+                    "check the cameras it finds." % path)
+        return read_mb(path)
+
+    raise RuntimeError("%s is not a Maya scene" % path)
@@ -0,0 +1,285 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Streaming Maya ASCII reader.
+
+Maya writes statements that end with a ``;`` at the end of a line, long
+values wrap onto further lines. Only statements that can matter for cameras
+or render settings are tokenised, everything else is skipped line by line,
+so a multi-GB scene is read in one pass with memory bound by the longest
+statement kept.
+"""
+
+import io
+import shlex
+import logging
+
+from .model import (SceneCamera, SceneInfo)
+
+log = logging.getLogger('CameraBatch')
+
+RENDER_GLOBALS = {"ren": "currentRenderer",
+                  "currentRenderer": "currentRenderer",
+                  "an": "animation",
+                  "animation": "animation",
+                  "fs": "startFrame",
+                  "startFrame": "startFrame",
+                  "ef": "endFrame",
+                  "endFrame": "endFrame",
+                  "bfs": "byFrameStep",
+                  "byFrameStep": "byFrameStep",
+                  "ifp": "imageFilePrefix",
+                  "imageFilePrefix": "imageFilePrefix",
+                  "outf": "imageFormat",
+                  "imageFormat": "imageFormat",
+                  "ep": "extensionPadding",
+                  "extensionPadding": "extensionPadding",
+                  "imfkey": "imfPluginKey",
+                  "imfPluginKey": "imfPluginKey"}
+
+RESOLUTION = {"w": "width",
+              "width": "width",
+              "h": "height",
+              "height": "height",
+              "dar": "deviceAspectRatio",
+              "deviceAspectRatio": "deviceAspectRatio"}
+
+TRANSFORM_ATTRS = {"t": "translation",
+                   "translate": "translation",
+                   "r": "rotation",
+                   "rotate": "rotation",
+                   "start_frame": "start_frame",
+                   "end_frame": "end_frame"}
+
+CAMERA_ATTRS = {"fl": "focal_length",
+                "focalLength": "focal_length",
+                "cap": "filmback",
+                "cameraAperture": "filmback",
+                "rnd": "renderable",
+                "renderable": "renderable"}
+
+COMMANDS = (b"createNode", b"select", b"fileInfo")
+NODE_COMMANDS = (b"setAttr", b"addAttr")
+
+# setAttr flags that take no argument.
+SWITCHES = ("-av", "-alteredValue")
+
+BOOLEANS = {"yes": True, "on": True, "true": True,
+            "no": False, "off": False, "false": False}
+
+
+def _value(token):
+
+    if token in BOOLEANS:
+        return BOOLEANS[token]
+
+    try:
+        return int(token)
+    except ValueError:
+        pass
+
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+
+def _flag(tokens, *names):
+
+    for index, token in enumerate(tokens[:-1]):
+        if token in names:
+            return tokens[index + 1]
+
+    return None
+
+
+def _short(name):
+    return name.rsplit("|", 1)[-1] if name else name
+
+
+class MayaAsciiParser(object):
+    """
+    Single pass ``.ma`` parser collecting cameras and render settings.
+    """
+    def __init__(self, path):
+
+        self.path = path
+        self.info = SceneInfo(path)
+        self.node = None
+        self.node_kind = None
+        self.last_transform = None
+        self.framed_transforms = {}
+
+    def parse(self):
+        """
+        Reads the file.
+
+        :raises: None
+
+        :return: Scene contents.
+        :rtype: SceneInfo
+        """
+        pending = None
+        skipping = False
+
+        with io.open(self.path, "rb") as stream:
+            for line in stream:
+
+                ends = line.rstrip().endswith(b";")
+
+                if skipping:
+                    skipping = not ends
+                    continue
+
+                if pending is not None:
+                    pending.append(line)
+                    if ends:
+                        self.handle(b"".join(pending))
+                        pending = None
+                    continue
+
+                stripped = line.strip()
+                if not stripped or stripped.startswith(b"//"):
+                    continue
+
+                command = stripped.split(None, 1)[0]
+
+                if command in COMMANDS or (
+                        command in NODE_COMMANDS and self.node_kind):
+                    if ends:
+                        self.handle(line)
+                    else:
+                        pending = [line]
+                else:
+                    skipping = not ends
+
+        return self.info
+
+    def handle(self, statement):
+
+        text = statement.decode("utf-8", "replace").strip().rstrip(";")
+
+        try:
+            tokens = shlex.split(text, posix=True)
+        except ValueError:
+            log.debug("Skipping unparsable statement in %s" % self.path)
+            return
+
+        getattr(self, "handle_" + tokens[0])(tokens)
+
+    def handle_createNode(self, tokens):
+
+        node_type = tokens[1]
+        name = _flag(tokens, "-n", "-name")
+        parent = _flag(tokens, "-p", "-parent")
+
+        self.node = None
+        self.node_kind = None
+
+        if node_type == "transform":
+            camera = SceneCamera(name)
+            camera.parent = parent
+            camera.startup = "-s" in tokens
+            self.node = camera
+            self.node_kind = "transform"
+            self.last_transform = camera
+
+        elif node_type == "camera":
+            short_parent = _short(parent)
+            camera = self.framed_transforms.pop(short_parent, None)
+
+            if camera is None:
+                last = self.last_transform
+                if last is not None and last.transform == short_parent:
+                    camera = last
+                else:
+                    camera = SceneCamera(short_parent)
+
+            camera.shape = name
+            self.info.cameras.append(camera)
+            self.node = camera
+            self.node_kind = "camera"
+
+    def handle_select(self, tokens):
+
+        name = tokens[-1]
+        self.node = None
+        self.node_kind = None
+
+        if name == ":defaultRenderGlobals":
+            self.node = self.info.render_globals
+            self.node_kind = "globals"
+        elif name == ":defaultResolution":
+            self.node = self.info.resolution
+            self.node_kind = "resolution"
+
+    def handle_fileInfo(self, tokens):
+        if len(tokens) >= 3:
+            self.info.file_info[tokens[-2]] = tokens[-1]
+
+    def handle_addAttr(self, tokens):
+
+        if self.node_kind != "transform":
+            return
+
+        long_name = _flag(tokens, "-ln", "-longName")
+        if long_name not in ("start_frame", "end_frame"):
+            return
+
+        default = _flag(tokens, "-dv", "-defaultValue")
+        setattr(self.node, long_name, int(float(default)) if default else 0)
+        self.framed_transforms[self.node.transform] = self.node
+
+    def handle_setAttr(self, tokens):
+
+        attr = None
+        values = []
+        index = 1
+
+        while index < len(tokens):
+            token = tokens[index]
+            if attr is None and token.startswith("."):
+                attr = token[1:]
+            elif attr is None and token in SWITCHES:
+                pass
+            elif token == "-type" or (attr is None and token.startswith("-")):
+                index += 1
+            elif attr is not None:
+                values.append(_value(token))
+            index += 1
+
+        if attr is None or not values:
+            return
+
+        value = values[0] if len(values) == 1 else values
+
+        if self.node_kind == "globals":
+            if attr in RENDER_GLOBALS:
+                self.node[RENDER_GLOBALS[attr]] = value
+
+        elif self.node_kind == "resolution":
+            if attr in RESOLUTION:
+                self.node[RESOLUTION[attr]] = value
+
+        elif self.node_kind == "transform":
+            if attr in TRANSFORM_ATTRS:
+                setattr(self.node, TRANSFORM_ATTRS[attr], value)
+
+        elif self.node_kind == "camera":
+            if attr in CAMERA_ATTRS:
+                setattr(self.node, CAMERA_ATTRS[attr], value)
+
+
+def read_ma(path):
+    """
+    Reads cameras and render settings from a ``.ma`` file.
+
+    :param path: Scene path.
+    :type path: (str)
+
+    :raises: None
+
+    :return: Scene contents.
+    :rtype: SceneInfo
+    """
+    return MayaAsciiParser(path).parse()
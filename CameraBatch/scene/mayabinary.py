@@ -0,0 +1,278 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped Maya Binary reader.
+
+A ``.mb`` file is an IFF tree. ``FOR4`` files use 32-bit sizes and 4 byte
+alignment, ``FOR8`` files use a 16 byte chunk header with a 64-bit size and
+8 byte alignment. Every created node is a group whose type is a four
+character node type (``XFRM`` for transforms, ``DCAM`` for cameras) holding
+a ``CREA`` chunk with the node name and parent, followed by one chunk per
+set attribute: the attribute name, a flag byte and the data.
+
+The file is mapped, not read. Groups that are not cameras or render settings
+are stepped over by offset so a multi-GB scene costs one pass over its chunk
+headers rather than its contents.
+
+Experimental: the chunk tags and layout have only been checked against
+synthetic files, :func:`CameraBatch.scene.read_scene` only uses this reader
+when asked to.
+"""
+
+import mmap
+import struct
+import logging
+
+from .model import (SceneCamera, SceneInfo, DEFAULT_START_FRAME,
+                    DEFAULT_END_FRAME)
+from .mayaascii import (CAMERA_ATTRS, RENDER_GLOBALS, RESOLUTION,
+                        TRANSFORM_ATTRS)
+
+log = logging.getLogger('CameraBatch')
+
+
+class MayaBinaryError(RuntimeError):
+    pass
+
+
+# Header layout per top level form: (size format, header size, alignment).
+LAYOUTS = {b"FOR4": (">I", 8, 4),
+           b"FOR8": (">Q", 16, 8)}
+
+GROUPS = (b"FOR4", b"LIS4", b"CAT4", b"PRO4", b"FORM", b"LIST", b"CAT ",
+          b"FOR8", b"LIS8", b"CAT8", b"PRO8")
+
+NODE_TYPES = {b"XFRM": "transform",
+              b"DCAM": "camera"}
+
+# Attribute chunk tag to struct format of its data, big-endian.
+DATA_FORMATS = {b"DBLE": ">d",
+                b"DBL2": ">2d",
+                b"DBL3": ">3d",
+                b"FLT2": ">2f",
+                b"FLT3": ">3f",
+                b"FLOT": ">f",
+                b"LONG": ">i",
+                b"INT ": ">i",
+                b"SHRT": ">h",
+                b"BYTE": ">b",
+                b"BOOL": ">?"}
+
+STRING_TAGS = (b"STR ",)
+
+CONTROL_BYTES = bytes(bytearray(range(32)))
+
+
+class MayaBinaryReader(object):
+    """
+    Walks the chunk tree of a ``.mb`` file through mmap.
+    """
+    def __init__(self, path):
+
+        self.path = path
+        self.info = SceneInfo(path)
+        self.last_transform = None
+        self.framed_transforms = {}
+
+    def parse(self):
+        """
+        Reads the file.
+
+        :raises: ``MayaBinaryError`` if the file is not Maya Binary.
+
+        :return: Scene contents.
+        :rtype: SceneInfo
+        """
+        with open(self.path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            root = data[:4]
+            if root not in LAYOUTS:
+                raise MayaBinaryError("%s is not a Maya Binary file" % (
+                    self.path))
+
+            self.size_format, self.header_size, self.align = LAYOUTS[root]
+            self.data = data
+
+            tag, start, end = self.chunk(0)
+            for child in self.children(start, end):
+                self.visit(*child)
+        finally:
+            self.data = None
+            data.close()
+
+        return self.info
+
+    def chunk(self, offset):
+        """
+        Reads a chunk header.
+
+        :return: Tag, data start and data end offsets.
+        :rtype: tuple
+        """
+        tag = self.data[offset:offset + 4]
+        size = struct.unpack_from(
+            self.size_format, self.data, offset + self.header_size -
+            struct.calcsize(self.size_format))[0]
+        start = offset + self.header_size
+
+        return tag, start, start + size
+
+    def children(self, start, end):
+
+        # Groups start with their form type, padded to the alignment.
+        offset = start + self.align
+
+        while offset + self.header_size <= end:
+            tag, data_start, data_end = self.chunk(offset)
+            yield tag, data_start, data_end
+            offset = data_end + (-data_end % self.align)
+
+    def visit(self, tag, start, end):
+
+        if tag not in GROUPS:
+            return
+
+        form_type = self.data[start:start + 4]
+
+        if form_type in NODE_TYPES:
+            self.read_node(NODE_TYPES[form_type], start, end)
+            return
+
+        children = self.children(start, end)
+        first = next(children, None)
+        if first is None:
+            return
+
+        # Render settings are shared nodes, selected rather than created.
+        if first[0] in (b"SLCT", b"CREA"):
+            names = self.strings(first[1], first[2])
+            name = names[0].lstrip(":") if names else None
+            if name == "defaultRenderGlobals":
+                self.read_attrs(self.info.render_globals, RENDER_GLOBALS,
+                                start, end)
+            elif name == "defaultResolution":
+                self.read_attrs(self.info.resolution, RESOLUTION, start, end)
+            return
+
+        self.visit(*first)
+        for child in children:
+            self.visit(*child)
+
+    def strings(self, start, end):
+
+        # CREA data starts with a flag byte before the names.
+        raw = self.data[start:end].lstrip(CONTROL_BYTES).split(b"\x00")
+        return [value.decode("utf-8", "replace") for value in raw if value]
+
+    def read_node(self, node_type, start, end):
+
+        node = None
+
+        for tag, data_start, data_end in self.children(start, end):
+
+            if tag == b"CREA":
+                values = self.strings(data_start, data_end)
+                name = values[0] if values else None
+                parent = values[1] if len(values) > 1 else None
+                node = self.create(node_type, name, parent)
+                continue
+
+            if node is None:
+                continue
+
+            if node_type == "transform":
+                self.read_attr(node, TRANSFORM_ATTRS, tag,
+                               data_start, data_end, attribute=True)
+            else:
+                self.read_attr(node, CAMERA_ATTRS, tag,
+                               data_start, data_end, attribute=True)
+
+    def create(self, node_type, name, parent):
+
+        if node_type == "transform":
+            camera = SceneCamera(name)
+            camera.parent = parent
+            self.last_transform = camera
+            return camera
+
+        short_parent = parent.rsplit("|", 1)[-1] if parent else parent
+        camera = self.framed_transforms.pop(short_parent, None)
+
+        if camera is None:
+            last = self.last_transform
+            if last is not None and last.transform == short_parent:
+                camera = last
+            else:
+                camera = SceneCamera(short_parent)
+
+        camera.shape = name
+        self.info.cameras.append(camera)
+
+        return camera
+
+    def read_attrs(self, target, names, start, end):
+
+        for tag, data_start, data_end in self.children(start, end):
+            self.read_attr(target, names, tag, data_start, data_end)
+
+    def read_attr(self, target, names, tag, start, end, attribute=False):
+
+        name_end = self.data.find(b"\x00", start, end)
+        if name_end < 0:
+            return
+
+        name = self.data[start:name_end].decode("utf-8", "replace")
+        name = name.lstrip(".")
+        if name not in names:
+            return
+
+        key = names[name]
+        # Skip the attribute name terminator and its flag byte.
+        value_start = name_end + 2
+        value = None
+
+        if tag in DATA_FORMATS:
+            fmt = DATA_FORMATS[tag]
+            if value_start + struct.calcsize(fmt) <= end:
+                value = struct.unpack_from(fmt, self.data, value_start)
+                value = value[0] if len(value) == 1 else list(value)
+
+        elif tag in STRING_TAGS:
+            raw = self.data[value_start:end].split(b"\x00", 1)[0]
+            value = raw.decode("utf-8", "replace")
+
+        if key in ("start_frame", "end_frame") and attribute:
+            # Frame attrs may be defined with no value set yet.
+            self.framed_transforms[target.transform] = target
+            if value is None:
+                value = getattr(target, key)
+            if value is None:
+                value = (DEFAULT_START_FRAME if key == "start_frame"
+                         else DEFAULT_END_FRAME)
+            if isinstance(value, float):
+                value = int(round(value))
+
+        if value is None:
+            return
+
+        if isinstance(target, dict):
+            target[key] = value
+        else:
+            setattr(target, key, value)
+
+
+def read_mb(path):
+    """
+    Reads cameras and render settings from a ``.mb`` file.
+
+    :param path: Scene path.
+    :type path: (str)
+
+    :raises: ``MayaBinaryError`` if the file is not Maya Binary.
+
+    :return: Scene contents.
+    :rtype: SceneInfo
+    """
+    return MayaBinaryReader(path).parse()
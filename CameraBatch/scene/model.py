@@ -0,0 +1,112 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import logging
+
+from ..manifest import (FrameTask, make_header)
+
+log = logging.getLogger('CameraBatch')
+
+# Frame range used by Camera.add_start_attr/add_end_attr.
+DEFAULT_START_FRAME = 1
+DEFAULT_END_FRAME = 10
+
+RENDERERS = {"mayaSoftware": "sw",
+             "mayaHardware2": "hw2",
+             "arnold": "arnold",
+             "redshift": "redshift",
+             "vray": "vray"}
+
+
+class SceneCamera(object):
+    """
+    A camera read from a scene file without Maya.
+    """
+    def __init__(self, transform, shape=None):
+
+        self.transform = transform
+        self.shape = shape
+        self.parent = None
+        self.start_frame = None
+        self.end_frame = None
+        self.translation = None
+        self.rotation = None
+        self.focal_length = 35.0
+        self.filmback = [1.41732, 0.94488]
+        self.renderable = None
+        self.startup = False
+
+    def __repr__(self):
+        return "<%s instance of %s>" % (self.__class__.__name__, self.shape)
+
+    @property
+    def name(self):
+        return self.transform
+
+    @property
+    def has_frame_range(self):
+        return self.start_frame is not None or self.end_frame is not None
+
+    @property
+    def frame_range(self):
+        start = self.start_frame
+        end = self.end_frame
+        return (DEFAULT_START_FRAME if start is None else start,
+                DEFAULT_END_FRAME if end is None else end)
+
+
+class SceneInfo(object):
+    """
+    Cameras and render settings of a scene file.
+    """
+    def __init__(self, path):
+
+        self.path = path
+        self.cameras = []
+        self.render_globals = {}
+        self.resolution = {}
+        self.file_info = {}
+
+    def __repr__(self):
+        return "<%s instance of %s (%d cameras)>" % (
+            self.__class__.__name__, self.path, len(self.cameras))
+
+    @property
+    def renderer(self):
+        """
+        The ``Render -r`` value for the scene's current renderer.
+        """
+        current = self.render_globals.get("currentRenderer")
+        return RENDERERS.get(current, "file")
+
+    def batch_cameras(self):
+        """
+        Cameras set up for CameraBatch, those with start/end frame attrs.
+
+        :raises: None
+
+        :return: Cameras in scene order.
+        :rtype: list of SceneCamera
+        """
+        return [camera for camera in self.cameras if camera.has_frame_range]
+
+    def manifest(self, project=None, cameras=None):
+        """
+        Builds a manifest header and tasks for the batch cameras.
+
+        :param project: Maya project directory.
+        :type project: (str)
+        :param cameras: Cameras to use instead of :meth:`batch_cameras`.
+        :type cameras: (list of SceneCamera)
+
+        :raises: None
+
+        :return: Header dict and list of tasks.
+        :rtype: tuple
+        """
+        header = make_header(self.path, renderer=self.renderer,
+                             project=project)
+        tasks = [FrameTask(camera.name, [camera.frame_range + (1,)])
+                 for camera in (cameras or self.batch_cameras())]
+
+        return header, tasks
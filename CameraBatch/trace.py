@@ -0,0 +1,155 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Batch timelines in Chrome trace-event format.
+
+A :class:`Tracer` collects spans on named lanes and saves them as JSON that
+opens in Perfetto or chrome://tracing. Every render worker gets its own
+lane, so queueing, scheduling gaps and stragglers line up against each
+other.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+
+from contextlib import contextmanager
+
+log = logging.getLogger('CameraBatch')
+
+
+def default_trace_path():
+    return os.path.join(tempfile.gettempdir(), "camerabatch_trace.json")
+
+
+class Tracer(object):
+    """
+    Thread-safe collector of trace events.
+    """
+    def __init__(self, process_name="CameraBatch"):
+
+        self.lock = threading.Lock()
+        self.origin = time.time()
+        self.events = []
+        self.lanes = {}
+        self.open_spans = {}
+
+        self.events.append({"ph": "M", "pid": 1, "tid": 0,
+                            "name": "process_name",
+                            "args": {"name": process_name}})
+
+    def __repr__(self):
+        return "<%s instance of %d events>" % (
+            self.__class__.__name__, len(self.events))
+
+    def timestamp(self, when=None):
+        return int(((time.time() if when is None else when) -
+                    self.origin) * 1e6)
+
+    def lane(self, name):
+        """
+        The thread id of a named lane, created on first use.
+        """
+        with self.lock:
+            if name not in self.lanes:
+                tid = len(self.lanes) + 1
+                self.lanes[name] = tid
+                self.events.append({"ph": "M", "pid": 1, "tid": tid,
+                                    "name": "thread_name",
+                                    "args": {"name": name}})
+                self.events.append({"ph": "M", "pid": 1, "tid": tid,
+                                    "name": "thread_sort_index",
+                                    "args": {"sort_index": tid}})
+
+            return self.lanes[name]
+
+    def add(self, lane, phase, name, when=None, **kwargs):
+
+        event = {"ph": phase, "pid": 1, "tid": self.lane(lane),
+                 "name": name, "ts": self.timestamp(when)}
+        event.update(kwargs)
+
+        with self.lock:
+            self.events.append(event)
+
+    def begin(self, lane, name, args=None):
+        """
+        Opens a span on a lane, closing the lane's previous one.
+
+        :param lane: Lane name, such as ``worker 1``.
+        :type lane: (str)
+        :param name: Span name.
+        :type name: (str)
+        :param args: Details shown when the span is selected.
+        :type args: (dict)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.end(lane)
+        self.add(lane, "B", name, args=args or {})
+
+        with self.lock:
+            self.open_spans[lane] = name
+
+    def end(self, lane):
+        """
+        Closes the open span of a lane, if any.
+        """
+        with self.lock:
+            name = self.open_spans.pop(lane, None)
+
+        if name is not None:
+            self.add(lane, "E", name)
+
+    def complete(self, lane, name, start, end=None, args=None):
+        """
+        Adds a finished span from wall clock times.
+        """
+        end = time.time() if end is None else end
+        self.add(lane, "X", name, when=start,
+                 dur=int(max(end - start, 0) * 1e6), args=args or {})
+
+    def instant(self, lane, name, args=None):
+        self.add(lane, "i", name, s="t", args=args or {})
+
+    @contextmanager
+    def span(self, lane, name, **args):
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.complete(lane, name, start, args=args)
+
+    def save(self, path=None):
+        """
+        Writes the trace, closing any span still open.
+
+        :param path: JSON file, defaults to :func:`default_trace_path`.
+        :type path: (str)
+
+        :raises: ``IOError`` if the file cannot be written.
+
+        :return: Path written.
+        :rtype: str
+        """
+        path = path or default_trace_path()
+
+        for lane in list(self.open_spans):
+            self.end(lane)
+
+        with self.lock:
+            events = list(self.events)
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+        log.info("Wrote batch timeline to %s" % path)
+
+        return path
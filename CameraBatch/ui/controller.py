@@ -0,0 +1,455 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import logging
+
+try:
+    from ..packages.Qt import (QtCore, QtWidgets)
+except ImportError:
+    raise
+
+from ..backends import renderer_backend
+from ..trace import Tracer
+from ..history import (Estimator, BatchEta)
+
+try:
+    from .loop import AsyncioBridge
+    from ..orchestrator import (Orchestrator, RetryPolicy)
+    from ..admission import AdmissionController
+except (ImportError, SyntaxError):
+    # Python 2 has no asyncio, the QProcess worker is used instead.
+    Orchestrator = None
+
+log = logging.getLogger("CameraBatch")
+
+
+class RenderWorker(QtCore.QObject):
+    """
+    Runs render jobs as QProcesses inside the controller's thread.
+    """
+    job_started = QtCore.Signal(object)
+    job_finished = QtCore.Signal(object, int)
+    frame_started = QtCore.Signal(object, int)
+    all_finished = QtCore.Signal()
+
+    def __init__(self, max_jobs=1):
+        super(RenderWorker, self).__init__()
+
+        self.max_jobs = max_jobs
+        self.pending = []
+        self.processes = {}
+
+    def start_jobs(self, jobs):
+        self.pending.extend(jobs)
+        self.launch()
+
+    def stop(self):
+        self.pending = []
+        for process in list(self.processes):
+            process.kill()
+
+    def launch(self):
+
+        while self.pending and len(self.processes) < self.max_jobs:
+
+            job = self.pending.pop(0)
+            command = job.command()
+
+            process = QtCore.QProcess(self)
+            process.setProcessChannelMode(QtCore.QProcess.MergedChannels)
+            process.readyReadStandardOutput.connect(
+                lambda p=process: self.read_output(p))
+            process.finished.connect(
+                lambda code, status, p=process: self.process_finished(
+                    p, code, status))
+
+            self.processes[process] = job
+            process.start(command[0], command[1:])
+            self.job_started.emit(job)
+
+        if not self.pending and not self.processes:
+            self.all_finished.emit()
+
+    def read_output(self, process):
+
+        job = self.processes.get(process)
+
+        while process.canReadLine():
+            line = bytes(process.readLine()).decode("utf-8", "replace")
+            if not job:
+                continue
+            frame = renderer_backend(job.renderer).current_frame(job, line)
+            if frame is not None:
+                self.frame_started.emit(job, frame)
+
+    def process_finished(self, process, code, status):
+
+        job = self.processes.pop(process, None)
+
+        if status != QtCore.QProcess.NormalExit and code == 0:
+            code = -1
+
+        if job:
+            self.job_finished.emit(job, code)
+
+        process.deleteLater()
+        self.launch()
+
+
+class AsyncRenderWorker(QtCore.QObject):
+    """
+    Runs render jobs through the asyncio orchestrator on a bridged loop.
+
+    Orchestrator callbacks fire on the loop thread, the signals they emit
+    are queued to the controller in the main thread.
+    """
+    job_started = QtCore.Signal(object)
+    job_finished = QtCore.Signal(object, int)
+    frame_started = QtCore.Signal(object, int)
+    frames_failed = QtCore.Signal(object, object)
+    all_finished = QtCore.Signal()
+
+    def __init__(self, max_jobs=1, timeout=None, autoscaler=None,
+                 retry=None, history=None, admission=None, parent=None):
+        super(AsyncRenderWorker, self).__init__(parent)
+
+        self.orchestrator = Orchestrator(
+            max_jobs=max_jobs,
+            timeout=timeout,
+            on_start=self.job_started.emit,
+            on_output=self.read_output,
+            on_result=self.job_result,
+            autoscaler=autoscaler,
+            retry=retry,
+            history=history,
+            admission=admission)
+
+        self.bridge = AsyncioBridge(self)
+        self.bridge.start()
+
+    def start_jobs(self, jobs):
+        future = self.bridge.submit(self.orchestrator.run(jobs))
+        future.add_done_callback(lambda f: self.all_finished.emit())
+
+    def stop(self):
+        self.bridge.call(self.orchestrator.cancel)
+
+    def shutdown(self):
+        self.bridge.shutdown()
+
+    def read_output(self, job, line):
+
+        frame = renderer_backend(job.renderer).current_frame(job, line)
+        if frame is not None:
+            self.frame_started.emit(job, frame)
+
+    def job_result(self, result):
+
+        code = result.returncode
+        if not result.ok and not code:
+            code = -1
+
+        if result.poison:
+            self.frames_failed.emit(result.job, result.poison)
+
+        self.job_finished.emit(result.job, code)
+
+
+class BatchController(QtCore.QObject):
+    """
+    Drives render jobs from a background thread.
+
+    The worker and its processes live in their own thread, results reach the
+    controller through queued signals and ``progress`` is emitted at most
+    once every ``interval`` milliseconds so the UI never floods. Under
+    Python 3 jobs run through the asyncio orchestrator, which adds per job
+    timeouts and cancels whole process trees, and an ``autoscaler`` can
+    adapt concurrency to machine load. While Maya is the active application
+    the autoscaler is put in artist mode so renders yield cores. Failed jobs
+    are retried ``retries`` times and then bisected, frames that never
+    render are collected in the ``poison`` state and logged when the batch
+    ends. With ``trace`` every batch run by the orchestrator is recorded and
+    saved as a timeline when it ends. Given a render ``history`` the batch's
+    render times are recorded and ``progress`` carries a live ``eta``. With
+    ``admit`` each job also waits until memory and the disk of its images
+    folder allow it, so renders do not push Maya into swap.
+
+    Per camera progress is kept in ``cameras`` as frames done, frames total,
+    current frame, status and seconds left, however many chunks and workers
+    the camera is split over. Frames are counted once per camera and frame
+    number, so retries and bisected pieces that render a frame again do not
+    count it twice. Frame events only update counters, the snapshot is
+    built when ``progress`` is emitted.
+    """
+    progress = QtCore.Signal(object)
+    job_done = QtCore.Signal(object, int)
+    finished = QtCore.Signal()
+
+    _start_requested = QtCore.Signal(object)
+    _stop_requested = QtCore.Signal()
+
+    def __init__(self, parent=None, max_jobs=1, timeout=None, interval=250,
+                 autoscaler=None, retries=0, trace=False, history=None,
+                 admit=False):
+        super(BatchController, self).__init__(parent)
+
+        self.state = {}
+        self.running = False
+        self.dirty = False
+        self.thread = None
+        self.autoscaler = None
+        self.trace = trace
+        self.tracer = None
+        self.max_jobs = max_jobs
+        self.history = history
+        self.eta = None
+        self.cameras = {}
+        self.job_frames = {}
+        self.frames_done = set()
+        self.admission = None
+
+        if Orchestrator is not None:
+            self.autoscaler = autoscaler
+            if admit:
+                self.admission = AdmissionController()
+            self.worker = AsyncRenderWorker(
+                max_jobs=max_jobs, timeout=timeout, autoscaler=autoscaler,
+                retry=RetryPolicy(attempts=retries + 1) if retries else None,
+                history=history, admission=self.admission, parent=self)
+            self.worker.frames_failed.connect(self.frames_failed)
+        else:
+            self.thread = QtCore.QThread(self)
+            self.worker = RenderWorker(max_jobs=max_jobs)
+            self.worker.moveToThread(self.thread)
+
+        self._start_requested.connect(self.worker.start_jobs)
+        self._stop_requested.connect(self.worker.stop)
+        self.worker.job_started.connect(self.job_started)
+        self.worker.job_finished.connect(self.job_finished)
+        self.worker.frame_started.connect(self.frame_started)
+        self.worker.all_finished.connect(self.all_finished)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush)
+
+        self.artist_timer = QtCore.QTimer(self)
+        self.artist_timer.setInterval(1000)
+        self.artist_timer.timeout.connect(self.check_artist)
+
+        if self.thread:
+            self.thread.start()
+
+    def start(self, jobs):
+        """
+        Queues jobs on the background worker.
+
+        :param jobs: Jobs to render.
+        :type jobs: (list of RenderJob)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        jobs = list(jobs)
+
+        self.running = True
+        self.state = {
+            "jobs_total": len(jobs),
+            "jobs_done": 0,
+            "jobs_failed": 0,
+            "frames_total": sum(len(job.frames) for job in jobs),
+            "frames_done": 0,
+            "current": {},
+            "poison": {},
+            "eta": None,
+            "cameras": {},
+        }
+
+        self.job_frames = {}
+        self.frames_done = set()
+        self.cameras = {}
+        for job in jobs:
+            camera = self.cameras.setdefault(job.camera, {
+                "jobs": [], "total": 0, "done": 0, "frame": None,
+                "active": set(), "finished": 0, "failed": 0})
+            camera["jobs"].append(job)
+            camera["total"] += len(job.frames)
+
+        self.eta = None
+        if self.history:
+            workers = (self.autoscaler.jobs if self.autoscaler
+                       else self.max_jobs)
+            self.eta = BatchEta(Estimator(self.history), jobs, workers)
+            self.state["eta"] = self.eta.seconds()
+        self.dirty = True
+        self.timer.start()
+        if self.autoscaler:
+            self.artist_timer.start()
+
+        if self.admission and jobs:
+            # Set before the run is queued, the loop thread only reads it.
+            self.admission.output_dir = renderer_backend(
+                jobs[0].renderer).image_folder(jobs[0])
+
+        if self.trace and Orchestrator is not None:
+            # Set before the run is queued, the loop thread only reads it.
+            self.tracer = Tracer()
+            self.worker.orchestrator.tracer = self.tracer
+
+        self._start_requested.emit(jobs)
+
+    def stop(self):
+        """
+        Kills every running render and drops the queue.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        self._stop_requested.emit()
+
+    def shutdown(self):
+        self.stop()
+
+        if self.thread:
+            self.thread.quit()
+            self.thread.wait()
+        else:
+            self.worker.shutdown()
+
+    def job_started(self, job):
+        self.state["current"][job.camera] = job.start_frame
+        self.job_frames[job] = job.start_frame
+        camera = self.cameras.get(job.camera)
+        if camera:
+            # Retries and bisected pieces start under their queued job.
+            if job in camera["jobs"]:
+                camera["active"].add(job)
+            camera["frame"] = job.start_frame
+        if self.eta:
+            self.eta.job_started(job)
+        self.dirty = True
+
+    def frame_started(self, job, frame):
+
+        camera = self.cameras.get(job.camera)
+
+        previous = self.job_frames.get(job)
+        if previous is not None and frame != previous:
+            self.frame_done(job, previous)
+
+        self.job_frames[job] = frame
+        self.state["current"][job.camera] = frame
+        if camera:
+            camera["frame"] = frame
+        if self.eta:
+            self.eta.frame_started(job, frame)
+        self.dirty = True
+
+    def frame_done(self, job, frame):
+
+        key = (job.camera, frame)
+        if key in self.frames_done:
+            return
+
+        self.frames_done.add(key)
+        self.state["frames_done"] += 1
+        camera = self.cameras.get(job.camera)
+        if camera:
+            camera["done"] += 1
+
+    def frames_failed(self, job, frames):
+        self.state["poison"].setdefault(job.camera, []).extend(frames)
+
+    def job_finished(self, job, code):
+
+        self.state["current"].pop(job.camera, None)
+        self.job_frames.pop(job, None)
+        poison = set(frame for frame
+                     in self.state["poison"].get(job.camera, [])
+                     if frame in job.frames)
+        camera = self.cameras.get(job.camera)
+
+        self.state["jobs_done"] += 1
+        if code == 0 or poison:
+            # Bisected jobs rendered everything but their poison frames.
+            for frame in job.frames:
+                if frame not in poison:
+                    self.frame_done(job, frame)
+        if code != 0:
+            self.state["jobs_failed"] += 1
+            log.error("Render of %s exited with %d." % (job.camera, code))
+
+        if camera:
+            camera["active"].discard(job)
+            camera["finished"] += 1
+            camera["failed"] += code != 0
+
+        if self.eta:
+            self.eta.job_finished(job, code == 0)
+
+        self.dirty = True
+        self.job_done.emit(job, code)
+
+    def check_artist(self):
+        # Read by the autoscaler on the loop thread, a plain bool is safe.
+        active = QtWidgets.QApplication.activeWindow() is not None
+        self.autoscaler.artist_active = active
+
+    def all_finished(self):
+
+        for camera, frames in sorted(self.state.get("poison", {}).items()):
+            log.error("%s frames %s failed every retry." % (
+                camera, " ".join(str(frame) for frame in sorted(frames))))
+
+        if self.tracer:
+            try:
+                self.tracer.save()
+            except (IOError, OSError) as e:
+                log.warning("Could not write the batch timeline: %s" % e)
+            self.tracer = None
+
+        self.running = False
+        self.flush()
+        self.timer.stop()
+        self.artist_timer.stop()
+        self.finished.emit()
+
+    def flush(self):
+
+        if not self.dirty:
+            return
+
+        self.dirty = False
+        snapshot = dict(self.state)
+        snapshot["current"] = dict(self.state.get("current", {}))
+        snapshot["poison"] = dict(self.state.get("poison", {}))
+        if self.eta and self.running:
+            snapshot["eta"] = self.eta.seconds()
+        snapshot["cameras"] = dict(
+            (name, self.camera_progress(camera))
+            for name, camera in self.cameras.items())
+        self.progress.emit(snapshot)
+
+    def camera_progress(self, camera):
+
+        if camera["active"]:
+            status = "rendering"
+        elif camera["failed"]:
+            status = "failed"
+        elif camera["finished"] == len(camera["jobs"]):
+            status = "done"
+        elif self.running:
+            status = "queued"
+        else:
+            status = "cancelled"
+
+        eta = None
+        if self.eta and status in ("queued", "rendering"):
+            eta = sum(self.eta.job_remaining(job) for job in camera["jobs"])
+
+        return (min(camera["done"], camera["total"]), camera["total"],
+                camera["frame"], status, eta)
@@ -0,0 +1,49 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+
+try:
+    from ..packages.Qt import QtCore
+except ImportError:
+    raise
+
+log = logging.getLogger("CameraBatch")
+
+
+class AsyncioBridge(QtCore.QThread):
+    """
+    Hosts an asyncio event loop on its own thread.
+
+    Coroutines and callables are handed over thread-safely, so the Qt main
+    thread never blocks on the loop and the loop never touches widgets.
+    """
+    def __init__(self, parent=None):
+        super(AsyncioBridge, self).__init__(parent)
+        self.loop = asyncio.new_event_loop()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        """
+        Schedules a coroutine on the loop.
+
+        :param coroutine: Coroutine to run.
+        :type coroutine: (coroutine)
+
+        :raises: None
+
+        :return: Future resolved with the coroutine's result.
+        :rtype: concurrent.futures.Future
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def call(self, func, *args):
+        self.loop.call_soon_threadsafe(func, *args)
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.wait()
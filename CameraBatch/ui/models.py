@@ -3,12 +3,77 @@ from maya import (cmds, OpenMaya)
 
 log = logging.getLogger("CameraBatch")
 
+FRAME_ATTRS = (("start_frame", 1), ("end_frame", 10))
+
+
+def _depend_node(name):
+
+    msel = OpenMaya.MSelectionList()
+    msel.add(name, 0)
+
+    mobject = OpenMaya.MObject()
+    msel.getDependNode(0, mobject)
+
+    return mobject
+
+
+def add_frame_attrs(transforms):
+    """
+    Adds and reads the frame range attributes of many cameras at once.
+
+    Existing attributes are read through the API without a command per
+    camera. Missing ones are added keyable, which shows them in the channel
+    box, with one ``addAttr`` per attribute for every camera lacking it,
+    inside a single undo chunk, so the additions undo in one step.
+
+    :param transforms: Camera transform names.
+    :type transforms: (list)
+
+    :raises: None
+
+    :return: Start and end frame keyed by transform.
+    :rtype: dict
+    """
+    frames = {}
+    missing = dict((name, []) for name, _ in FRAME_ATTRS)
+
+    for transform in transforms:
+
+        node = OpenMaya.MFnDependencyNode(_depend_node(transform))
+        values = []
+
+        for name, default in FRAME_ATTRS:
+
+            if node.hasAttribute(name):
+                values.append(node.findPlug(name, False).asInt())
+                continue
+
+            missing[name].append(transform)
+            values.append(default)
+
+        frames[transform] = tuple(values)
+
+    if not any(missing.values()):
+        return frames
+
+    cmds.undoInfo(openChunk=True, chunkName="CameraBatch")
+    try:
+        for name, default in FRAME_ATTRS:
+            if not missing[name]:
+                continue
+            cmds.addAttr(missing[name], longName=name, attributeType="long",
+                         defaultValue=default, keyable=True)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    return frames
+
 
 class Camera(object):
     """
     Maya Camera object.
     """
-    def __init__(self, camera="perspShape"):
+    def __init__(self, camera="perspShape", frames=None):
 
         if cmds.nodeType(camera) == "transform":
             self.transform = camera
@@ -22,21 +87,51 @@ class Camera(object):
             log.error("%s is not a camera" % camera)
             raise RuntimeError("%s is not a camera" % camera)
 
-        self.add_start_attr()
-        self.add_end_attr()
+        # Quality tier name, None uses the batch's tier.
+        self.tier = None
+
+        if frames is None:
+            self.add_start_attr()
+            self.add_end_attr()
+        else:
+            self.start_frame, self.end_frame = frames
 
     def __repr__(self):
         return "<%s instance of %s>" % (self.__class__.__name__, self.shape)
 
     def __mobject__(self):
-
-        msel = OpenMaya.MSelectionList()
-        msel.add(self.transform, 0)
-
-        mobject = OpenMaya.MObject()
-        msel.getDependNode(0, mobject)
-
-        return mobject
+        return _depend_node(self.transform)
+
+    @classmethod
+    def from_nodes(cls, nodes):
+        """
+        Creates cameras for many nodes, adding frame attributes in bulk.
+
+        :param nodes: Camera transform or shape names.
+        :type nodes: (list)
+
+        :raises: ``RuntimeError`` if a node is not a camera.
+
+        :return: Cameras in node order.
+        :rtype: list of Camera
+        """
+        transforms = []
+        seen = set()
+        for node in nodes:
+            if cmds.nodeType(node) == "camera":
+                node = cmds.listRelatives(node, parent=True)[0]
+            elif not cmds.listRelatives(node, children=True, type="camera"):
+                log.error("%s is not a camera" % node)
+                raise RuntimeError("%s is not a camera" % node)
+            # A shape and its transform may both be selected.
+            if node not in seen:
+                seen.add(node)
+                transforms.append(node)
+
+        frames = add_frame_attrs(transforms)
+
+        return [cls(transform, frames=frames[transform])
+                for transform in transforms]
 
     def getShape(self, transform):
 
@@ -85,11 +180,8 @@ class Camera(object):
                 self.transform,
                 longName="start_frame",
                 attributeType="long",
-                defaultValue=1)
-            cmds.setAttr(
-                "{0}.start_frame".format(self.transform),
-                edit=True,
-                channelBox=True)
+                defaultValue=1,
+                keyable=True)
             self.start_frame = 1
         else:
             self.start_frame = cmds.getAttr(
@@ -102,11 +194,8 @@ class Camera(object):
                 self.transform,
                 longName="end_frame",
                 attributeType="long",
-                defaultValue=10)
-            cmds.setAttr(
-                "{0}.end_frame".format(self.transform),
-                edit=True,
-                channelBox=True)
+                defaultValue=10,
+                keyable=True)
             self.end_frame = 10
         else:
             self.end_frame = cmds.getAttr(
@@ -5,6 +5,7 @@ import os
 import logging
 from .widgets import (CameraList, ObjectItem, LineEditWidget)
 from .models import Camera
+from .controller import BatchController
 
 from maya import (OpenMaya, cmds, mel)
 
@@ -12,33 +13,85 @@ from functools import partial
 from collections import defaultdict
 
 try:
-    from ..packages.Qt import (QtWidgets, QtCore, QtTest)
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    # Python 2 without the futures backport caches inline.
+    ThreadPoolExecutor = None
+
+try:
+    from ..packages.Qt import (QtWidgets, QtCore, QtTest, QtCompat)
 except ImportError:
     pass
 
-from .. import api
+from .. import (api, cluster)
+from ..manifest import (FrameTask, make_header, write_manifest)
+from ..jobs import RenderJob
+from ..logtail import (LogWatcher, FRAME_STARTED, FRAME_DONE, ERROR,
+                       FINISHED, CANCELLED)
+from ..farm import job_source
+from ..sampler import CameraSampler
+from ..autoscale import Autoscaler
+from ..quality import (TIER_ORDER, quality_tier)
+from ..ordering import order_jobs
+from .. import playblast
+from ..backends import renderer_backend
+from ..cache import RenderCache
+from ..dedupe import (FrameDeduper, break_link, log_totals)
+from ..trace import Tracer
+from ..history import (RenderHistory, format_duration)
 
 this_package = os.path.abspath(os.path.dirname(__file__))
 this_path = partial(os.path.join, this_package)
 
 log = logging.getLogger("CameraBatch")
 
+_stylesheet = None
+
+
+def stylesheet():
+    """
+    The tool's stylesheet, read from disk once per session.
+
+    :raises: ``IOError`` if style.css is missing.
+
+    :return: Stylesheet.
+    :rtype: str
+    """
+    global _stylesheet
+
+    if _stylesheet is None:
+        with open(this_path("style.css")) as f:
+            _stylesheet = f.read()
+
+    return _stylesheet
+
 
 class UI(QtWidgets.QDialog):
     """
     :class:`UI` inherits a QDialog and customizes it.
+
+    There is one per Maya session, see :func:`CameraBatch.show`. Closing it
+    only hides it, the camera list, its node callbacks and any running
+    batch stay alive until :meth:`teardown`.
     """
+    object_name = "CameraBatchWindow"
+
+    # Frames linked and bytes reclaimed, emitted from the dedupe thread.
+    dedupe_reported = QtCore.Signal(object, object)
+    # Jobs left after the render cache, emitted from the cache thread.
+    cache_filtered = QtCore.Signal(object)
+
     def __init__(self, parent=None):
 
         super(UI, self).__init__(parent)
 
         # Set window
         self.setWindowTitle("Camera Batch")
+        self.setObjectName(self.object_name)
         self.resize(450, 275)
 
         # Grab stylesheet
-        with open(this_path("style.css")) as f:
-            self.setStyleSheet(f.read())
+        self.setStyleSheet(stylesheet())
 
         # Center to frame.
         qr = self.frameGeometry()
@@ -55,8 +108,39 @@ class UI(QtWidgets.QDialog):
         self.maya_hooks.before_scene_export.connect(self.export_timer)
         self.maya_hooks.render_finished.connect(self.render_next)
         self.maya_hooks.render_cancelled.connect(self.render_stop)
+        self.maya_hooks.maya_exiting.connect(self.teardown)
 
         self.camera_nodes = []
+        self.sampler = CameraSampler()
+        self.duplicate_plan = None
+        self.render_log = None
+        self.rendering = None
+        self.rendering_camera = None
+        self.render_state = None
+        self.background_job = None
+        self.render_cache = RenderCache.from_environment()
+        # One thread keeps cache lookups and stores in order, off the UI.
+        self.cache_pool = None
+        if self.render_cache and ThreadPoolExecutor:
+            self.cache_pool = ThreadPoolExecutor(1)
+        self.cache_filtered.connect(self.start_background)
+        self.deduper = FrameDeduper()
+        # A bound method, so the signal is queued to the main thread.
+        self.dedupe_reported.connect(self.dedupe_finished)
+        self.tracer = None
+        self.log_watcher = LogWatcher()
+
+        self.log_timer = QtCore.QTimer(self)
+        self.log_timer.setInterval(500)
+        self.log_timer.timeout.connect(self.poll_render_log)
+
+        # The controller outlives the dialog so closing it keeps rendering.
+        self.controller = BatchController(
+            parent=parent or self, autoscaler=Autoscaler(max_jobs=2),
+            retries=2, trace=True, history=RenderHistory(), admit=True)
+        self.controller.progress.connect(self.update_progress)
+        self.controller.finished.connect(self.background_finished)
+        self.controller.job_done.connect(self.collect_outputs)
 
         self.create_layout()
         self.create_connections()
@@ -64,8 +148,6 @@ class UI(QtWidgets.QDialog):
 
         self.setLayout(self.layout)
 
-        self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
-
     def create_layout(self):
         """
         Creates layout.
@@ -94,6 +176,29 @@ class UI(QtWidgets.QDialog):
         self.remove_button.setMinimumWidth(100)
         self.remove_button.setMinimumHeight(25)
 
+        self.export_button = QtWidgets.QPushButton("Export")
+        self.export_button.setMinimumWidth(100)
+        self.export_button.setMinimumHeight(25)
+
+        self.farm_label = QtWidgets.QLabel("Job Server:")
+        self.farm_line = LineEditWidget()
+        self.farm_line.setPlaceholderText("http://host:8765 or spool folder")
+
+        self.quality_label = QtWidgets.QLabel("Quality:")
+        self.quality_combo = QtWidgets.QComboBox()
+        self.quality_combo.addItems(list(TIER_ORDER))
+        self.quality_combo.setCurrentIndex(TIER_ORDER.index("final"))
+
+        self.progressive_check = QtWidgets.QCheckBox("Progressive")
+
+        self.backend_combo = QtWidgets.QComboBox()
+        self.backend_combo.addItems(["Render", "Playblast"])
+
+        self.background_check = QtWidgets.QCheckBox("Render in background")
+        self.background_check.setChecked(True)
+
+        self.status_label = QtWidgets.QLabel("")
+
         self.batch_button = QtWidgets.QPushButton("Batch Cameras")
         self.batch_button.setMinimumHeight(40)
 
@@ -105,20 +210,33 @@ class UI(QtWidgets.QDialog):
         self.button_layout = QtWidgets.QVBoxLayout()
         self.add_remove_layout = QtWidgets.QVBoxLayout()
         self.file_layout = QtWidgets.QHBoxLayout()
+        self.quality_layout = QtWidgets.QHBoxLayout()
 
         self.button_layout.addWidget(self.up_button, 1)
         self.button_layout.addWidget(self.down_button, 1)
         self.button_layout.addWidget(self.add_button, 1)
         self.button_layout.addWidget(self.remove_button, 1)
+        self.button_layout.addWidget(self.export_button, 1)
         self.button_layout.setContentsMargins(5, 0, 0, 0)
 
         self.cam_layout.addWidget(self.cam_list, 1)
         self.cam_layout.addLayout(self.button_layout)
 
+        self.file_layout.addWidget(self.farm_label)
+        self.file_layout.addWidget(self.farm_line, 1)
+
+        self.quality_layout.addWidget(self.backend_combo)
+        self.quality_layout.addWidget(self.quality_label)
+        self.quality_layout.addWidget(self.quality_combo, 1)
+        self.quality_layout.addWidget(self.progressive_check)
+        self.quality_layout.addWidget(self.background_check)
+
         self.layout.addWidget(self.label)
         self.layout.addLayout(self.cam_layout)
         self.layout.addWidget(self.line, 1)
         self.layout.addLayout(self.file_layout)
+        self.layout.addLayout(self.quality_layout)
+        self.layout.addWidget(self.status_label)
         self.layout.addWidget(self.batch_button)
 
     def create_connections(self):
@@ -134,8 +252,11 @@ class UI(QtWidgets.QDialog):
         self.down_button.clicked.connect(self.move_items_down)
         self.remove_button.clicked.connect(self.delete_obj_items)
         self.add_button.clicked.connect(self.add_clicked)
+        self.export_button.clicked.connect(self.export_manifest)
         self.batch_button.clicked.connect(self.batch_cameras)
         self.cam_list.itemSelectionChanged.connect(self.select_cameras)
+        self.cam_list.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.cam_list.customContextMenuRequested.connect(self.show_list_menu)
 
     def create_tooltips(self):
         """
@@ -152,7 +273,27 @@ class UI(QtWidgets.QDialog):
         self.remove_button.setToolTip("Remove all selected"
                                       " cameras from list.")
         self.add_button.setToolTip("Add all selected camera from list.")
+        self.export_button.setToolTip("Save the camera list as a batch"
+                                      " manifest for the command line"
+                                      " and render agents.")
         self.batch_button.setToolTip("Create a batch camera.")
+        self.farm_line.setToolTip("Submit cameras to a CameraBatch job"
+                                  " server or shared spool folder instead"
+                                  " of rendering here.")
+        self.quality_combo.setToolTip("Draft and preview render every"
+                                      " camera at a lower resolution,"
+                                      " sampling and frame density.\n"
+                                      "Right click cameras to override.")
+        self.backend_combo.setToolTip("Playblast captures the viewport for"
+                                      " review instead of rendering.")
+        self.progressive_check.setToolTip("Render the first, last and middle"
+                                          " frame of every camera first,"
+                                          " then fill in the ranges.\n"
+                                          "Background and job server"
+                                          " batches only.")
+        self.background_check.setToolTip("Render with separate Maya"
+                                         " processes so this session"
+                                         " stays interactive.")
         self.cam_list.setToolTip("Cameras added to the list"
                                  " are in order\n of the camera"
                                  " to be batched.")
@@ -180,25 +321,16 @@ class UI(QtWidgets.QDialog):
         """
         nodes = cmds.ls(selection=True)
 
-        for node in nodes:
-
-            if cmds.objExists(node + ".start_frame"):
-                start_frame = cmds.getAttr(node + ".start_frame")
-            else:
-                start_frame = 1
-
-            if cmds.objExists(node + ".end_frame"):
-                end_frame = cmds.getAttr(node + ".end_frame")
-            else:
-                end_frame = 10
+        for camera in Camera.from_nodes(nodes):
 
             if len(self.cam_list.findItems(
-                "{0}\t{1} - {2}".format(node, start_frame, end_frame),
+                "{0}\t{1} - {2}".format(
+                    camera.name, camera.start_frame, camera.end_frame),
                     QtCore.Qt.MatchExactly)):
-                log.info("%s already added to the list." % node)
+                log.info("%s already added to the list." % camera.name)
                 continue
 
-            self.new_obj_item(Camera(node))
+            self.new_obj_item(camera)
 
     def new_obj_item(self, node):
         """
@@ -235,7 +367,7 @@ class UI(QtWidgets.QDialog):
         """
         self.camera_nodes = []
 
-        for i in xrange(self.cam_list.count()):
+        for i in range(self.cam_list.count()):
             self.camera_nodes.append(self.cam_list.item(i).camera)
 
         if not self.camera_nodes:
@@ -245,7 +377,404 @@ class UI(QtWidgets.QDialog):
         if not cmds.file(query=True, sceneName=True):
             raise RuntimeError("Save your scene first!")
 
-        self.render_next()
+        # Only the paths that link alias frames when they end may skip them.
+        self.duplicate_plan = None
+
+        if self.farm_line.text().strip():
+            self.render_farm(self.farm_line.text().strip())
+        elif self.background_check.isChecked():
+            if not self.playblasting():
+                self.skip_duplicate_cameras()
+            self.render_background()
+        elif self.playblasting():
+            self.playblast_cameras()
+        else:
+            self.skip_duplicate_cameras()
+            self.render_state = api.RenderState(tier=self.batch_tier())
+            self.tracer = Tracer()
+            self.cam_list.clear_progress()
+            self.set_camera_progress(dict(
+                (camera.name, (0, int(camera.end_frame) -
+                               int(camera.start_frame) + 1,
+                               None, "queued", None))
+                for camera in self.camera_nodes))
+            self.follow_render_log()
+            self.render_next()
+
+    def follow_render_log(self):
+        """
+        Starts tailing mayaRenderLog.txt for per-frame progress.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.log_watcher.remove(self.render_log)
+        self.render_log = api.render_log_path()
+        self.log_watcher.add(
+            self.render_log, api.current_renderer(), from_end=True)
+        self.log_timer.start()
+
+    def poll_render_log(self):
+
+        frame = None
+        for event in self.log_watcher.poll():
+            if event.kind in (FRAME_STARTED, FRAME_DONE):
+                frame = event.frame
+                self.status_label.setText("{0} frame {1}".format(
+                    self.rendering, event.frame))
+                if self.tracer and event.kind == FRAME_STARTED:
+                    self.tracer.begin("frames", "{0} frame {1}".format(
+                        self.rendering, event.frame))
+                elif self.tracer:
+                    self.tracer.end("frames")
+            elif event.kind == ERROR:
+                log.error(event.message or event.line)
+
+        # Only the last frame of a poll is shown, the timer sets the rate.
+        camera = self.rendering_camera
+        if camera and frame is not None:
+            frames = range(int(camera.start_frame), int(camera.end_frame) + 1)
+            self.set_camera_progress({camera.name: (
+                len([f for f in frames if f < frame]), len(frames), frame,
+                "rendering", None)})
+
+    def set_camera_progress(self, progress):
+        """
+        Updates the progress drawn on camera rows in one pass.
+
+        :param progress: Camera name to progress tuple, see
+                         :meth:`ObjectItem.set_progress`.
+        :type progress: (dict)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        for i in range(self.cam_list.count()):
+            item = self.cam_list.item(i)
+            if item.camera.name in progress:
+                item.set_progress(progress[item.camera.name])
+
+    def render_background(self):
+        """
+        Hands the queued cameras to the background controller.
+
+        :raises: ``RuntimeError`` if the scene has unsaved changes.
+
+        :return: None
+        :rtype: NoneType
+        """
+        if self.controller.running:
+            reply = QtWidgets.QMessageBox.question(
+                self,
+                "Cancel Render?",
+                "A background batch is already running."
+                " Do you want to cancel it?",
+                QtWidgets.QMessageBox.Yes, QtWidgets.QMessageBox.No)
+
+            if reply == QtWidgets.QMessageBox.Yes:
+                self.controller.stop()
+                log.info("Background renders cancelled!")
+
+            self.camera_nodes = []
+            return
+
+        if cmds.file(query=True, modified=True):
+            raise RuntimeError("Save your scene first!")
+
+        jobs = self.render_jobs()
+        self.camera_nodes = []
+        self.background_job = jobs[0] if jobs else None
+
+        if self.render_cache:
+            self.status_label.setText("Checking the render cache....")
+            self.run_cache_task(self.filter_cached, jobs)
+            return
+
+        self.start_background(jobs)
+
+    def run_cache_task(self, function, *args, **kwargs):
+        """
+        Runs render cache work, which hashes scenes and copies frames, on
+        the cache thread so Maya stays responsive.
+        """
+        if self.cache_pool is None:
+            function(*args, **kwargs)
+        else:
+            self.cache_pool.submit(function, *args, **kwargs)
+
+    def filter_cached(self, jobs):
+
+        try:
+            jobs = self.render_cache.filter_jobs(jobs, self.job_image_path)
+        except Exception as e:
+            log.warning("Could not check the render cache: %s" % e)
+        self.cache_filtered.emit(jobs)
+
+    def start_background(self, jobs):
+        """
+        Starts the background controller on the jobs left to render.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.status_label.setText("")
+        if self.render_cache:
+            log.info("%d frames from the render cache." % (
+                self.render_cache.hits))
+        if not jobs:
+            self.background_finished()
+            return
+
+        for job in jobs:
+            for frame in job.frames:
+                break_link(self.job_image_path(job, frame))
+
+        log.info("Rendering %d cameras in the background...." % len(jobs))
+        self.cam_list.clear_progress()
+        self.controller.start(jobs)
+
+    def render_farm(self, url):
+        """
+        Submits the queued cameras to a job server or spool folder.
+
+        :param url: Job server url or spool folder.
+        :type url: (str)
+
+        :raises: ``RuntimeError`` if the scene has unsaved changes.
+
+        :return: None
+        :rtype: NoneType
+        """
+        if cmds.file(query=True, modified=True):
+            raise RuntimeError("Save your scene first!")
+
+        jobs = self.render_jobs()
+        self.camera_nodes = []
+
+        ids = job_source(url).submit(jobs)
+        log.info("Submitted %d cameras to %s." % (len(ids), url))
+
+    def playblasting(self):
+        return self.backend_combo.currentText() == "Playblast"
+
+    def playblast_cameras(self):
+        """
+        Captures the queued cameras offscreen in this session.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        resolution = api.resolution()
+        batch_tier = self.batch_tier()
+        cameras, self.camera_nodes = self.camera_nodes, []
+
+        for index, camera in enumerate(cameras):
+            tier = quality_tier(camera.tier) if camera.tier else batch_tier
+            scale = tier.resolution_scale
+
+            self.status_label.setText("Playblasting {0} ({1}/{2})".format(
+                camera.name, index + 1, len(cameras)))
+            QtWidgets.QApplication.processEvents()
+
+            playblast.playblast_camera(
+                camera, step=tier.step,
+                resolution=(max(int(resolution[0] * scale), 1),
+                            max(int(resolution[1] * scale), 1)))
+
+        self.status_label.setText("")
+        log.info("All playblasts finished!")
+
+    def batch_tier(self):
+        return quality_tier(self.quality_combo.currentText())
+
+    def render_jobs(self):
+        """
+        Builds render jobs for the queued cameras at their quality tiers.
+
+        :raises: None
+
+        :return: One job per camera.
+        :rtype: list of RenderJob
+        """
+        scene = cmds.file(query=True, sceneName=True)
+        project = cmds.workspace(query=True, rootDirectory=True)
+        renderer = api.current_renderer()
+        resolution = api.resolution()
+        batch_tier = self.batch_tier()
+
+        jobs = []
+        for camera in self.camera_nodes:
+            tier = quality_tier(camera.tier) if camera.tier else batch_tier
+            job = RenderJob.from_camera(
+                camera, scene, project=project, renderer=renderer)
+            if self.playblasting():
+                job = playblast.playblast_job(job)
+            jobs.append(tier.apply(job, resolution))
+
+        if self.duplicate_plan:
+            jobs = self.duplicate_plan.trim(jobs)
+
+        if self.progressive_check.isChecked():
+            jobs = order_jobs(jobs, "progressive")
+
+        return jobs
+
+    def show_list_menu(self, position):
+
+        items = self.cam_list.selectedItems()
+        if not items:
+            return
+
+        menu = QtWidgets.QMenu(self)
+        for tier in (None,) + TIER_ORDER:
+            action = menu.addAction(
+                "Quality: {0}".format(tier or "batch default"))
+            action.triggered.connect(
+                partial(self.set_item_tiers, items, tier))
+
+        menu.exec_(self.cam_list.mapToGlobal(position))
+
+    def set_item_tiers(self, items, tier, *args):
+
+        for item in items:
+            item.set_tier(tier)
+
+    def job_image_path(self, job, frame):
+        # Background renders may add <Camera> to the prefix, see backends.
+        return renderer_backend(job.renderer).output_path(job, frame)
+
+    def background_image_path(self, camera_name, frame):
+        """
+        Where a background render puts a camera's frame, aliases included.
+        """
+        job = self.background_job
+        if job is None:
+            return api.image_path(camera_name, frame)
+
+        return self.job_image_path(RenderJob(
+            job.scene, camera_name, frame, frame, renderer=job.renderer,
+            project=job.project), frame)
+
+    def collect_outputs(self, job, code):
+        """
+        Caches and deduplicates the frames of a finished background job.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        poison = self.controller.state.get("poison", {}).get(job.camera, [])
+        skip = poison if code else ()
+
+        if self.render_cache:
+            self.run_cache_task(self.render_cache.store_job, job,
+                                self.job_image_path, skip=skip)
+
+        if code == 0 or poison:
+            for frame in job.frames:
+                if frame not in skip:
+                    self.deduper.add(self.job_image_path(job, frame))
+
+    def dedupe_camera(self, camera):
+
+        for frame in range(int(camera.start_frame),
+                           int(camera.end_frame) + 1):
+            self.deduper.add(api.image_path(camera.name, frame))
+
+    def update_progress(self, state):
+
+        self.set_camera_progress(state.get("cameras", {}))
+
+        text = "{0}/{1} frames, {2}/{3} cameras".format(
+            state["frames_done"], state["frames_total"],
+            state["jobs_done"], state["jobs_total"])
+        if state.get("eta") is not None and self.controller.running:
+            text += ", {0} left".format(format_duration(state["eta"]))
+
+        self.status_label.setText(text)
+
+    def dedupe_finished(self, linked, reclaimed):
+        log_totals(linked, reclaimed)
+
+    def background_finished(self):
+
+        if self.duplicate_plan:
+            linked = cluster.link_outputs(self.duplicate_plan,
+                                          self.background_image_path)
+            log.info("Linked %d duplicate frames." % linked)
+            self.duplicate_plan = None
+
+        self.deduper.report_later(self.dedupe_reported.emit)
+        log.info("All background renders finished!")
+
+    def skip_duplicate_cameras(self):
+        """
+        Drops cameras whose every frame duplicates another camera's view.
+
+        Background jobs also leave out the duplicate frames of partly
+        overlapping cameras, see :meth:`ClusterPlan.trim`. Only called for
+        batches that link the duplicates when they end.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        try:
+            samples = self.sampler.sample(self.camera_nodes)
+        except RuntimeError as e:
+            log.warning("Skipping duplicate detection: %s" % e)
+            self.duplicate_plan = None
+            return
+
+        self.duplicate_plan = cluster.cluster_views(
+            samples, order=[camera.name for camera in self.camera_nodes])
+
+        aliases = self.duplicate_plan.aliases
+        for alias, sources in aliases.items():
+            log.info("%s duplicates %s, linking instead of rendering." % (
+                alias, ", ".join(sorted(sources))))
+
+        self.camera_nodes = [camera for camera in self.camera_nodes
+                             if camera.name not in aliases]
+
+    def export_manifest(self):
+        """
+        Writes the camera list to a batch manifest.
+
+        :raises: ``RuntimeError`` if the scene was never saved.
+
+        :return: None
+        :rtype: NoneType
+        """
+        scene = cmds.file(query=True, sceneName=True)
+        if not scene:
+            raise RuntimeError("Save your scene first!")
+
+        path = QtCompat.QFileDialog.getSaveFileName(
+            self, "Export Manifest", os.path.splitext(scene)[0] + ".cbm",
+            "Manifest (*.cbm);;JSON Manifest (*.json)")[0]
+        if not path:
+            return
+
+        header = make_header(
+            scene, project=cmds.workspace(query=True, rootDirectory=True))
+        tasks = [FrameTask(item.camera.name, [(
+            item.camera.start_frame, item.camera.end_frame, 1)])
+            for item in (self.cam_list.item(i)
+                         for i in range(self.cam_list.count()))]
+
+        count = write_manifest(path, header, tasks)
+        log.info("Exported %d cameras to %s." % (count, path))
 
     def export_timer(self):
         try:
@@ -263,8 +792,34 @@ class UI(QtWidgets.QDialog):
 
     def render_next(self):
 
+        if self.rendering_camera:
+            self.dedupe_camera(self.rendering_camera)
+            camera = self.rendering_camera
+            total = int(camera.end_frame) - int(camera.start_frame) + 1
+            self.set_camera_progress(
+                {camera.name: (total, total, None, "done", None)})
+            self.rendering_camera = None
+
+        if self.tracer:
+            # The gap until the next camera starts shows as idle time.
+            self.tracer.end("frames")
+            self.tracer.end("session")
+
         if self.camera_nodes:
-            api.batch_camera(self.camera_nodes[0])
+            camera = self.camera_nodes[0]
+            for frame in range(int(camera.start_frame),
+                               int(camera.end_frame) + 1):
+                break_link(api.image_path(camera.name, frame))
+
+            self.rendering = camera.name
+            self.rendering_camera = camera
+            if self.tracer:
+                with self.tracer.span("maya", "apply %s" % camera.name):
+                    api.batch_camera(camera, self.render_state)
+                self.tracer.begin("session", camera.name, args={
+                    "start": camera.start_frame, "end": camera.end_frame})
+            else:
+                api.batch_camera(camera, self.render_state)
             log.info("Rendering {0} {1} - {2}....".format(
                 self.camera_nodes[0].name,
                 self.camera_nodes[0].start_frame,
@@ -272,13 +827,45 @@ class UI(QtWidgets.QDialog):
             self.camera_nodes.pop(0)
             return
 
+        if self.duplicate_plan:
+            linked = cluster.link_outputs(self.duplicate_plan, api.image_path)
+            log.info("Linked %d duplicate frames." % linked)
+            self.duplicate_plan = None
+
+        self.restore_render_state()
+        self.log_timer.stop()
+        self.deduper.report_later(self.dedupe_reported.emit)
+        self.save_trace()
         log.info("All renders finished!")
 
     def render_stop(self):
+        self.set_camera_progress(dict(
+            (camera.name, None) for camera in
+            [self.rendering_camera] + self.camera_nodes if camera))
         self.camera_nodes = []
+        self.rendering_camera = None
+        self.duplicate_plan = None
+        self.log_timer.stop()
         mel.eval("cancelBatchRender;")
+        self.restore_render_state()
+        self.save_trace()
         log.info("All renders cancelled!")
 
+    def save_trace(self):
+
+        if self.tracer:
+            try:
+                self.tracer.save()
+            except (IOError, OSError) as e:
+                log.warning("Could not write the batch timeline: %s" % e)
+            self.tracer = None
+
+    def restore_render_state(self):
+
+        if self.render_state:
+            self.render_state.restore()
+            self.render_state = None
+
     def delete_obj_item(self, item):
         """
         Deletes selected items
@@ -414,28 +1001,31 @@ class UI(QtWidgets.QDialog):
         if selected_items:
             cmds.select(selected_items)
 
-    def closeEvent(self, event):
+    def teardown(self):
+        """
+        Cancels renders and removes every Maya callback, before the window
+        is deleted by :func:`CameraBatch.close` or when Maya exits.
 
-        if self.camera_nodes:
-            reply = QtWidgets.QMessageBox.question(
-                self,
-                "Cancel Render?",
-                "Closing the Batch Camera tool cancels renders."
-                " Do you want to cancel renders?",
-                QtWidgets.QMessageBox.Yes, QtWidgets.QMessageBox.No)
+        :raises: None
 
-            if reply == QtWidgets.QMessageBox.No:
-                event.ignore()
-            else:
-                self.render_stop()
-                self.maya_hooks.clear_callbacks()
-                self.maya_hooks.clear_scene_callbacks()
-                super(UI, self).closeEvent(event)
+        :return: None
+        :rtype: NoneType
+        """
+        if self.camera_nodes or self.rendering_camera:
+            self.render_stop()
+
+        self.controller.shutdown()
+        self.controller.deleteLater()
+        self.deduper.shutdown()
+        if self.cache_pool is not None:
+            self.cache_pool.shutdown(wait=True)
+        self.maya_hooks.clear_callbacks()
+        self.maya_hooks.clear_scene_callbacks()
 
-        else:
-            self.maya_hooks.clear_callbacks()
-            self.maya_hooks.clear_scene_callbacks()
-            super(UI, self).closeEvent(event)
+    def closeEvent(self, event):
+        # Only hide, the session's window keeps its cameras and callbacks.
+        event.ignore()
+        self.hide()
 
     def keyPressEvent(self, event):
         '''
@@ -455,6 +1045,7 @@ class MayaHooks(QtCore.QObject):
     scene_selection_changed = QtCore.Signal()
     render_finished = QtCore.Signal()
     render_cancelled = QtCore.Signal()
+    maya_exiting = QtCore.Signal()
 
     def __init__(self, parent=None):
         super(MayaHooks, self).__init__(parent=parent)
@@ -463,6 +1054,9 @@ class MayaHooks(QtCore.QObject):
         self.scene_callback_ids = []
         self.output_callback_ids = []
 
+        # Matches every known renderer, the scene's may change mid session.
+        self.backend = renderer_backend()
+
         before_change_messages = [
             OpenMaya.MSceneMessage.kBeforeOpen,
             OpenMaya.MSceneMessage.kBeforeNew,
@@ -481,27 +1075,35 @@ class MayaHooks(QtCore.QObject):
             OpenMaya.MSceneMessage.kBeforeExport,
             self.emit_before_scene_export)
 
+        callback_exit_id = OpenMaya.MSceneMessage.addCallback(
+            OpenMaya.MSceneMessage.kMayaExiting,
+            self.emit_maya_exiting)
+
         self.output_callback_ids.append(callback_output_id)
         self.scene_callback_ids.append(callback_save_id)
+        self.scene_callback_ids.append(callback_exit_id)
 
     def emit_before_scene_changed(self, *args):
         self.before_scene_changed.emit()
 
     def emit_output_changed(self, msg, msgType, *args):
 
-        if "[Redshift] License returned" in msg:
-            self.render_finished.emit()
+        result = self.backend.match(msg)
+        if result is None:
+            return
 
-        elif msg == ("Rendering Completed. "
-                     "See mayaRenderLog.txt for information."):
+        if result[0] == FINISHED:
             self.render_finished.emit()
 
-        elif msg == "Render Cancelled. ":
+        elif result[0] == CANCELLED:
             self.render_cancelled.emit()
 
     def emit_before_scene_export(self, *args):
         self.before_scene_export.emit()
 
+    def emit_maya_exiting(self, *args):
+        self.maya_exiting.emit()
+
     def emit_scene_selection_changed(self, *args):
         self.scene_selection_changed.emit()
 
@@ -20,6 +20,26 @@ def get_maya_window():
     raise RuntimeError('Could not locate MayaWindow...')
 
 
+def find_window(object_name):
+    """
+    Finds a live window by object name.
+
+    :param object_name: Window object name.
+    :type object_name: (str)
+
+    :raises: None
+
+    :return: The window, None if there is none.
+    :rtype: QtWidgets.QWidget
+    """
+    for widget in QtWidgets.QApplication.instance().topLevelWidgets():
+
+        if widget.objectName() == object_name:
+            return widget
+
+    return None
+
+
 def wait(delay=1):
     """
     Delay python execution for a specified amount of time
@@ -29,10 +49,10 @@ def wait(delay=1):
     :return: None
     :rtype: NoneType
     """
-    s = time.clock()
+    s = time.time()
 
     while True:
-        if time.clock() - s >= delay:
+        if time.time() - s >= delay:
             return
 
         QtWidgets.QApplication.instance().processEvents()
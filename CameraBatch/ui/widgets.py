@@ -8,8 +8,19 @@ except ImportError:
 
 import logging
 
+from ..history import format_progress
+
 log = logging.getLogger("CameraBatch")
 
+PROGRESS_ROLE = QtCore.Qt.UserRole + 1
+
+STATUS_COLORS = {
+    "queued": (118, 121, 124),
+    "rendering": (61, 174, 233),
+    "done": (80, 180, 110),
+    "failed": (218, 68, 83),
+}
+
 
 class ObjectItem(QtWidgets.QListWidgetItem):
 
@@ -18,6 +29,7 @@ class ObjectItem(QtWidgets.QListWidgetItem):
         self.setText("{0}\t{1} - {2}".format(
             camera.name, camera.start_frame, camera.end_frame))
         self.camera = camera
+        self.progress = None
 
     def rename(self, new_name):
         self.camera.name = new_name
@@ -31,11 +43,75 @@ class ObjectItem(QtWidgets.QListWidgetItem):
         self.camera.end_frame = new_frame
         self.refresh()
 
+    def set_tier(self, tier):
+        self.camera.tier = tier
+        self.setToolTip("Quality: {0}".format(tier) if tier else "")
+
+    def set_progress(self, progress):
+        """
+        Shows a camera's batch progress, drawn by :class:`ProgressDelegate`.
+
+        :param progress: Frames done, frames total, current frame, status and
+                         seconds left, None to clear.
+        :type progress: (tuple)
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        # Unchanged rows are not repainted.
+        if progress != self.progress:
+            self.progress = progress
+            self.setData(PROGRESS_ROLE, progress)
+
     def refresh(self):
         self.setText("{0}\t{1} - {2}".format(
             self.camera.name, self.camera.start_frame, self.camera.end_frame))
 
 
+class ProgressDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    Paints a camera row's progress bar and status text over the item.
+
+    Rows are painted straight from the item's :data:`PROGRESS_ROLE`, no
+    widget is created per row, so updates only cost a repaint of the rows
+    that changed.
+    """
+    bar_height = 3
+
+    def paint(self, painter, option, index):
+
+        super(ProgressDelegate, self).paint(painter, option, index)
+
+        progress = index.data(PROGRESS_ROLE)
+        if not progress:
+            return
+
+        done, total, _, status, _ = progress
+        rect = option.rect
+        color = QtGui.QColor(*STATUS_COLORS.get(status, (118, 121, 124)))
+
+        painter.save()
+
+        width = int(rect.width() * min(float(done) / max(total, 1), 1.0))
+        painter.fillRect(QtCore.QRect(
+            rect.left(), rect.bottom() - self.bar_height + 1,
+            width, self.bar_height), color)
+
+        painter.setPen(option.palette.color(QtGui.QPalette.Text))
+        painter.drawText(rect.adjusted(0, 0, -6, -self.bar_height),
+                         QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter,
+                         format_progress(progress))
+
+        painter.restore()
+
+    def sizeHint(self, option, index):
+
+        size = super(ProgressDelegate, self).sizeHint(option, index)
+        return QtCore.QSize(size.width(), size.height() + self.bar_height)
+
+
 class CameraList(QtWidgets.QListWidget):
     """
     :class:`CameraListWidget` inherits and creates a custom QListWidget class.
@@ -49,6 +125,12 @@ class CameraList(QtWidgets.QListWidget):
         self.setDropIndicatorShown(True)
         self.setFocusPolicy(QtCore.Qt.NoFocus)
         self.setObjectName('cameralist')
+        self.setItemDelegate(ProgressDelegate(self))
+        self.setUniformItemSizes(True)
+
+    def clear_progress(self):
+        for i in range(self.count()):
+            self.item(i).set_progress(None)
 
 
 class LineEditWidget(QtWidgets.QLineEdit):
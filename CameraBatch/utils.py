@@ -10,6 +10,34 @@ def show():
     """
     Shows ui in maya
 
+    The window is created once per session, later calls show it again
+    with its cameras and queue as they were left.
+
+    :raises: None
+
+    :return: The window.
+    :rtype: UI
+    """
+    from .ui.ui import UI
+    from .ui import utils
+
+    cam_win = utils.find_window(UI.object_name)
+    if cam_win is None:
+        cam_win = UI(utils.get_maya_window())
+
+    if cam_win.isMinimized():
+        cam_win.showNormal()
+    cam_win.show()
+    cam_win.raise_()
+    cam_win.activateWindow()
+
+    return cam_win
+
+
+def close():
+    """
+    Deletes the ui, cancelling renders and removing its Maya callbacks.
+
     :raises: None
 
     :return: None
@@ -18,5 +46,10 @@ def show():
     from .ui.ui import UI
     from .ui import utils
 
-    cam_win = UI(utils.get_maya_window())
-    cam_win.show()
+    cam_win = utils.find_window(UI.object_name)
+    if cam_win is None:
+        return
+
+    cam_win.teardown()
+    cam_win.close()
+    cam_win.deleteLater()
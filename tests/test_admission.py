@@ -0,0 +1,109 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from CameraBatch.jobs import RenderJob
+from CameraBatch.admission import (AdmissionController, AdmissionError,
+                                   ResourceHistory, camera_pattern, GB)
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class AdmissionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.history = ResourceHistory(os.path.join(self.folder, "h.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def controller(self, **kwargs):
+        return AdmissionController(history=self.history,
+                                   output_dir=self.folder, poll=0.01,
+                                   **kwargs)
+
+    def test_camera_pattern_matches_whole_names(self):
+
+        pattern = camera_pattern("cam1")
+        self.assertTrue(pattern.search("cam1/shot.0001.exr"))
+        self.assertTrue(pattern.search("shot_cam1.0001.exr"))
+        self.assertFalse(pattern.search("cam10/shot.0001.exr"))
+        self.assertFalse(pattern.search("shot_cam10.0001.exr"))
+        self.assertTrue(camera_pattern("set:cam").search("set_cam.0001.exr"))
+
+    def test_disk_shortfall_admits_when_idle(self):
+
+        controller = self.controller(disk_reserve=0,
+                                     default_frame_bytes=1024 ** 5)
+        job = RenderJob("scene.ma", "cam1", 1, 2)
+
+        run(asyncio.wait_for(controller.acquire(job, dict), 1.0))
+        self.assertIn(job, controller.running)
+
+    def test_full_disk_fails_when_idle(self):
+
+        controller = self.controller(disk_reserve=1024 ** 5)
+        job = RenderJob("scene.ma", "cam1", 1, 1)
+
+        with self.assertRaises(AdmissionError):
+            run(asyncio.wait_for(controller.acquire(job, dict), 1.0))
+
+    def test_learn_measures_only_the_camera(self):
+
+        controller = self.controller()
+        job = RenderJob("scene.ma", "cam1", 1, 2)
+        started = time.time() - 1
+        for name, size in (("cam1.0001.exr", 100), ("cam1.0002.exr", 100),
+                           ("cam10.0001.exr", 5000)):
+            with open(os.path.join(self.folder, name), "wb") as f:
+                f.write(b"x" * size)
+
+        run(controller.learn(job, 2 * GB, started))
+        self.assertEqual(self.history.get(job)["frame_bytes"], 100)
+
+
+    def test_learn_skips_other_chunks(self):
+
+        controller = self.controller()
+        job = RenderJob("scene.ma", "cam1", 1, 2)
+        started = time.time() - 1
+        for frame, size in ((1, 100), (2, 100), (3, 9000)):
+            path = os.path.join(self.folder, "cam1.%04d.exr" % frame)
+            with open(path, "wb") as f:
+                f.write(b"x" * size)
+
+        run(controller.learn(job, None, started))
+        self.assertEqual(self.history.get(job)["frame_bytes"], 100)
+
+    def test_missing_available_memory_is_not_checked(self):
+
+        controller = self.controller(disk_reserve=0)
+        job = RenderJob("scene.ma", "cam1", 1, 1)
+
+        with mock.patch("CameraBatch.admission.read_meminfo",
+                        return_value={"MemTotal": GB}):
+            self.assertEqual(controller.fits(job, {}), (True, True))
+
+    def test_unmade_output_folder_uses_its_parent(self):
+
+        controller = self.controller()
+        controller.output_dir = os.path.join(self.folder, "images", "cam1")
+        self.assertIsNotNone(controller.disk_free())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+try:
+    import maya.standalone
+    from maya import cmds
+    from CameraBatch import api
+except ImportError:
+    cmds = None
+
+
+def setUpModule():
+    if cmds is not None:
+        maya.standalone.initialize()
+
+
+class Camera(object):
+
+    def __init__(self, transform, shape, start_frame=1, end_frame=10):
+        self.name = transform
+        self.transform = transform
+        self.shape = shape
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.tier = None
+
+
+@unittest.skipUnless(cmds, "needs mayapy")
+class RenderStateTest(unittest.TestCase):
+
+    def setUp(self):
+        cmds.file(new=True, force=True)
+        self.cameras = [Camera(*cmds.camera(name=name))
+                        for name in ("camA", "camB")]
+        cmds.setAttr("perspShape.renderable", True)
+
+    def test_apply_renders_one_camera(self):
+
+        state = api.RenderState()
+        state.apply(self.cameras[0])
+
+        self.assertTrue(cmds.getAttr(self.cameras[0].shape + ".renderable"))
+        self.assertFalse(cmds.getAttr("perspShape.renderable"))
+        self.assertEqual(cmds.getAttr("defaultRenderGlobals.endFrame"), 10)
+
+    def test_restore_skips_deleted_camera(self):
+
+        state = api.RenderState()
+        state.apply(self.cameras[0])
+        cmds.delete(self.cameras[0].transform)
+
+        state.restore()
+
+        self.assertTrue(cmds.getAttr("perspShape.renderable"))
+        self.assertNotIn(self.cameras[0].shape, state.cameras)
+
+    def test_restore_skips_renamed_camera(self):
+
+        cmds.setAttr(self.cameras[1].shape + ".renderable", True)
+        state = api.RenderState()
+        state.apply(self.cameras[0])
+        renamed = cmds.rename(self.cameras[1].shape, "camBRenamedShape")
+
+        state.restore()
+
+        self.assertTrue(cmds.getAttr("perspShape.renderable"))
+        self.assertFalse(cmds.getAttr(renamed + ".renderable"))
+        self.assertFalse(cmds.getAttr(self.cameras[0].shape + ".renderable"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from CameraBatch.autoscale import Autoscaler
+
+MEMINFO = {"MemTotal": 100, "MemAvailable": 80}
+LOW, MIDDLE, HIGH = 1.0, 3.0, 4.0
+
+
+class AutoscalerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.load = LOW
+        self.meminfo = dict(MEMINFO)
+        patches = [
+            mock.patch("CameraBatch.autoscale.read_loadavg",
+                       lambda: self.load),
+            mock.patch("CameraBatch.autoscale.read_meminfo",
+                       lambda: self.meminfo),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def scaler(self, **kwargs):
+        scaler = Autoscaler(max_jobs=4, samples=3, cooldown=30.0, **kwargs)
+        scaler.cores = 4
+        return scaler
+
+    def test_grows_after_agreeing_samples(self):
+
+        scaler = self.scaler()
+
+        self.assertEqual([scaler.update(now=100 + i) for i in range(3)],
+                         [1, 1, 2])
+
+    def test_disagreeing_sample_resets_pressure(self):
+
+        scaler = self.scaler()
+        scaler.update(now=100)
+        scaler.update(now=101)
+        self.load = MIDDLE
+        scaler.update(now=102)
+        self.load = LOW
+
+        self.assertEqual([scaler.update(now=103 + i) for i in range(3)],
+                         [1, 1, 2])
+
+    def test_reversal_restarts_count(self):
+
+        scaler = self.scaler()
+        scaler.jobs = 2
+        scaler.update(now=100)
+        scaler.update(now=101)
+        self.load = HIGH
+
+        self.assertEqual([scaler.update(now=102 + i) for i in range(3)],
+                         [2, 2, 1])
+
+    def test_cooldown_holds_between_changes(self):
+
+        scaler = self.scaler()
+        for i in range(3):
+            scaler.update(now=100 + i)
+        self.assertEqual(scaler.jobs, 2)
+
+        for i in range(5):
+            self.assertEqual(scaler.update(now=110 + i), 2)
+
+        self.assertEqual(scaler.update(now=132), 3)
+
+    def test_shrinks_when_memory_runs_low(self):
+
+        scaler = self.scaler()
+        scaler.jobs = 3
+        self.meminfo["MemAvailable"] = 5
+
+        self.assertEqual([scaler.update(now=100 + i) for i in range(3)],
+                         [3, 3, 2])
+
+    def test_artist_mode_caps_immediately(self):
+
+        scaler = self.scaler()
+        scaler.jobs = 4
+        scaler.changed = 100
+        scaler.artist_active = True
+
+        self.assertEqual(scaler.update(now=101), 1)
+
+    def test_holds_without_proc(self):
+
+        scaler = self.scaler()
+        self.load = None
+
+        self.assertEqual([scaler.update(now=100 + i) for i in range(5)],
+                         [1] * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from CameraBatch.jobs import RenderJob
+from CameraBatch.backends import (PRODUCTION_RENDERERS, renderer_backend)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+GLOBALS = """select -ne :defaultRenderGlobals;
+	setAttr ".ren" -type "string" "mayaSoftware";
+	setAttr ".ifp" -type "string" "%s";
+	setAttr ".outf" 32;
+	setAttr ".ep" 4;
+"""
+
+
+class OutputPathTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.scene = os.path.join(self.folder, "scenes", "shot.ma")
+        os.mkdir(os.path.dirname(self.scene))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_scene(self, prefix):
+        with open(os.path.join(FIXTURES, "cameras.ma")) as f:
+            text = f.read()
+        with open(self.scene, "w") as f:
+            f.write(text + GLOBALS % prefix)
+
+    def path(self, camera, renderer="file"):
+        job = RenderJob(self.scene, camera, 1, 1, renderer=renderer)
+        return renderer_backend(renderer).output_path(job, 1)
+
+    def test_cameras_get_distinct_paths(self):
+
+        self.write_scene("<Scene>")
+        self.assertNotEqual(self.path("camA"), self.path("camB"))
+        self.assertEqual(self.path("camA"), os.path.join(
+            self.folder, "images", "camA", "shot.0001.png"))
+
+    def test_scene_prefix_with_camera_is_kept(self):
+
+        self.write_scene("renders/<Camera>_v1")
+        self.assertEqual(self.path("set:camA"), os.path.join(
+            self.folder, "images", "renders", "set_camA_v1.0001.png"))
+
+    def test_command_names_camera_when_prefix_lacks_it(self):
+
+        self.write_scene("beauty")
+        job = RenderJob(self.scene, "camA", 1, 1)
+        command = renderer_backend("file").command(job)
+        self.assertEqual(command[command.index("-im") + 1],
+                         "<Camera>/beauty")
+
+    def test_driver_renderers_keep_their_extension(self):
+
+        self.write_scene("<Scene>")
+        self.assertTrue(self.path("camA", "arnold").endswith(".0001.exr"))
+
+    def test_unknown_renderer_is_refused(self):
+
+        self.assertNotIn("test", PRODUCTION_RENDERERS)
+        with self.assertRaises(ValueError):
+            renderer_backend("nosuchrenderer")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from CameraBatch.cache import RenderCache
+
+
+class RenderCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.root = os.path.join(self.folder, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, name, data):
+        path = os.path.join(self.folder, name)
+        with open(path, "w") as f:
+            f.write(data)
+        return path
+
+    def test_fetch_copies_by_default(self):
+
+        cache = RenderCache(self.root)
+        cache.store("a" * 64, self.write("frame.png", "image"))
+        destination = os.path.join(self.folder, "shot", "frame.png")
+
+        self.assertTrue(cache.fetch("a" * 64, destination))
+        self.assertEqual(os.stat(destination).st_nlink, 1)
+        self.assertEqual(os.stat(cache.find("a" * 64)).st_nlink, 1)
+
+    def test_fetch_links_when_asked(self):
+
+        cache = RenderCache(self.root, link=True)
+        cache.store("a" * 64, self.write("frame.png", "image"))
+        destination = os.path.join(self.folder, "shot", "frame.png")
+
+        self.assertTrue(cache.fetch("a" * 64, destination))
+        self.assertTrue(os.path.samefile(destination, cache.find("a" * 64)))
+
+    def test_evict_by_use_not_object_time(self):
+
+        cache = RenderCache(self.root, max_bytes=5)
+        cache.store("a" * 64, self.write("a.png", "aaaaa"))
+        cache.store("b" * 64, self.write("b.png", "bbbbb"))
+        old = time.time() - 60
+        os.utime(cache.used_path("b" * 64), (old, old))
+        os.utime(cache.used_path("a" * 64), (old - 60, old - 60))
+        cache.fetch("a" * 64, os.path.join(self.folder, "out.png"))
+
+        self.assertEqual(cache.evict(), 5)
+        self.assertTrue(cache.find("a" * 64))
+        self.assertIsNone(cache.find("b" * 64))
+
+    def test_evict_counts_only_unlinked_bytes(self):
+
+        cache = RenderCache(self.root, max_bytes=0, link=True)
+        cache.store("a" * 64, self.write("a.png", "aaaaa"))
+
+        self.assertEqual(cache.evict(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
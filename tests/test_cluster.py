@@ -0,0 +1,79 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from CameraBatch.jobs import RenderJob
+from CameraBatch.cluster import (ClusterPlan, link_outputs)
+
+
+class LinkOutputsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, name, data):
+        path = os.path.join(self.folder, name)
+        with open(path, "w") as f:
+            f.write(data)
+        return path
+
+    def test_links_alias_frames(self):
+
+        self.write("camA.0001.iff", "source")
+        self.write("camB.0001.iff", "stale")
+
+        plan = ClusterPlan()
+        plan.links[("camB", 1)] = ("camA", "exact")
+
+        linked = link_outputs(plan, lambda camera, frame: os.path.join(
+            self.folder, "%s.%04d.iff" % (camera, frame)))
+
+        self.assertEqual(linked, 1)
+        with open(os.path.join(self.folder, "camB.0001.iff")) as f:
+            self.assertEqual(f.read(), "source")
+        self.assertEqual(sorted(os.listdir(self.folder)),
+                         ["camA.0001.iff", "camB.0001.iff"])
+
+    def test_same_path_keeps_source(self):
+
+        # No <Camera> token in the image prefix, every camera writes here.
+        path = self.write("shot.0001.iff", "source")
+
+        plan = ClusterPlan()
+        plan.links[("camB", 1)] = ("camA", "exact")
+
+        linked = link_outputs(plan, lambda camera, frame: path)
+
+        self.assertEqual(linked, 0)
+        with open(path) as f:
+            self.assertEqual(f.read(), "source")
+
+
+class ClusterPlanTest(unittest.TestCase):
+
+    def test_trim_keeps_partly_overlapping_frames(self):
+
+        plan = ClusterPlan()
+        plan.renders["camA"] = list(range(1, 11))
+        plan.renders["camB"] = [1, 2, 3, 9, 10]
+        for frame in range(4, 9):
+            plan.links[("camB", frame)] = ("camA", "exact")
+
+        jobs = plan.trim([RenderJob("shot.ma", "camA", 1, 10),
+                          RenderJob("shot.ma", "camB", 1, 10)])
+
+        self.assertEqual([(job.camera, job.frames) for job in jobs],
+                         [("camA", list(range(1, 11))),
+                          ("camB", [1, 2, 3]), ("camB", [9, 10])])
+        self.assertEqual(plan.aliases, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
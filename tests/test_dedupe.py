@@ -0,0 +1,70 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from CameraBatch.dedupe import FrameDeduper
+
+
+class FrameDeduperTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.deduper = FrameDeduper()
+
+    def tearDown(self):
+        self.deduper.shutdown()
+        shutil.rmtree(self.folder)
+
+    def write(self, name, data):
+        path = os.path.join(self.folder, name)
+        with open(path, "w") as f:
+            f.write(data)
+        return path
+
+    def test_report_later_hands_over_totals(self):
+
+        first = self.write("a.0001.png", "same")
+        second = self.write("a.0002.png", "same")
+        self.deduper.add(first)
+        self.deduper.add(second)
+
+        done = threading.Event()
+        totals = []
+
+        def callback(linked, reclaimed):
+            totals.append((linked, reclaimed))
+            done.set()
+
+        self.deduper.report_later(callback)
+        self.assertTrue(done.wait(5.0))
+        self.assertEqual(totals, [(1, 4)])
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertEqual(self.deduper.report(), (0, 0))
+
+    def test_failed_rename_leaves_no_temporary_file(self):
+
+        first = self.write("a.0001.png", "same")
+        second = self.write("a.0002.png", "same")
+
+        with mock.patch("CameraBatch.dedupe.os.rename",
+                        side_effect=OSError("busy")):
+            self.deduper.add(first)
+            self.deduper.add(second)
+            self.assertEqual(self.deduper.report(), (0, 0))
+
+        self.assertEqual(sorted(os.listdir(self.folder)),
+                         ["a.0001.png", "a.0002.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from CameraBatch.jobs import RenderJob
+from CameraBatch.history import (BatchEta, Estimator, RenderHistory,
+                                 format_duration, format_progress)
+
+
+def job(camera="cam1", start=1, end=4, **kwargs):
+    return RenderJob("/shots/a.ma", camera, start, end, **kwargs)
+
+
+class RenderHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.history = RenderHistory(":memory:")
+
+    def test_frame_times_average_runs(self):
+
+        self.history.record(job(), setup=4.0, frame_times={1: 10.0, 2: 20.0})
+        self.history.record(job(), setup=6.0, frame_times={1: 30.0})
+
+        self.assertEqual(self.history.frame_times(job()), {1: 20.0, 2: 20.0})
+        self.assertEqual(self.history.mean_setup(job()), 5.0)
+
+    def test_mean_frame_falls_back(self):
+
+        self.history.record(job(), frame_times={1: 10.0})
+        self.history.record(job(renderer="arnold"), frame_times={1: 30.0})
+
+        self.assertEqual(self.history.mean_frame(job()), 10.0)
+        self.assertEqual(
+            self.history.mean_frame(job(overrides={"cam1.fStop": 2.8})),
+            20.0)
+        self.assertEqual(self.history.mean_frame(job("cam2")), 20.0)
+        self.assertIsNone(self.history.mean_frame(
+            RenderJob("/shots/b.ma", "cam1", 1, 4)))
+
+
+class EstimatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.history = RenderHistory(":memory:")
+        self.estimator = Estimator(self.history, default_frame=10.0,
+                                   default_setup=5.0)
+
+    def test_defaults_without_history(self):
+
+        self.assertEqual(self.estimator.estimate_job(job()), 45.0)
+
+    def test_known_frames_then_mean(self):
+
+        self.history.record(job(), setup=1.0, frame_times={1: 2.0, 2: 4.0})
+
+        self.assertEqual(self.estimator.frame_estimates(job()),
+                         {1: 2.0, 2: 4.0, 3: 3.0, 4: 3.0})
+        self.assertEqual(self.estimator.estimate_job(job()), 13.0)
+
+    def test_estimate_spreads_over_workers(self):
+
+        jobs = [job("cam1", 1, 10), job("cam2", 1, 4), job("cam3", 1, 4)]
+
+        self.assertEqual(self.estimator.estimate(jobs), 195.0)
+        self.assertEqual(self.estimator.estimate(jobs, workers=2), 105.0)
+        self.assertEqual(
+            [j.camera for j in self.estimator.longest_first(jobs[::-1])],
+            ["cam1", "cam3", "cam2"])
+
+
+class BatchEtaTest(unittest.TestCase):
+
+    def setUp(self):
+        estimator = Estimator(RenderHistory(":memory:"), default_frame=10.0,
+                              default_setup=5.0)
+        self.job = job()
+        self.eta = BatchEta(estimator, [self.job])
+
+    def test_starts_from_prediction(self):
+
+        self.assertEqual(self.eta.seconds(), 45.0)
+
+    def test_scales_by_finished_frames(self):
+
+        with mock.patch("CameraBatch.history.time.time") as clock:
+            clock.return_value = 100.0
+            self.eta.job_started(self.job)
+            clock.return_value = 110.0
+            self.eta.frame_started(self.job, 1)
+            clock.return_value = 130.0
+            self.eta.frame_started(self.job, 2)
+
+        # Setup took 10s for 5 predicted, frame 1 20s for 10 predicted.
+        self.assertEqual(self.eta.scale, 2.0)
+        self.assertEqual(self.eta.seconds(), 60.0)
+
+    def test_finished_job_leaves_batch(self):
+
+        self.eta.job_started(self.job)
+        self.eta.job_finished(self.job, ok=False)
+
+        self.assertEqual(self.eta.seconds(), 0.0)
+        self.assertEqual(self.eta.scale, 1.0)
+
+
+class FormatDurationTest(unittest.TestCase):
+
+    def test_units(self):
+
+        self.assertEqual(format_duration(12.4), "12s")
+        self.assertEqual(format_duration(250), "4m 10s")
+        self.assertEqual(format_duration(3900), "1h 05m")
+
+
+class FormatProgressTest(unittest.TestCase):
+
+    def test_rendering_shows_frame_and_eta(self):
+
+        self.assertEqual(format_progress((3, 10, 4, "rendering", 130)),
+                         "3/10  f4  rendering  2m 10s")
+        self.assertEqual(format_progress((0, 10, None, "rendering", None)),
+                         "0/10  rendering")
+
+    def test_queued_shows_eta(self):
+
+        self.assertEqual(format_progress((0, 10, None, "queued", 45)),
+                         "0/10  queued  45s")
+
+    def test_finished_hides_frame_and_eta(self):
+
+        self.assertEqual(format_progress((10, 10, 10, "done", 0)),
+                         "10/10  done")
+        self.assertEqual(format_progress((4, 10, 5, "failed", 30)),
+                         "4/10  failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from CameraBatch.jobs import (RenderJob, mel_set_attr, validate_overrides)
+
+
+class MelSetAttrTest(unittest.TestCase):
+
+    def test_values(self):
+
+        self.assertEqual(mel_set_attr("defaultResolution.width", 960),
+                         "setAttr defaultResolution.width 960;")
+        self.assertEqual(mel_set_attr("defaultRenderGlobals.animation", True),
+                         "setAttr defaultRenderGlobals.animation 1;")
+        self.assertEqual(
+            mel_set_attr("defaultRenderGlobals.imageFilePrefix", 'a"b\nc'),
+            'setAttr -type "string" defaultRenderGlobals.imageFilePrefix '
+            '"a\\"b\\nc";')
+        self.assertEqual(mel_set_attr("|grp|cam:shape.fStop", 2.8),
+                         "setAttr |grp|cam:shape.fStop 2.8;")
+        self.assertEqual(mel_set_attr("node.list[0].value", 1),
+                         "setAttr node.list[0].value 1;")
+
+    def test_rejects_injection(self):
+
+        for attr in ('x; system("touch /tmp/x"); //',
+                     "defaultResolution.width;",
+                     "defaultResolution.width\n",
+                     "noattr",
+                     ".width",
+                     None):
+            self.assertRaises(ValueError, mel_set_attr, attr, 1)
+
+    def test_rejects_non_finite(self):
+
+        for value in (float("inf"), float("-inf"), float("nan")):
+            self.assertRaises(
+                ValueError, mel_set_attr, "defaultResolution.width", value)
+
+    def test_validate_overrides(self):
+
+        validate_overrides({"defaultResolution.width": 960})
+        self.assertRaises(ValueError, validate_overrides, ["a.b"])
+        self.assertRaises(ValueError, validate_overrides, {"a; b.c": 1})
+
+    def test_command_rejects_bad_overrides(self):
+
+        job = RenderJob("/shots/a.mb", "cam1", 1, 2,
+                        overrides={'x; system("id"); //': 1})
+        self.assertRaises(ValueError, job.command)
+
+
+
+class RenderJobTest(unittest.TestCase):
+
+    def setUp(self):
+        self.job = RenderJob("/shots/a.mb", "cam1", 1, 10, renderer="sw",
+                             project="/shots", step=1,
+                             overrides={"defaultResolution.width": 960})
+
+    def ranges(self, jobs):
+        return [(job.start_frame, job.end_frame, job.step) for job in jobs]
+
+    def test_dict_round_trip(self):
+
+        job = RenderJob.from_dict(self.job.to_dict())
+
+        self.assertEqual(job.to_dict(), self.job.to_dict())
+        self.assertEqual(RenderJob.from_dict(
+            {"scene": "/shots/a.mb", "camera": "cam1", "start_frame": 1,
+             "end_frame": 2}).renderer, "file")
+
+    def test_split_covers_range(self):
+
+        self.assertEqual(self.ranges(self.job.split(4)),
+                         [(1, 4, 1), (5, 8, 1), (9, 10, 1)])
+        self.assertEqual(self.job.split(0), [self.job])
+
+        stepped = RenderJob("/shots/a.mb", "cam1", 1, 20, step=3)
+        frames = [frame for job in stepped.split(3) for frame in job.frames]
+        self.assertEqual(frames, stepped.frames)
+
+    def test_bisect(self):
+
+        self.assertEqual(self.ranges(self.job.bisect()),
+                         [(1, 5, 1), (6, 10, 1)])
+        single = RenderJob("/shots/a.mb", "cam1", 3, 3)
+        self.assertEqual(single.bisect(), [single])
+
+    def test_without(self):
+
+        self.assertEqual(self.ranges(self.job.without([1, 4, 5, 10])),
+                         [(2, 3, 1), (6, 9, 1)])
+        self.assertEqual(self.job.without([20]), [self.job])
+        self.assertEqual(self.job.without(range(1, 11)), [])
+
+    def test_command(self):
+
+        job = RenderJob("/shots/a.mb", "cam1", 1, 10, renderer="sw",
+                        step=2, project="/shots")
+        command = job.command()
+
+        self.assertEqual(command[1:9],
+                         ["-r", "sw", "-s", "1", "-e", "10", "-cam", "cam1"])
+        self.assertEqual(command[command.index("-b") + 1], "2")
+        self.assertEqual(command[command.index("-proj") + 1], "/shots")
+        self.assertEqual(command[-1], "/shots/a.mb")
+
+
+if __name__ == "__main__":
+    unittest.main()
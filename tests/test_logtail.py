@@ -0,0 +1,129 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from CameraBatch import logtail
+from CameraBatch.logtail import LogTailer, PatternTable, pattern_table
+
+
+class PatternTableTest(unittest.TestCase):
+
+    def test_first_matching_pattern_wins(self):
+
+        table = PatternTable([("first", r"frame (?P<frame>\d+)"),
+                              ("second", r"frame (?P<frame>\d+) done")])
+
+        self.assertEqual(table.match("frame 4 done"),
+                         ("first", {"frame": "4"}))
+
+    def test_screen_rejects_other_lines(self):
+
+        table = pattern_table("arnold")
+
+        self.assertIsNone(table.match("00:00:01  loading plugins"))
+        self.assertEqual(table.match("// Error: no camera")[0], logtail.ERROR)
+
+    def test_empty_table_matches_nothing(self):
+
+        self.assertIsNone(PatternTable([]).match("Rendering Completed"))
+
+    def test_unknown_renderer_uses_every_pattern(self):
+
+        self.assertIs(pattern_table("mayaHardware"), pattern_table("file"))
+        self.assertEqual(
+            pattern_table("mayaHardware").match(
+                "[Redshift] ERROR: out of memory"),
+            (logtail.ERROR, {"message": "out of memory"}))
+
+
+class LogTailerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "render.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, data, mode="a"):
+        with open(self.path, mode) as f:
+            f.write(data)
+
+    def kinds(self, events):
+        return [event.kind for event in events]
+
+    def test_reads_only_appended_lines(self):
+
+        tailer = LogTailer(self.path, pattern_table("sw"))
+        self.assertEqual(tailer.poll(), [])
+
+        self.write("Percentage of rendering done: 10\n")
+        self.assertEqual(self.kinds(tailer.poll()), [logtail.PROGRESS])
+        self.assertEqual(tailer.poll(), [])
+
+        self.write("Percentage of rendering done: 50\n")
+        events = tailer.poll()
+        self.assertEqual([event.percent for event in events], [50])
+
+    def test_keeps_partial_line_for_next_poll(self):
+
+        tailer = LogTailer(self.path, pattern_table("sw"))
+
+        self.write("Rendering Comp")
+        self.assertEqual(tailer.poll(), [])
+
+        self.write("leted\n")
+        self.assertEqual(self.kinds(tailer.poll()), [logtail.FINISHED])
+
+    def test_rotation_rereads_from_start(self):
+
+        tailer = LogTailer(self.path, pattern_table("sw"))
+        self.write("Percentage of rendering done: 10\n"
+                   "Percentage of rendering done: 20\n")
+        tailer.poll()
+
+        os.rename(self.path, self.path + ".1")
+        self.write("Rendering Completed\n")
+
+        self.assertEqual(self.kinds(tailer.poll()), [logtail.FINISHED])
+
+    def test_truncation_rereads_from_start(self):
+
+        tailer = LogTailer(self.path, pattern_table("sw"))
+        self.write("Percentage of rendering done: 10\n"
+                   "Percentage of rendering done: 20\n")
+        tailer.poll()
+
+        self.write("Rendering Completed\n", mode="w")
+
+        self.assertEqual(self.kinds(tailer.poll()), [logtail.FINISHED])
+
+    def test_from_end_skips_existing_lines(self):
+
+        self.write("Rendering Completed\n")
+        tailer = LogTailer(self.path, pattern_table("sw"), from_end=True)
+
+        self.assertEqual(tailer.poll(), [])
+        self.write("Percentage of rendering done: 30\n")
+        self.assertEqual(self.kinds(tailer.poll()), [logtail.PROGRESS])
+
+    def test_progress_carries_started_frame(self):
+
+        tailer = LogTailer(self.path, pattern_table("arnold"))
+        self.write("Rendering frame 12\n"
+                   "00:00:03 | 40% done\n")
+
+        events = tailer.poll()
+
+        self.assertEqual(self.kinds(events),
+                         [logtail.FRAME_STARTED, logtail.PROGRESS])
+        self.assertEqual([event.frame for event in events], [12, 12])
+        self.assertEqual(events[1].percent, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
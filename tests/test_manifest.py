@@ -0,0 +1,99 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from CameraBatch.jobs import RenderJob
+from CameraBatch.manifest import (FrameTask, ManifestError, ManifestReader,
+                                  make_header, write_manifest)
+
+TASKS = [
+    FrameTask("cam1", [(1, 100, 1)]),
+    FrameTask(u"caméra:shot|cam2", [(-10, -1, 1), (5, 5, 1), (20, 60, 5)],
+              {"cam2Shape.fStop": 2.8}),
+    FrameTask("cam1", [(101, 200, 1)], {"defaultResolution.width": 960}),
+    FrameTask("cam3", [(2 ** 40, 2 ** 40 + 3, 1)],
+              {"cam2Shape.fStop": 2.8}),
+]
+
+
+class ManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.header = make_header("/shots/a.ma", renderer="arnold",
+                                  project="/shots",
+                                  overrides={"defaultResolution.width": 1920})
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def round_trip(self, name):
+
+        path = os.path.join(self.folder, name)
+        self.assertEqual(write_manifest(path, self.header, iter(TASKS)),
+                         len(TASKS))
+
+        with ManifestReader(path) as reader:
+            return reader.binary, reader.header, list(reader)
+
+    def test_binary_round_trip(self):
+
+        binary, header, tasks = self.round_trip("batch.cbm")
+
+        self.assertTrue(binary)
+        self.assertEqual(header, self.header)
+        self.assertEqual(tasks, TASKS)
+
+    def test_json_lines_round_trip(self):
+
+        binary, header, tasks = self.round_trip("batch.cbm.json")
+
+        self.assertFalse(binary)
+        self.assertEqual(header, self.header)
+        self.assertEqual(tasks, TASKS)
+
+    def test_binary_interns_repeated_cameras(self):
+
+        tasks = [FrameTask("shot010:renderCam", [(frame, frame, 1)])
+                 for frame in range(1000)]
+        binary = os.path.join(self.folder, "batch.cbm")
+        lines = os.path.join(self.folder, "batch.cbm.json")
+        write_manifest(binary, self.header, tasks)
+        write_manifest(lines, self.header, tasks)
+
+        self.assertLess(os.path.getsize(binary) * 5, os.path.getsize(lines))
+        with ManifestReader(binary) as reader:
+            self.assertEqual(list(reader), tasks)
+
+    def test_jobs_merge_header_overrides(self):
+
+        path = os.path.join(self.folder, "batch.cbm")
+        write_manifest(path, self.header, TASKS[2:3])
+
+        with ManifestReader(path) as reader:
+            jobs = list(reader.jobs())
+
+        self.assertEqual(len(jobs), 1)
+        self.assertIsInstance(jobs[0], RenderJob)
+        self.assertEqual((jobs[0].scene, jobs[0].renderer, jobs[0].project),
+                         ("/shots/a.ma", "arnold", "/shots"))
+        self.assertEqual(jobs[0].overrides,
+                         {"defaultResolution.width": 960})
+
+    def test_rejects_other_versions(self):
+
+        path = os.path.join(self.folder, "batch.cbm.json")
+        header = dict(self.header, version=99)
+        with open(path, "w") as f:
+            f.write(json.dumps(header) + "\n")
+
+        self.assertRaises(ManifestError, ManifestReader, path)
+
+
+if __name__ == "__main__":
+    unittest.main()
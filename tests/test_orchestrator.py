@@ -0,0 +1,51 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from CameraBatch.jobs import RenderJob
+from CameraBatch import backends
+from CameraBatch.orchestrator import (RetryPolicy, run_jobs)
+
+
+class RecoverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.backend = backends.register_backend(backends.TestBackend())
+        self.backend.delay = 0.0
+        os.environ["CAMERABATCH_TEST_CRASH"] = "5"
+
+    def tearDown(self):
+        backends.BACKENDS.pop("test", None)
+        del os.environ["CAMERABATCH_TEST_CRASH"]
+        shutil.rmtree(self.folder)
+
+    def test_bisect_skips_rendered_frames(self):
+
+        job = RenderJob(os.path.join(self.folder, "scenes", "shot.ma"),
+                        "cam1", 1, 8, renderer="test")
+        started = []
+
+        results = run_jobs([job], on_start=started.append,
+                           retry=RetryPolicy(attempts=2, backoff=0.0))
+
+        self.assertEqual(results[0].poison, [5])
+        for piece in started[2:]:
+            self.assertFalse(set(piece.frames) & set([1, 2, 3, 4]), piece)
+
+    def test_without_keeps_runs(self):
+
+        job = RenderJob("shot.ma", "cam1", 1, 9, step=2)
+        pieces = job.without([3, 7])
+
+        self.assertEqual([piece.frames for piece in pieces],
+                         [[1], [5], [9]])
+        self.assertEqual(job.without([2]), [job])
+
+
+if __name__ == "__main__":
+    unittest.main()
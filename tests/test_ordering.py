@@ -0,0 +1,76 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from CameraBatch.jobs import RenderJob
+from CameraBatch.ordering import order_jobs, progressive_passes
+
+
+def rendered(jobs):
+    return [(job.camera, frame) for job in jobs for frame in job.frames]
+
+
+class OrderJobsTest(unittest.TestCase):
+
+    def test_progressive_covers_every_frame_once(self):
+
+        for count in range(1, 70):
+            for step in (1, 2, 3):
+                job = RenderJob("/shots/a.ma", "cam", -5,
+                                -5 + (count - 1) * step, step=step)
+
+                frames = rendered(order_jobs([job], "progressive"))
+
+                self.assertEqual(sorted(frames), rendered([job]),
+                                 (count, step))
+
+    def test_progressive_covers_every_camera(self):
+
+        jobs = [RenderJob("/shots/a.ma", "cam1", 1, 100),
+                RenderJob("/shots/a.ma", "cam2", 10, 12),
+                RenderJob("/shots/a.ma", "cam3", 5, 5)]
+
+        frames = rendered(order_jobs(jobs, "progressive"))
+
+        self.assertEqual(len(frames), len(set(frames)))
+        self.assertEqual(sorted(frames), sorted(rendered(jobs)))
+
+    def test_progressive_samples_every_camera_first(self):
+
+        jobs = [RenderJob("/shots/a.ma", "cam1", 1, 101),
+                RenderJob("/shots/a.ma", "cam2", 1, 101)]
+
+        ordered = order_jobs(jobs, "progressive")
+        first = rendered(ordered[:2])
+
+        self.assertEqual(first, [("cam1", 1), ("cam1", 51), ("cam1", 101),
+                                 ("cam2", 1), ("cam2", 51), ("cam2", 101)])
+
+    def test_passes_grow_denser(self):
+
+        job = RenderJob("/shots/a.ma", "cam", 1, 17)
+
+        sizes = [len(rendered(jobs)) for jobs in progressive_passes(job)]
+
+        self.assertEqual(sum(sizes), 17)
+        self.assertEqual(sizes[0], 3)
+        self.assertEqual(sizes[1:], sorted(sizes[1:]))
+
+    def test_sequential_keeps_order(self):
+
+        jobs = [RenderJob("/shots/a.ma", "cam2", 1, 10),
+                RenderJob("/shots/a.ma", "cam1", 1, 10)]
+
+        self.assertEqual(order_jobs(jobs), jobs)
+        self.assertEqual(order_jobs([], "progressive"), [])
+
+    def test_unknown_ordering(self):
+
+        job = RenderJob("/shots/a.ma", "cam", 1, 10)
+
+        self.assertRaises(KeyError, order_jobs, [job], "random")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from CameraBatch.jobs import RenderJob
+from CameraBatch.backends import renderer_backend
+from CameraBatch.playblast import (PLAYBLAST_OVERRIDES, PLAYBLAST_RENDERER,
+                                   playblast_job)
+
+
+class PlayblastJobTest(unittest.TestCase):
+
+    def setUp(self):
+        self.job = RenderJob("/shots/a.ma", "cam1", 1, 24, renderer="arnold",
+                             project="/shots", step=2,
+                             overrides={"defaultResolution.width": 960})
+
+    def test_renders_with_hardware_2(self):
+
+        job = playblast_job(self.job)
+
+        self.assertEqual(job.renderer, PLAYBLAST_RENDERER)
+        self.assertEqual((job.camera, job.frames, job.project),
+                         ("cam1", self.job.frames, "/shots"))
+        self.assertEqual(self.job.renderer, "arnold")
+
+    def test_job_overrides_win(self):
+
+        self.job.overrides["hardwareRenderingGlobals.ssaoEnable"] = True
+
+        overrides = playblast_job(self.job).overrides
+
+        self.assertTrue(overrides["hardwareRenderingGlobals.ssaoEnable"])
+        self.assertEqual(overrides["defaultResolution.width"], 960)
+        self.assertFalse(
+            overrides["hardwareRenderingGlobals.motionBlurEnable"])
+        self.assertEqual(set(overrides),
+                         set(PLAYBLAST_OVERRIDES) |
+                         set(["defaultResolution.width"]))
+
+    def test_command_sets_viewport_settings(self):
+
+        job = playblast_job(self.job)
+        command = renderer_backend(job.renderer).command(job)
+
+        self.assertEqual(command[command.index("-r") + 1], "hw2")
+        self.assertIn("setAttr hardwareRenderingGlobals.ssaoEnable 0;",
+                      command[command.index("-preRender") + 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
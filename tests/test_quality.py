@@ -0,0 +1,66 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from CameraBatch.jobs import RenderJob
+from CameraBatch.quality import (DRAFT_SAMPLING, QualityTier, TIERS,
+                                 quality_tier)
+
+
+class QualityTierTest(unittest.TestCase):
+
+    def test_resolves_names(self):
+
+        self.assertIs(quality_tier(), TIERS["final"])
+        self.assertIs(quality_tier(""), TIERS["final"])
+        self.assertIs(quality_tier("draft"), TIERS["draft"])
+        self.assertRaises(KeyError, quality_tier, "ultra")
+
+    def test_final_leaves_job_alone(self):
+
+        job = RenderJob("/shots/a.ma", "cam", 1, 100)
+
+        self.assertTrue(quality_tier().is_final)
+        self.assertIs(quality_tier().apply(job, (1920, 1080)), job)
+
+    def test_step_multiplies_job_step(self):
+
+        job = RenderJob("/shots/a.ma", "cam", 1, 100, step=2,
+                        overrides={"cam.fStop": 2.8})
+
+        draft = quality_tier("draft").apply(job, (1920, 1080))
+
+        self.assertEqual(draft.step, 20)
+        self.assertEqual(draft.frames, list(range(1, 101, 20)))
+        self.assertEqual(draft.overrides["cam.fStop"], 2.8)
+        self.assertEqual(job.step, 2)
+
+    def test_overrides_scale_resolution_and_sampling(self):
+
+        overrides = quality_tier("preview").overrides("arnold", (1920, 1080))
+
+        self.assertEqual(overrides["defaultResolution.width"], 960)
+        self.assertEqual(overrides["defaultResolution.height"], 540)
+        for attr, value in DRAFT_SAMPLING["arnold"].items():
+            self.assertEqual(overrides[attr], value)
+
+    def test_unknown_renderer_keeps_scene_sampling(self):
+
+        overrides = quality_tier("draft").overrides("vray", None)
+
+        self.assertEqual(overrides, {"defaultResolution.width": 160,
+                                     "defaultResolution.height": 120})
+
+    def test_resolution_never_reaches_zero(self):
+
+        tier = QualityTier("tiny", resolution_scale=0.001)
+
+        self.assertEqual(tier.overrides("sw", (100, 100)),
+                         {"defaultResolution.width": 1,
+                          "defaultResolution.height": 1})
+        self.assertEqual(QualityTier("bad", step=0).step, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import maya.standalone
+    from maya import cmds
+    from CameraBatch.sampler import (CameraSampler, export_npz)
+except ImportError:
+    cmds = None
+
+
+def setUpModule():
+    if cmds is not None:
+        maya.standalone.initialize()
+
+
+class Camera(object):
+
+    def __init__(self, transform, shape, start_frame, end_frame):
+        self.name = transform
+        self.shape = shape
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+
+
+@unittest.skipUnless(cmds and numpy, "needs mayapy with numpy")
+class CameraSamplerTest(unittest.TestCase):
+
+    def setUp(self):
+        cmds.file(new=True, force=True)
+        self.folder = tempfile.mkdtemp()
+
+        transform, shape = cmds.camera(name="camA", focalLength=50)
+        for frame, value in ((1, 0.0), (11, 10.0)):
+            cmds.setKeyframe(transform, attribute="translateX", time=frame,
+                             value=value, inTangentType="linear",
+                             outTangentType="linear")
+        self.cameras = [Camera(transform, shape, 1, 11),
+                        Camera(*cmds.camera(name="camB") + [5, 6])]
+        cmds.currentTime(3)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_samples_every_frame(self):
+
+        samples = CameraSampler().sample(self.cameras)
+
+        cam_a = samples["camA"]
+        self.assertEqual(list(cam_a.frames), list(range(1, 12)))
+        numpy.testing.assert_allclose(cam_a.translation[:, 0],
+                                      numpy.arange(11.0))
+        numpy.testing.assert_allclose(cam_a.focal_length, 50.0)
+        self.assertEqual(samples["camB"].matrices.shape, (2, 4, 4))
+        self.assertEqual(cmds.currentTime(query=True), 3)
+
+    def test_export_npz(self):
+
+        samples = CameraSampler().sample(self.cameras)
+        path = os.path.join(self.folder, "cameras.npz")
+
+        export_npz(samples, path)
+
+        with numpy.load(path) as data:
+            self.assertEqual(sorted(data.files), sorted(
+                "{0}/{1}".format(name, attr) for name in ("camA", "camB")
+                for attr in ("frames", "matrices", "focal_length",
+                             "filmback")))
+            numpy.testing.assert_allclose(data["camA/matrices"],
+                                          samples["camA"].matrices)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from CameraBatch.scene import read_scene
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# cameras.ma and cameras.mb must be saved from the same scene.
+EXPECTED_CAMERAS = [("shotCam", (101, 148)), ("wideCam", (1, 24))]
+EXPECTED_RESOLUTION = (1920, 1080)
+
+
+class SceneTest(object):
+
+    path = None
+
+    def read(self):
+        return read_scene(self.path, experimental_mb=True)
+
+    def test_cameras(self):
+        info = self.read()
+        self.assertEqual([(camera.name, camera.frame_range)
+                          for camera in info.batch_cameras()],
+                         EXPECTED_CAMERAS)
+
+    def test_resolution(self):
+        info = self.read()
+        self.assertEqual((info.resolution["width"],
+                          info.resolution["height"]), EXPECTED_RESOLUTION)
+
+    def test_renderer(self):
+        self.assertEqual(self.read().renderer, "arnold")
+
+
+class MayaAsciiTest(SceneTest, unittest.TestCase):
+
+    path = os.path.join(FIXTURES, "cameras.ma")
+
+
+@unittest.skipUnless(os.path.isfile(os.path.join(FIXTURES, "cameras.mb")),
+                     "needs cameras.mb saved from Maya")
+class MayaBinaryTest(SceneTest, unittest.TestCase):
+
+    path = os.path.join(FIXTURES, "cameras.mb")
+
+
+class MayaBinaryOptInTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "scene.mb")
+        with open(self.path, "wb") as f:
+            f.write(b"FOR4\x00\x00\x00\x04Maya")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_reads_newer_ascii_sibling(self):
+
+        shutil.copy(os.path.join(FIXTURES, "cameras.ma"),
+                    os.path.join(self.folder, "scene.ma"))
+        info = read_scene(self.path, experimental_mb=False)
+        self.assertEqual([(camera.name, camera.frame_range)
+                          for camera in info.batch_cameras()],
+                         EXPECTED_CAMERAS)
+
+    def test_refused_by_default(self):
+
+        os.environ.pop("CAMERABATCH_EXPERIMENTAL_MB", None)
+        with self.assertRaises(RuntimeError) as context:
+            read_scene(self.path)
+        self.assertIn("Maya ASCII", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
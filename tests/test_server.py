@@ -0,0 +1,153 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+try:
+    from urllib.request import (Request, urlopen)
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import (Request, urlopen, HTTPError)
+
+from CameraBatch.farm.client import FarmClient
+from CameraBatch.farm.server import (JobServer, TOKEN_HEADER)
+from CameraBatch.jobs import RenderJob
+from CameraBatch import backends
+from CameraBatch.farm.agent import Agent
+
+
+class JobServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = JobServer(port=0, token="secret")
+        self.server.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def post(self, path, body, token="secret"):
+
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers[TOKEN_HEADER] = token
+        request = Request(self.server.url + path, data=body, headers=headers)
+        try:
+            response = urlopen(request, timeout=5)
+        except HTTPError as e:
+            return e.code
+        response.close()
+        return response.getcode()
+
+    def test_submit_and_claim(self):
+
+        client = FarmClient(self.server.url, token="secret")
+        ids = client.submit([RenderJob(
+            "/shots/a.mb", "cam1", 1, 10,
+            overrides={"defaultResolution.width": 960})])
+        self.assertEqual(len(ids), 1)
+        self.assertEqual(client.claim("agent")["camera"], "cam1")
+
+    def test_requires_token(self):
+
+        body = json.dumps({"agent": "a"}).encode("utf-8")
+        self.assertEqual(self.post("/claim", body, token=None), 403)
+        self.assertEqual(self.post("/claim", body, token="wrong"), 403)
+        self.assertEqual(self.post("/claim", body), 200)
+
+    def test_bad_requests(self):
+
+        self.assertEqual(self.post("/claim", b"{}"), 400)
+        self.assertEqual(self.post("/claim", b"[1, 2]"), 400)
+        self.assertEqual(self.post("/heartbeat", b'{"agent": "a"}'), 400)
+        self.assertEqual(self.post("/jobs", b'{"jobs": [1]}'), 400)
+
+    def test_rejects_unsafe_overrides(self):
+
+        job = RenderJob("/shots/a.mb", "cam1", 1, 10).to_dict()
+        job["overrides"] = {'x; system("id"); //': 1}
+        body = json.dumps({"jobs": [job]}).encode("utf-8")
+
+        self.assertEqual(self.post("/jobs", body), 400)
+        self.assertEqual(self.server.queue.snapshot()["jobs"], [])
+
+    def test_rejects_relative_and_test_jobs(self):
+
+        for job in (RenderJob("a.mb", "cam1", 1, 10),
+                    RenderJob("/shots/a.mb", "cam1", 1, 10, project="proj"),
+                    RenderJob("/shots/a.mb", "cam1", 1, 10,
+                              renderer="test")):
+            body = json.dumps({"jobs": [job.to_dict()]}).encode("utf-8")
+            self.assertEqual(self.post("/jobs", body), 400)
+
+        windows = RenderJob("C:\\shots\\a.mb", "cam1", 1, 10)
+        body = json.dumps({"jobs": [windows.to_dict()]}).encode("utf-8")
+        self.assertEqual(self.post("/jobs", body), 200)
+
+
+class JobServerHostTest(unittest.TestCase):
+
+    def test_refuses_open_network_without_token(self):
+
+        os.environ.pop("CAMERABATCH_TOKEN", None)
+        with self.assertRaises(ValueError):
+            JobServer(host="0.0.0.0", port=0)
+
+
+class QueueClient(object):
+
+    def __init__(self, record):
+        self.record = record
+        self.reports = []
+
+    def claim(self, agent):
+        record, self.record = self.record, None
+        return record
+
+    def heartbeat(self, agent, job_id, frame):
+        return False
+
+    def report(self, agent, job_id, status, returncode=None):
+        self.reports.append(status)
+
+
+class AgentInterruptTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.backend = backends.register_backend(backends.TestBackend())
+        self.backend.delay = 30.0
+
+    def tearDown(self):
+        backends.BACKENDS.pop("test", None)
+        shutil.rmtree(self.folder)
+
+    def test_interrupt_stops_the_render(self):
+
+        job = RenderJob(os.path.join(self.folder, "scenes", "a.ma"),
+                        "cam1", 1, 2, renderer="test").to_dict()
+        job["id"] = "1"
+        client = QueueClient(job)
+        agent = Agent(client, heartbeat=60.0)
+        pids = []
+
+        def interrupt():
+            pids.extend(process.pid for process
+                        in agent.orchestrator.processes.values())
+            raise KeyboardInterrupt()
+
+        agent.loop.call_later(1.0, interrupt)
+        with self.assertRaises(KeyboardInterrupt):
+            agent.run_one()
+
+        self.assertEqual(len(pids), 1)
+        with self.assertRaises(OSError):
+            os.kill(pids[0], 0)
+        self.assertEqual(client.reports, ["failed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+
+from CameraBatch.farm.spool import Spool
+from CameraBatch.jobs import RenderJob
+
+
+def claim_all(root, agent, results):
+
+    spool = Spool(root)
+    claimed = []
+
+    while True:
+        record = spool.claim(agent)
+        if record is None:
+            break
+        claimed.append((record["id"], record["attempts"]))
+        spool.report(agent, record["id"], "finished", 0)
+
+    results.put(claimed)
+
+
+class SpoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.spool = Spool(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_claim_counts_attempts(self):
+
+        job_id = self.spool.submit([RenderJob("/a.mb", "cam1", 1, 10)])[0]
+
+        record = self.spool.claim("agent")
+        self.assertEqual(record["id"], job_id)
+        self.assertEqual(record["attempts"], 1)
+
+        claimed = os.listdir(os.path.join(self.root, "claimed"))
+        with open(os.path.join(self.root, "claimed", claimed[0])) as f:
+            self.assertEqual(json.load(f)["attempts"], 1)
+        self.assertEqual(os.listdir(os.path.join(self.root, "tmp")), [])
+
+    def test_concurrent_claims(self):
+
+        count = 64
+        ids = self.spool.submit([RenderJob("/a.mb", "cam%d" % i, 1, 10)
+                                 for i in range(count)])
+
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(
+            target=claim_all, args=(self.root, "agent%d" % i, results))
+            for i in range(16)]
+        for worker in workers:
+            worker.start()
+        claimed = [item for _ in workers for item in results.get(timeout=60)]
+        for worker in workers:
+            worker.join()
+
+        # Every job claimed exactly once, on its first attempt.
+        self.assertEqual(sorted(job_id for job_id, _ in claimed), sorted(ids))
+        self.assertEqual(set(attempts for _, attempts in claimed), set([1]))
+        self.assertEqual(self.spool.status(), {
+            "queue": 0, "claimed": 0, "done": count, "failed": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
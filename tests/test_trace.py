@@ -0,0 +1,90 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from CameraBatch.trace import Tracer
+
+
+class TracerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "trace.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def load(self, tracer):
+        with open(tracer.save(self.path)) as f:
+            return json.load(f)
+
+    def named(self, events, phase):
+        return [event for event in events if event["ph"] == phase]
+
+    def test_saves_trace_event_json(self):
+
+        tracer = Tracer()
+        tracer.complete("queue", "cam1", tracer.origin + 1.0,
+                        tracer.origin + 3.5, args={"frames": 10})
+        tracer.instant("queue", "cancelled")
+
+        data = self.load(tracer)
+
+        self.assertEqual(data["displayTimeUnit"], "ms")
+        span = self.named(data["traceEvents"], "X")[0]
+        self.assertEqual((span["name"], span["ts"], span["dur"]),
+                         ("cam1", 1000000, 2500000))
+        self.assertEqual(span["args"], {"frames": 10})
+        self.assertEqual(self.named(data["traceEvents"], "i")[0]["s"], "t")
+
+    def test_lanes_get_their_own_thread(self):
+
+        tracer = Tracer()
+        tracer.instant("worker 1", "start")
+        tracer.instant("worker 2", "start")
+        tracer.instant("worker 1", "stop")
+
+        events = self.load(tracer)["traceEvents"]
+
+        names = dict((event["args"]["name"], event["tid"])
+                     for event in events
+                     if event["name"] == "thread_name")
+        self.assertEqual(names, {"worker 1": 1, "worker 2": 2})
+        self.assertEqual([event["tid"] for event in self.named(events, "i")],
+                         [1, 2, 1])
+
+    def test_begin_closes_previous_span(self):
+
+        tracer = Tracer()
+        tracer.begin("worker 1", "cam1")
+        tracer.begin("worker 1", "cam2")
+
+        events = self.load(tracer)["traceEvents"]
+
+        self.assertEqual(
+            [(event["ph"], event["name"]) for event in events
+             if event["ph"] in "BE"],
+            [("B", "cam1"), ("E", "cam1"), ("B", "cam2"), ("E", "cam2")])
+        self.assertEqual(tracer.open_spans, {})
+
+    def test_span_records_on_error(self):
+
+        tracer = Tracer()
+
+        def fail():
+            with tracer.span("worker 1", "cam1", frame=4):
+                raise ValueError("boom")
+
+        self.assertRaises(ValueError, fail)
+        span = self.named(tracer.events, "X")[0]
+        self.assertEqual(span["args"], {"frame": 4})
+        self.assertGreaterEqual(span["dur"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import sys
+import types
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from CameraBatch import utils
+
+
+class ShowTest(unittest.TestCase):
+    """
+    The window singleton, with the Qt modules of the ui package mocked.
+    """
+    def setUp(self):
+        self.windows = []
+
+        def UI(parent=None):
+            window = mock.MagicMock()
+            window.isMinimized.return_value = False
+            # Deleted windows are no longer found.
+            window.deleteLater.side_effect = lambda: self.windows.remove(
+                window)
+            self.windows.append(window)
+            return window
+        UI.object_name = "CameraBatchWindow"
+
+        def find_window(object_name):
+            if object_name == UI.object_name and self.windows:
+                return self.windows[0]
+            return None
+
+        ui_utils = types.ModuleType("CameraBatch.ui.utils")
+        ui_utils.find_window = find_window
+        ui_utils.get_maya_window = lambda: None
+        ui_ui = types.ModuleType("CameraBatch.ui.ui")
+        ui_ui.UI = UI
+        package = types.ModuleType("CameraBatch.ui")
+        package.ui = ui_ui
+        package.utils = ui_utils
+
+        modules = {"CameraBatch.ui": package,
+                   "CameraBatch.ui.ui": ui_ui,
+                   "CameraBatch.ui.utils": ui_utils}
+        patch = mock.patch.dict(sys.modules, modules)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_show_reuses_window(self):
+
+        first = utils.show()
+        second = utils.show()
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.windows), 1)
+        self.assertEqual(first.show.call_count, 2)
+
+    def test_show_restores_minimized_window(self):
+
+        window = utils.show()
+        window.isMinimized.return_value = True
+
+        utils.show()
+
+        window.showNormal.assert_called_once_with()
+
+    def test_close_tears_down(self):
+
+        utils.close()
+        window = utils.show()
+        utils.close()
+
+        window.teardown.assert_called_once_with()
+        window.deleteLater.assert_called_once_with()
+        self.assertIsNot(utils.show(), window)
+
+
+if __name__ == "__main__":
+    unittest.main()